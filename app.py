@@ -4,45 +4,33 @@ eventlet.monkey_patch()
 from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, flash, session, current_app
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
-from elevenlabs import stream
-from elevenlabs.client import ElevenLabs
 import os
 from dotenv import load_dotenv
 import tempfile
 from io import BytesIO
 import wave
-import numpy as np
 import uuid
 import json
-from langchain_openai import ChatOpenAI
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationChain
-from langchain_core.prompts import ChatPromptTemplate
 from datetime import datetime, timedelta
 from pathlib import Path
-from daria_interview_tool.vector_store import InterviewVectorStore
 import traceback
 import logging
 from markupsafe import Markup
 from openai import OpenAI
 import markdown  # Added this import since it's used in the markdown filter
-from daria_interview_tool.google_ai import GeminiPersonaGenerator
 from daria_interview_tool.daria_resources import get_interview_prompt, BASE_SYSTEM_PROMPT, INTERVIEWER_BEST_PRACTICES
-from langchain.schema import SystemMessage, HumanMessage
-from langchain.vectorstores import VectorStore
-import MySQLdb
 from werkzeug.utils import secure_filename
 import re
 import markdown2
-from daria_interview_tool.semantic_analysis import SemanticAnalyzer
-from sklearn.metrics.pairwise import cosine_similarity
-from daria_interview_tool.processed_interview_store import ProcessedInterviewStore
+from daria_interview_tool.model_registry import model_stats
+from daria_interview_tool.llm_cache import cached_chat_completion, get_llm_cache
+from daria_interview_tool.interview_catalog import InterviewCatalog
+from daria_interview_tool.text_index import TextIndex, raw_interview_documents, text_index_path
+from daria_interview_tool.hybrid_search import hybrid_search
 import sys
 from daria_interview_tool.discovery_gpt import DiscoveryGPT
 from asgiref.sync import async_to_sync
-from daria_interview_tool.persona_gpt import generate_persona_from_interviews
 from flask_sqlalchemy import SQLAlchemy
-from PIL import Image, ImageDraw, ImageFont
 import random
 
 # Import the jarvis_wrapper module
@@ -73,35 +61,18 @@ app.config['OPENAI_API_KEY'] = os.getenv('OPENAI_API_KEY')  # Add OpenAI API key
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-# Import and register the memory companion blueprint
-try:
-    from api_services.memory_companion_service import memory_companion_bp
-    app.register_blueprint(memory_companion_bp)
-    print("Successfully registered Memory Companion blueprint")
-except Exception as e:
-    print(f"Failed to register Memory Companion blueprint: {str(e)}")
-    # Continue without the memory companion functionality
-
 # Global directories
 interview_dirs = ['interviews', 'interviews/raw', 'interviews/processed']
 
-# Initialize SQLAlchemy
-db = SQLAlchemy(app)
+# Initialize SQLAlchemy; bound to the app in create_app()
+db = SQLAlchemy()
 
 # Database models for the research survey functionality
 class ResearchSurveyResponse(db.Model):
     id = db.Column(db.Integer, primary_key=True)
 
-# Create database tables if they don't exist
-with app.app_context():
-    try:
-        db.create_all()
-        logger.info("Database tables created successfully")
-    except Exception as e:
-        logger.error(f"Error creating database tables: {str(e)}")
-
-# Configure CORS
-CORS(app, resources={
+# CORS settings, applied in create_app()
+CORS_RESOURCES = {
     r"/api/*": {
         "origins": ["http://localhost:5173", "http://localhost:5175"],  # React dev server ports
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
@@ -116,15 +87,10 @@ CORS(app, resources={
     r"/text_to_speech": {"origins": ["http://localhost:5174", "http://localhost:5175"]},
     r"/process_audio": {"origins": ["http://localhost:5174", "http://localhost:5175"]},
     r"/*": {"origins": ["http://localhost:5175"]}  # Allow all routes for the new frontend port
-})
-
-# Configure SocketIO with CORS
-socketio = SocketIO(app, 
-    cors_allowed_origins=["http://localhost:5173", "http://localhost:5175"],
-    async_mode='eventlet',
-    logger=True,
-    engineio_logger=True
-)
+}
+
+# SocketIO, bound to the app with CORS in create_app()
+socketio = SocketIO()
 
 load_dotenv()
 
@@ -137,10 +103,16 @@ def markdown_filter(text):
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable is not set")
+# Created on first text-to-speech request
+elevenlabs_client = None
 
-elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+def get_elevenlabs_client():
+    """Return the process-wide ElevenLabs client."""
+    global elevenlabs_client
+    if elevenlabs_client is None:
+        from elevenlabs.client import ElevenLabs
+        elevenlabs_client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
+    return elevenlabs_client
 
 # Store audio responses temporarily
 TEMP_DIR = tempfile.mkdtemp()
@@ -182,13 +154,9 @@ conversations['GreenEggsAndHam'] = {
     ]
 }
 
-# Add after the existing configuration
+# Interview and persona directories, created in create_app()
 INTERVIEWS_DIR = Path('interviews/raw')
-INTERVIEWS_DIR.mkdir(parents=True, exist_ok=True)
-
-# Add after INTERVIEWS_DIR definition
 PERSONAS_DIR = Path('personas')
-PERSONAS_DIR.mkdir(exist_ok=True)
 
 # Add maximum rounds constant
 MAX_ROUNDS = 3
@@ -196,8 +164,27 @@ MAX_ROUNDS = 3
 # Initialize vector store
 app.vector_store = None
 
-# Initialize semantic analyzer
-semantic_analyzer = SemanticAnalyzer()
+# Semantic analyzer, created on first use since it loads the embedding and emotion models
+semantic_analyzer = None
+
+def get_semantic_analyzer():
+    """Return the process-wide SemanticAnalyzer."""
+    global semantic_analyzer
+    if semantic_analyzer is None:
+        from daria_interview_tool.semantic_analysis import SemanticAnalyzer
+        semantic_analyzer = SemanticAnalyzer()
+    return semantic_analyzer
+
+# Shared processed-interview store, created on first search (models come from the process-wide registry)
+processed_store = None
+
+def get_processed_store():
+    """Return the process-wide ProcessedInterviewStore."""
+    global processed_store
+    if processed_store is None:
+        from daria_interview_tool.processed_interview_store import ProcessedInterviewStore
+        processed_store = ProcessedInterviewStore()
+    return processed_store
 
 # Add emotion icon filter
 @app.template_filter('emotion_icon')
@@ -218,57 +205,66 @@ def emotion_icon_filter(emotion):
     return emotion_icons.get(emotion.lower(), '😐')
 
 # Helper functions
+def _interview_summary(interview_id: str, interview: dict) -> dict:
+    """Build the catalog summary of a raw interview file."""
+    return {
+        'id': interview_id,
+        'title': interview.get('title', 'Untitled Interview'),
+        'type': interview.get('interview_type', 'Interview'),
+        'created_at': interview.get('created_at', datetime.now().isoformat()),
+        'participant_name': interview.get('transcript_name', 'Untitled Interview'),
+        'project_name': interview.get('project_name', 'Unassigned'),
+        'transcript_name': interview.get('transcript_name', ''),
+        'metadata': interview.get('metadata', {}),
+        'has_analysis': bool(interview.get('analysis')),
+        'content_preview': _get_content_preview(interview)
+    }
+
+# Catalog of raw interview summaries, rebuilt from file mtimes when first used
+interview_catalog = None
+# Inverted index over raw transcripts, synced from file mtimes on every search
+transcript_index = None
+
+def get_interview_catalog():
+    """Return the process-wide catalog of interviews/raw."""
+    global interview_catalog
+    if interview_catalog is None:
+        interview_catalog = InterviewCatalog(os.path.join(app.root_path, 'interviews', 'raw'), _interview_summary)
+        interview_catalog.refresh()
+    return interview_catalog
+
+def get_transcript_index():
+    """Return the process-wide full-text index of interviews/raw, synced with the files."""
+    global transcript_index
+    raw_dir = os.path.join(app.root_path, 'interviews', 'raw')
+    if transcript_index is None:
+        transcript_index = TextIndex(text_index_path(raw_dir))
+    transcript_index.sync(raw_dir, raw_interview_documents)
+    return transcript_index
+
+def record_interview_write(interview_id, interview_data):
+    """Update the catalog and transcript index after writing interviews/raw/<id>.json."""
+    try:
+        get_interview_catalog().update(interview_id, interview_data)
+        get_transcript_index()
+    except Exception as e:
+        # Both are re-synced from file mtimes on the next listing or search
+        logger.error(f"Error indexing interview {interview_id}: {str(e)}")
+
+def record_interview_delete(interview_id):
+    """Drop a deleted interview from the catalog and transcript index."""
+    try:
+        get_interview_catalog().remove(interview_id)
+        get_transcript_index().remove_group(interview_id)
+    except Exception as e:
+        logger.error(f"Error unindexing interview {interview_id}: {str(e)}")
+
 def list_interviews():
     """List all saved interviews."""
     try:
         logger.info("Listing saved interviews...")
-        interviews_dir = os.path.join(app.root_path, 'interviews', 'raw')
-        
-        # Create directory if it doesn't exist
-        if not os.path.exists(interviews_dir):
-            os.makedirs(interviews_dir)
-            logger.info("Created interviews directory")
-            return []
-        
-        interviews = []
-        for filename in os.listdir(interviews_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            file_path = os.path.join(interviews_dir, filename)
-            try:
-                with open(file_path, 'r') as f:
-                    interview = json.load(f)
-                    
-                # Extract interview ID from filename
-                interview_id = os.path.splitext(filename)[0]
-                
-                # Create summary dictionary using transcript_name directly
-                summary = {
-                    'id': interview_id,
-                    'title': interview.get('title', 'Untitled Interview'),
-                    'type': interview.get('interview_type', 'Interview'),
-                    'created_at': interview.get('created_at', datetime.now().isoformat()),
-                    'participant_name': interview.get('transcript_name', 'Untitled Interview'),
-                    'project_name': interview.get('project_name', 'Unassigned'),
-                    'transcript_name': interview.get('transcript_name', ''),
-                    'metadata': interview.get('metadata', {}),
-                    'has_analysis': bool(interview.get('analysis')),
-                    'content_preview': _get_content_preview(interview)
-                }
-                
-                interviews.append(summary)
-                logger.info(f"Added interview: {interview_id} - {summary['participant_name']}")
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Error decoding JSON from {filename}: {str(e)}")
-                continue
-            except Exception as e:
-                logger.error(f"Error processing {filename}: {str(e)}")
-                continue
-        
-        # Sort by date, most recent first
-        interviews.sort(key=lambda x: x['created_at'], reverse=True)
+        interviews = get_interview_catalog().list()
+        logger.info(f"Listed {len(interviews)} interviews from catalog")
         return interviews
         
     except Exception as e:
@@ -355,12 +351,13 @@ def delete_interview(interview_id):
         if file_path.exists():
             file_path.unlink()
             logger.info(f"Deleted interview file: {file_path}")
+        record_interview_delete(interview_id)
         
-        # Remove from vector store if available
-        if vector_store:
+        # Remove from vector store if available; remove_interview saves it
+        store = vector_store or load_saved_vector_store()
+        if store:
             try:
-                vector_store.remove_interview(interview_id)
-                vector_store.save_vector_store()
+                store.remove_interview(interview_id)
                 logger.info(f"Removed interview {interview_id} from vector store")
             except Exception as e:
                 logger.error(f"Error removing interview from vector store: {str(e)}")
@@ -537,7 +534,7 @@ def analyze_chunk_semantics(text):
     """Analyze the semantic content of a chunk using our semantic analyzer."""
     try:
         # Use semantic analyzer to get analysis
-        analysis = semantic_analyzer.analyze_chunk(text)
+        analysis = get_semantic_analyzer().analyze_chunk(text)
         metadata = analysis['metadata']
         
         # Map the emotion and sentiment to our simplified categories
@@ -640,42 +637,63 @@ def extract_value(prompt, field_name, context):
         logger.error(f"Error extracting value for {field_name}: {str(e)}")
         return ''
 
-# Initialize vector store
-try:
-    logger.info("Initializing vector store...")
-    vector_store = InterviewVectorStore(openai_api_key=OPENAI_API_KEY)
-    # Load all existing interviews into the vector store
-    interviews = []
-    raw_interviews_dir = os.path.join('interviews', 'raw')
-    if os.path.exists(raw_interviews_dir):
-        logger.info("Loading existing interviews into vector store...")
-        for filename in os.listdir(raw_interviews_dir):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(raw_interviews_dir, filename)) as f:
-                        interview = json.load(f)
-                        # Ensure all required fields are present
-                        interview.setdefault('date', datetime.now().isoformat())
-                        interview.setdefault('project_name', 'Unknown Project')
-                        interview.setdefault('interview_type', 'Unknown Type')
-                        interviews.append(interview)
-                except Exception as e:
-                    logger.error(f"Error loading interview {filename}: {str(e)}")
-                    continue
-        
-        if interviews:
-            logger.info(f"Adding {len(interviews)} interviews to vector store...")
-            vector_store.add_interviews(interviews)
-            vector_store.save_vector_store()
-            logger.info("Vector store initialized successfully")
+# Interview vector store, built on first use: loading it embeds every raw interview
+vector_store_failed = False
+
+def get_vector_store():
+    """Return the process-wide InterviewVectorStore, or None if it could not be built."""
+    global vector_store, vector_store_failed
+    if vector_store is not None or vector_store_failed:
+        return vector_store
+    try:
+        from daria_interview_tool.vector_store import InterviewVectorStore
+        logger.info("Initializing vector store...")
+        store = InterviewVectorStore(openai_api_key=OPENAI_API_KEY)
+        # Load all existing interviews into the vector store
+        interviews = []
+        raw_interviews_dir = os.path.join('interviews', 'raw')
+        if os.path.exists(raw_interviews_dir):
+            logger.info("Loading existing interviews into vector store...")
+            for filename in os.listdir(raw_interviews_dir):
+                if filename.endswith('.json'):
+                    try:
+                        with open(os.path.join(raw_interviews_dir, filename)) as f:
+                            interview = json.load(f)
+                            # Ensure all required fields are present
+                            interview.setdefault('date', datetime.now().isoformat())
+                            interview.setdefault('project_name', 'Unknown Project')
+                            interview.setdefault('interview_type', 'Unknown Type')
+                            interviews.append(interview)
+                    except Exception as e:
+                        logger.error(f"Error loading interview {filename}: {str(e)}")
+                        continue
+            
+            if interviews:
+                logger.info(f"Adding {len(interviews)} interviews to vector store...")
+                store.add_interviews(interviews)
+                store.save_vector_store()
+                logger.info("Vector store initialized successfully")
+            else:
+                logger.warning("No interviews found to load into vector store")
         else:
-            logger.warning("No interviews found to load into vector store")
-    else:
-        logger.warning("Raw interviews directory not found")
-except Exception as e:
-    logger.error(f"Error initializing vector store: {str(e)}")
-    logger.error(traceback.format_exc())
-    vector_store = None
+            logger.warning("Raw interviews directory not found")
+        vector_store = store
+    except Exception as e:
+        logger.error(f"Error initializing vector store: {str(e)}")
+        logger.error(traceback.format_exc())
+        vector_store_failed = True
+    return vector_store
+
+def load_saved_vector_store():
+    """The vector store as last saved to disk, without ingesting raw interviews; None if nothing is saved."""
+    if not os.path.exists('vector_store'):
+        return None
+    try:
+        from daria_interview_tool.vector_store import InterviewVectorStore
+        return InterviewVectorStore(openai_api_key=OPENAI_API_KEY)
+    except Exception as e:
+        logger.error(f"Error loading saved vector store: {str(e)}")
+        return None
 
 def save_persona(project_name, content, selected_elements):
     """
@@ -1366,7 +1384,7 @@ def text_to_speech():
         
         # Convert text to speech using ElevenLabs
         try:
-            audio_stream = elevenlabs_client.text_to_speech.convert_as_stream(
+            audio_stream = get_elevenlabs_client().text_to_speech.convert_as_stream(
                 text=text,
                 voice_id=voice_id,
                 model_id="eleven_multilingual_v2"
@@ -1532,6 +1550,7 @@ def update_interview_data(interview_id, analysis):
         # Save updated interview
         with open(file_path, 'w') as f:
             json.dump(interview_data, f, indent=2)
+        record_interview_write(interview_id, interview_data)
             
         logger.info(f"Interview {interview_id} updated successfully")
         return interview_id
@@ -1541,6 +1560,9 @@ def update_interview_data(interview_id, analysis):
         logger.error(traceback.format_exc())
         return None
 
+# Bump when the final analysis prompts change, so cached reports are not reused
+FINAL_ANALYSIS_VERSION = 1
+
 @app.route('/final_analysis', methods=['POST'])
 def final_analysis():
     try:
@@ -1667,9 +1689,10 @@ Structure the journey chronologically and highlight critical moments that impact
         # Create a new instance of the OpenAI client
         client = OpenAI()
         
-        # Generate the analysis using the enhanced prompt
+        # Generate the analysis using the enhanced prompt (cached only if LLM_CACHE_MAX_TEMPERATURE allows 0.7)
         try:
-            response = client.chat.completions.create(
+            analysis = cached_chat_completion(
+                client, 'final_analysis', FINAL_ANALYSIS_VERSION,
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": analysis_prompt},
@@ -1677,8 +1700,6 @@ Structure the journey chronologically and highlight critical moments that impact
                 ],
                 temperature=0.7
             )
-            
-            analysis = response.choices[0].message.content
         except Exception as api_error:
             logger.error(f"Error with OpenAI API: {str(api_error)}")
             return jsonify({'status': 'error', 'error': f'API error: {str(api_error)}'}), 500
@@ -1838,16 +1859,10 @@ def search_exact():
         interviews = list_interviews()
         results = []
         
+        # Transcript matches come from the inverted index instead of reading every file
+        transcript_hits = {hit['group_id']: hit for hit in get_transcript_index().search(query, limit=None, phrase=True)}
+        
         for interview in interviews:
-            # Get the full interview data to search in transcript
-            interview_file = Path('interviews/raw') / f"{interview['id']}.json"
-            try:
-                with open(interview_file, 'r') as f:
-                    full_interview = json.load(f)
-                    transcript = full_interview.get('transcript', '')
-            except:
-                transcript = ''
-            
             # Search in participant name
             if query in interview.get('participant_name', '').lower():
                 results.append(interview)
@@ -1874,18 +1889,11 @@ def search_exact():
                 continue
                 
             # Search in full transcript
-            if transcript and query in transcript.lower():
-                # Generate a preview around the match
-                match_start = transcript.lower().find(query)
-                preview_start = max(0, match_start - 100)
-                preview_end = min(len(transcript), match_start + len(query) + 100)
-                preview = transcript[preview_start:preview_end]
-                if preview_start > 0:
-                    preview = '...' + preview
-                if preview_end < len(transcript):
-                    preview = preview + '...'
-                    
-                interview['preview'] = preview
+            hit = transcript_hits.get(interview['id'])
+            if hit:
+                interview['preview'] = hit['snippet']
+                interview['highlights'] = hit['snippet_highlights']
+                interview['score'] = hit['score']
                 results.append(interview)
                 continue
         
@@ -1903,8 +1911,11 @@ def search_fuzzy():
         if not query:
             return jsonify({'success': True, 'interviews': []})
         
-        # Get semantic analyzer instance
-        analyzer = SemanticAnalyzer()
+        import numpy as np
+        from sklearn.metrics.pairwise import cosine_similarity
+        
+        # Use the module-level analyzer instead of loading models per request
+        analyzer = get_semantic_analyzer()
         query_embedding = np.array(analyzer.get_embedding(query)).reshape(1, -1)  # Reshape to 2D
         
         interviews = list_interviews()
@@ -2207,6 +2218,10 @@ Please provide a comprehensive cross-interview analysis that includes:
 Format your response with clear sections and bullet points where appropriate."""
     
     try:
+        from langchain.chains import ConversationChain
+        from langchain.memory import ConversationBufferMemory
+        from langchain_openai import ChatOpenAI
+        
         # Use the conversation chain for analysis
         analysis_chain = ConversationChain(
             llm=ChatOpenAI(
@@ -2313,7 +2328,10 @@ def get_match_preview(text, query, window=100):
 def similar_interviews(interview_id):
     """Find interviews similar to a given interview."""
     k = int(request.args.get('k', 3))
-    results = vector_store.find_similar_interviews(interview_id, k=k)
+    store = get_vector_store()
+    if store is None:
+        return jsonify({'error': 'Vector store is not available', 'results': []}), 500
+    results = store.find_similar_interviews(interview_id, k=k)
     return jsonify({'results': results})
 
 @app.route('/delete_interview/<interview_id>', methods=['POST'])
@@ -3035,6 +3053,7 @@ def generate_report():
         logger.info(f"Conversation transcript: {transcript}")
         
         # Create a new instance of ChatOpenAI for analysis
+        from langchain_openai import ChatOpenAI
         analysis_llm = ChatOpenAI(
             temperature=0.7,
             model_name="gpt-4",
@@ -3532,9 +3551,11 @@ def upload_transcript():
         transcript_path = INTERVIEWS_DIR / f"{transcript_id}.json"
         with open(transcript_path, 'w', encoding='utf-8') as f:
             json.dump(transcript_data, f, indent=2)
+        record_interview_write(transcript_id, transcript_data)
         
         # Add to vector store
         try:
+            from langchain.vectorstores import VectorStore
             vector_store = VectorStore()
             vector_store.add_document(transcript_data)
         except Exception as e:
@@ -3573,8 +3594,8 @@ def advanced_search():
         if search_type not in ['text', 'semantic', 'emotion', 'insight']:
             return jsonify({'error': f'Invalid search type: {search_type}'}), 400
 
-        # Initialize the ProcessedInterviewStore
-        store = ProcessedInterviewStore()
+        # Reuse the shared ProcessedInterviewStore
+        store = get_processed_store()
         
         # Perform the search based on type
         results = store.search(query, search_type=search_type, limit=limit)
@@ -3898,11 +3919,6 @@ def process_semantic_chunks(transcript_text):
                     speaker = speaker_match.group(1)
                     # Save previous chunk if it exists
                     if current_chunk:
-                        # Analyze the chunk
-                        chunk_id = str(uuid.uuid4())
-                        analysis = semantic_analyzer.analyze_chunk(current_chunk['text'])
-                        current_chunk['metadata'].update(analysis['metadata'])
-                        current_chunk['id'] = chunk_id
                         chunks.append(current_chunk)
                     
                     # Start new chunk
@@ -3921,12 +3937,15 @@ def process_semantic_chunks(transcript_text):
         
         # Add final chunk
         if current_chunk and current_chunk['text'].strip():
-            chunk_id = str(uuid.uuid4())
-            analysis = semantic_analyzer.analyze_chunk(current_chunk['text'])
-            current_chunk['metadata'].update(analysis['metadata'])
-            current_chunk['id'] = chunk_id
             chunks.append(current_chunk)
         
+        # Analyze all chunks together so emotions are classified in batches
+        analyses = get_semantic_analyzer().analyze_chunks_batch([chunk['text'] for chunk in chunks])
+        for chunk, analysis in zip(chunks, analyses):
+            analysis.pop('text', None)
+            chunk['metadata'].update(analysis)
+            chunk['id'] = str(uuid.uuid4())
+        
         return chunks
         
     except Exception as e:
@@ -3976,6 +3995,7 @@ def analyze_interview(interview_id):
         # Save updated interview back to the same location
         with open(interview_file, 'w') as f:
             json.dump(interview_data, f, indent=2)
+        record_interview_write(interview_id, interview_data)
             
         return jsonify({
             'status': 'success',
@@ -4055,17 +4075,27 @@ def api_advanced_search():
         if not query:
             return jsonify({'error': 'Query cannot be empty'}), 400
 
-        if search_type not in ['text', 'semantic', 'emotion', 'insight', 'theme']:
+        if search_type not in ['text', 'semantic', 'emotion', 'insight', 'theme', 'hybrid']:
             app.logger.error(f"Invalid search type received: {search_type}")
             return jsonify({'error': f'Invalid search type: {search_type}'}), 400
 
-        # Initialize the ProcessedInterviewStore
-        store = ProcessedInterviewStore()
+        # Reuse the shared ProcessedInterviewStore
+        store = get_processed_store()
         
         try:
             # Perform the search based on type
             app.logger.info(f"Executing {search_type} search...")
-            results = store.search(query, search_type=search_type, limit=limit)
+            timings = None
+            if search_type == 'hybrid':
+                # Dense + keyword retrieval fused with RRF, optionally cross-encoder reranked
+                results, timings = hybrid_search(
+                    store, query, k=int(limit),
+                    reranker=get_semantic_analyzer().rerank_results if data.get('rerank') else None,
+                    rerank_top_n=int(data.get('rerank_top_n', 20))
+                )
+                app.logger.info(f"Hybrid search timings: {timings}")
+            else:
+                results = store.search(query, search_type=search_type, limit=limit)
             app.logger.info(f"Search completed. Found {len(results)} results")
             
             # Format results for response
@@ -4088,6 +4118,8 @@ def api_advanced_search():
                         'related_feature': result['metadata'].get('related_feature')
                     }
                 }
+                if 'cross_score' in result:
+                    formatted_result['cross_score'] = result['cross_score']
                 formatted_results.append(formatted_result)
 
             response_data = {
@@ -4097,6 +4129,8 @@ def api_advanced_search():
                 'type': search_type,
                 'message': f"Found {len(formatted_results)} results for your search"
             }
+            if timings is not None:
+                response_data['timings'] = timings
 
             if not formatted_results:
                 app.logger.info(f"No results found for query: '{query}'")
@@ -4120,6 +4154,23 @@ def api_advanced_search():
             'message': 'An unexpected error occurred. Please try again later.'
         }), 500
 
+@app.route('/api/search/facets')
+def api_search_facets():
+    """Emotion, theme or insight tag values with chunk counts, for filters and autocompletion."""
+    try:
+        facet = request.args.get('facet', 'theme')
+        if facet not in ('emotion', 'theme', 'insight_tag'):
+            return jsonify({'error': f'Invalid facet: {facet}'}), 400
+        query = request.args.get('q', '').strip()
+        prefix = request.args.get('match', 'substring') == 'prefix'
+        limit = request.args.get('limit', 50, type=int)
+
+        values = get_processed_store().facet_counts(facet, query=query or None, prefix=prefix, limit=limit)
+        return jsonify({'facet': facet, 'values': values})
+    except Exception as e:
+        app.logger.error(f"Error listing facet values: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/annotated-transcript/<interview_id>')
 @app.route('/annotated-transcript/<interview_id>/<int:page>')
 def view_annotated_transcript(interview_id, page=1):
@@ -4426,6 +4477,8 @@ def api_generate_persona():
 # Helper function to generate researcher avatar
 def generate_researcher_avatar(survey_responses):
     try:
+        from PIL import Image, ImageDraw, ImageFont
+        
         # Create a simple avatar based on survey responses
         avatar_id = random.randint(1000, 9999)
         img_width, img_height = 400, 400
@@ -5042,6 +5095,19 @@ guiding the discussion toward valuable research outcomes.
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/diagnostics/models', methods=['GET'])
+def model_diagnostics():
+    """Report load time and resident memory for each model loaded in this process."""
+    return jsonify({'status': 'success', 'models': model_stats()})
+
+@app.route('/api/diagnostics/llm-cache', methods=['GET'])
+def llm_cache_diagnostics():
+    """Report LLM response cache hit rates, in total and per call site."""
+    cache = get_llm_cache()
+    if cache is None:
+        return jsonify({'status': 'error', 'error': 'LLM cache is disabled'}), 404
+    return jsonify({'status': 'success', 'cache': cache.stats()})
+
 @app.route('/api/diagnostics/microphone', methods=['POST'])
 def check_microphone():
     """Diagnostic endpoint to check microphone status and audio processing."""
@@ -5382,7 +5448,60 @@ def jarvis_session(session_id):
         logger.error(traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+app_configured = False
+
+def create_app():
+    """Return the application with its extensions, blueprints and directories set up.
+
+    Importing this module only defines the routes. Model libraries and the
+    services built on them (semantic analyzer, vector store, processed-interview
+    store, ElevenLabs client) are loaded by their get_* functions on first use,
+    so a worker or test starts without them. Calling this again returns the
+    same app.
+    """
+    global app_configured
+    if app_configured:
+        return app
+    if not OPENAI_API_KEY:
+        raise ValueError("OPENAI_API_KEY environment variable is not set")
+
+    for directory in (INTERVIEWS_DIR, PERSONAS_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+
+    db.init_app(app)
+    # Create database tables if they don't exist
+    with app.app_context():
+        try:
+            db.create_all()
+            logger.info("Database tables created successfully")
+        except Exception as e:
+            logger.error(f"Error creating database tables: {str(e)}")
+
+    CORS(app, resources=CORS_RESOURCES)
+    socketio.init_app(app,
+        cors_allowed_origins=["http://localhost:5173", "http://localhost:5175"],
+        async_mode='eventlet',
+        logger=True,
+        engineio_logger=True
+    )
+
+    # Import and register the memory companion blueprint
+    try:
+        from api_services.memory_companion_service import memory_companion_bp
+        app.register_blueprint(memory_companion_bp)
+        print("Successfully registered Memory Companion blueprint")
+    except Exception as e:
+        print(f"Failed to register Memory Companion blueprint: {str(e)}")
+        # Continue without the memory companion functionality
+
+    app_configured = True
+    return app
+
 if __name__ == '__main__':
+    create_app()
+    # Bring the interview catalog and transcript index up to date before serving
+    get_interview_catalog()
+    get_transcript_index()
     socketio.run(app, 
         host='0.0.0.0',
         port=5003,
@@ -0,0 +1,154 @@
+"""
+Persistent cache of API embeddings keyed by content hash.
+
+Vectors are keyed by (model, dimension, sha256(text)), so the same text is
+only ever sent to the embeddings API once per model: re-running an ingest
+after a crash or repeating a search query is served from the cache. A small
+in-memory LRU sits in front of an SQLite table of float32 blobs; both are
+bounded, the table evicting its least recently used rows.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .sqlite_cache import evict_least_recently_used, open_cache_db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('.embedding_cache', 'embeddings.db')
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Two-level (memory LRU + SQLite) embedding cache with hit/miss counters."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS embeddings (
+            model TEXT NOT NULL,
+            dimension INTEGER NOT NULL,
+            text_hash TEXT NOT NULL,
+            vector BLOB NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (model, dimension, text_hash)
+        );
+        CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used);
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, memory_entries: int = 2048,
+                 max_entries: int = 50000):
+        """
+        Args:
+            db_path: SQLite file holding the cached vectors
+            memory_entries: Vectors kept in the in-memory LRU
+            max_entries: Vectors kept on disk before the least recently used are evicted
+        """
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_entries = max_entries
+        self._memory: 'OrderedDict[tuple, List[float]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+
+        self._lock = threading.RLock()
+        self._conn, self._count = open_cache_db(db_path, self.SCHEMA, 'embeddings')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _remember(self, key: tuple, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, dimension: int, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """Cached vector of each text, or None where it has not been embedded yet."""
+        keys = [(model, dimension, text_hash(text)) for text in texts]
+        found: Dict[tuple, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory and key not in found:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            from_memory = set(found)
+
+            missing = list({key[2] for key in keys if key not in found})
+            if missing:
+                now = time.time()
+                # Stay below SQLite's default limit of 999 bound parameters
+                for i in range(0, len(missing), 900):
+                    part = missing[i:i + 900]
+                    placeholders = ','.join('?' * len(part))
+                    rows = self._conn.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND dimension = ? "
+                        f"AND text_hash IN ({placeholders})", [model, dimension] + part
+                    ).fetchall()
+                    for digest, blob in rows:
+                        key = (model, dimension, digest)
+                        found[key] = np.frombuffer(blob, dtype='float32').tolist()
+                        self._remember(key, found[key])
+                    if rows:
+                        with self._conn:
+                            self._conn.executemany(
+                                "UPDATE embeddings SET last_used = ? WHERE model = ? AND dimension = ? AND text_hash = ?",
+                                [(now, model, dimension, digest) for digest, _ in rows]
+                            )
+
+            results = [found.get(key) for key in keys]
+            hit_count = sum(1 for vector in results if vector is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+            self.memory_hits += sum(1 for key in keys if key in from_memory)
+        return results
+
+    def put_many(self, model: str, dimension: int, texts: Sequence[str],
+                 vectors: Sequence[Sequence[float]]) -> None:
+        """Store freshly embedded vectors, evicting the least recently used if over the limit."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = (model, dimension, text_hash(text))
+                self._remember(key, list(vector))
+                rows.append((model, dimension, key[2], np.asarray(vector, dtype='float32').tobytes(), now))
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (model, dimension, text_hash, vector, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._count += self._conn.total_changes - before
+                self._count = evict_least_recently_used(self._conn, 'embeddings', self._count, self.max_entries)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM embeddings")
+            self._memory.clear()
+            self._count = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since this cache was opened."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'memory_hits': self.memory_hits,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'memory_entries': len(self._memory),
+            'disk_entries': self._count
+        }
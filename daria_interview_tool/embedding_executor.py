@@ -0,0 +1,195 @@
+"""
+Concurrent, rate-limit-aware batching for embedding API calls.
+
+Texts are packed into batches by token count instead of item count, several
+batches are kept in flight on a small thread pool, an optional token bucket
+keeps the total under a tokens-per-minute budget, and batches failing with a
+retryable error (429, 5xx, connection problems) are retried with jittered
+exponential backoff. Results always come back in input order.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# OpenAI embeddings limits: 2048 inputs and 300k tokens per request
+MAX_BATCH_ITEMS = 2048
+DEFAULT_BATCH_TOKENS = 20000
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+@lru_cache(maxsize=4)
+def _encoding(model: str):
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        # tiktoken missing, or its BPE file cannot be downloaded
+        logger.warning(f"tiktoken unavailable for {model}, estimating token counts: {str(e)}")
+        return None
+
+
+def count_tokens(text: str, model: str = "text-embedding-3-small") -> int:
+    """Token count of text; without tiktoken a deliberate over-estimate (3 bytes per token)."""
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, math.ceil(len(text.encode('utf-8')) / 3))
+
+
+def token_batches(token_counts: Sequence[int], max_tokens: int = DEFAULT_BATCH_TOKENS,
+                  max_items: int = MAX_BATCH_ITEMS) -> List[Tuple[int, int]]:
+    """Split consecutive items into [start, end) batches under both limits.
+
+    An item larger than max_tokens gets a batch of its own.
+    """
+    batches = []
+    start = 0
+    tokens = 0
+    for i, count in enumerate(token_counts):
+        if i > start and (tokens + count > max_tokens or i - start >= max_items):
+            batches.append((start, i))
+            start, tokens = i, 0
+        tokens += count
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    return batches
+
+
+class TokenBucket:
+    """Blocking tokens-per-minute limiter shared by all worker threads."""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        """Wait until tokens can be spent; returns the seconds waited."""
+        tokens = min(float(tokens), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, 5xx and connection/timeout errors are worth retrying; other 4xx are not."""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    name = type(error).__name__
+    return isinstance(error, (ConnectionError, TimeoutError)) or name in ('APIConnectionError', 'APITimeoutError')
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, 'response', None)
+    try:
+        value = response.headers.get('retry-after') if response is not None else None
+        return float(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class EmbeddingExecutor:
+    """Runs an embed_batch(texts) -> vectors callable over many texts concurrently."""
+
+    def __init__(self, embed_batch: Callable[[List[str]], List[List[float]]],
+                 max_concurrency: int = 4, max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+                 max_batch_items: int = MAX_BATCH_ITEMS, tokens_per_minute: Optional[int] = None,
+                 max_retries: int = 5, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 model: str = "text-embedding-3-small"):
+        """
+        Args:
+            embed_batch: Embeds one batch, returning one vector per text in order
+            max_concurrency: Batches in flight at once
+            max_batch_tokens: Token budget of a single request
+            max_batch_items: Item limit of a single request
+            tokens_per_minute: Optional rate budget across all requests
+            max_retries: Retries of one batch before the call fails
+            backoff_base: First retry delay in seconds, doubled per attempt
+            backoff_max: Upper bound of a retry delay
+            model: Model whose tokenizer sizes the batches
+        """
+        self.embed_batch = embed_batch
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.model = model
+        self.retries = 0
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        # Full jitter spreads retries of concurrent batches apart
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        return max(delay, _retry_after(error) or 0.0)
+
+    def _run_batch(self, texts: List[str], tokens: int) -> List[List[float]]:
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                self.bucket.acquire(tokens)
+            try:
+                vectors = self.embed_batch(texts)
+                if len(vectors) != len(texts):
+                    raise ValueError(f"Expected {len(texts)} embeddings, got {len(vectors)}")
+                return vectors
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                attempt += 1
+                self.retries += 1
+                logger.warning(f"Embedding batch of {len(texts)} failed ({str(e)}), "
+                               f"retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                time.sleep(delay)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed texts, returning vectors in input order; raises if a batch exhausts its retries."""
+        texts = list(texts)
+        if not texts:
+            return []
+        counts = [count_tokens(text, self.model) for text in texts]
+        batches = token_batches(counts, self.max_batch_tokens, self.max_batch_items)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        if len(batches) == 1 or self.max_concurrency == 1:
+            for start, end in batches:
+                results[start:end] = self._run_batch(texts[start:end], sum(counts[start:end]))
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches)),
+                                thread_name_prefix='embedding') as pool:
+            futures = {
+                pool.submit(self._run_batch, texts[start:end], sum(counts[start:end])): (start, end)
+                for start, end in batches
+            }
+            done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+            for future in done:
+                if future.exception() is not None:
+                    raise future.exception()
+            for future, (start, end) in futures.items():
+                results[start:end] = future.result()
+        return results
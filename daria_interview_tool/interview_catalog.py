@@ -0,0 +1,146 @@
+"""
+Manifest of per-interview summaries for the raw interview directory.
+
+Listing interviews used to open and parse every transcript file. The catalog
+keeps the summary fields and content preview of each file in one small JSON
+manifest, keyed by interview id and fingerprinted by mtime and size. Writers
+update their entry directly, and refresh() re-parses only files whose
+fingerprint changed, so a listing costs one directory scan of stat calls.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def file_fingerprint(path: str) -> List[int]:
+    """mtime (ns) and size of a file, used to detect changes without reading it."""
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class InterviewCatalog:
+    """Summary manifest for the interview JSON files in one directory."""
+
+    def __init__(self, interviews_dir: str, summarize: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+                 manifest_path: Optional[str] = None):
+        """
+        Args:
+            interviews_dir: Directory holding <interview_id>.json files
+            summarize: Builds the summary dict from (interview_id, interview data)
+            manifest_path: Where to keep the manifest, defaults to interviews_dir/.catalog/manifest.json
+        """
+        self.interviews_dir = interviews_dir
+        self.summarize = summarize
+        self.manifest_path = manifest_path or os.path.join(interviews_dir, '.catalog', 'manifest.json')
+        self._lock = threading.RLock()
+        self.entries: Dict[str, Dict[str, Any]] = self._load_manifest()
+
+    def _file_path(self, interview_id: str) -> str:
+        return os.path.join(self.interviews_dir, f"{interview_id}.json")
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == MANIFEST_VERSION:
+                return manifest.get('entries', {})
+            logger.info("Interview catalog manifest has an old version, rebuilding")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading interview catalog manifest: {str(e)}")
+        return {}
+
+    def _save_manifest(self) -> None:
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _index_file(self, interview_id: str, interview: Optional[Dict[str, Any]] = None) -> bool:
+        """(Re)build one entry; returns False if the file is gone or unreadable."""
+        file_path = self._file_path(interview_id)
+        try:
+            fingerprint = file_fingerprint(file_path)
+            if interview is None:
+                with open(file_path, 'r') as f:
+                    interview = json.load(f)
+            self.entries[interview_id] = {
+                'fingerprint': fingerprint,
+                'summary': self.summarize(interview_id, interview)
+            }
+            return True
+        except FileNotFoundError:
+            self.entries.pop(interview_id, None)
+        except json.JSONDecodeError as e:
+            logger.error(f"Error decoding JSON from {file_path}: {str(e)}")
+            self.entries.pop(interview_id, None)
+        except Exception as e:
+            logger.error(f"Error cataloging {file_path}: {str(e)}")
+            self.entries.pop(interview_id, None)
+        return False
+
+    def refresh(self) -> int:
+        """Bring the manifest in line with the directory; returns the number of entries changed."""
+        with self._lock:
+            os.makedirs(self.interviews_dir, exist_ok=True)
+            on_disk = {}
+            with os.scandir(self.interviews_dir) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith('.json'):
+                        stat = entry.stat()
+                        on_disk[entry.name[:-len('.json')]] = [stat.st_mtime_ns, stat.st_size]
+
+            changed = 0
+            for interview_id in list(self.entries):
+                if interview_id not in on_disk:
+                    del self.entries[interview_id]
+                    changed += 1
+
+            for interview_id, fingerprint in on_disk.items():
+                entry = self.entries.get(interview_id)
+                if entry and entry.get('fingerprint') == fingerprint:
+                    continue
+                self._index_file(interview_id)
+                changed += 1
+
+            if changed:
+                self._save_manifest()
+                logger.info(f"Interview catalog refreshed: {changed} changed, {len(self.entries)} total")
+            return changed
+
+    def update(self, interview_id: str, interview: Optional[Dict[str, Any]] = None) -> bool:
+        """Record a file that was just written (pass its data to skip re-reading it)."""
+        with self._lock:
+            indexed = self._index_file(interview_id, interview)
+            self._save_manifest()
+            return indexed
+
+    def remove(self, interview_id: str) -> None:
+        """Drop the entry of a deleted interview."""
+        with self._lock:
+            if self.entries.pop(interview_id, None) is not None:
+                self._save_manifest()
+
+    def get(self, interview_id: str) -> Optional[Dict[str, Any]]:
+        """Summary of one interview, or None if it is not cataloged."""
+        with self._lock:
+            entry = self.entries.get(interview_id)
+            return copy.deepcopy(entry['summary']) if entry else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All summaries, most recent first. Callers get copies they may modify."""
+        with self._lock:
+            self.refresh()
+            summaries = [copy.deepcopy(entry['summary']) for entry in self.entries.values()]
+        summaries.sort(key=lambda s: s.get('created_at') or '', reverse=True)
+        return summaries
@@ -0,0 +1,51 @@
+"""
+Chunk keys and score aggregation for chunk-level interview vectors.
+
+Each interview is embedded as several passages under keys of the form
+"<interview_id>#<chunk_index>". Search ranks passages; these helpers fold the
+passage scores back into one score per interview, keeping the best passages
+of each as evidence.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+CHUNK_SEPARATOR = '#'
+AGGREGATIONS = ('max', 'mean')
+
+
+def chunk_key(interview_id: str, chunk_index: int) -> str:
+    return f"{interview_id}{CHUNK_SEPARATOR}{chunk_index}"
+
+
+def split_chunk_key(key: str) -> Tuple[str, int]:
+    """(interview_id, chunk_index) of a chunk key; interview ids may contain the separator."""
+    interview_id, _, chunk_index = key.rpartition(CHUNK_SEPARATOR)
+    return interview_id, int(chunk_index)
+
+
+def aggregate_chunk_scores(matches: Sequence[Tuple[str, float]], mode: str = 'max',
+                           passages: int = 3) -> List[Dict]:
+    """Fold (chunk key, similarity) pairs into interviews, best first.
+
+    With 'max' an interview scores as its best passage; with 'mean' as the
+    average of its retrieved passages, which favours interviews that match
+    the query throughout rather than in one place.
+
+    Returns:
+        List[Dict]: interview_id, score and the top `passages` (chunk key, similarity) pairs
+    """
+    if mode not in AGGREGATIONS:
+        raise ValueError(f"Unknown aggregation: {mode} (expected one of {', '.join(AGGREGATIONS)})")
+
+    grouped: Dict[str, List[Tuple[str, float]]] = {}
+    for key, similarity in matches:
+        grouped.setdefault(split_chunk_key(key)[0], []).append((key, similarity))
+
+    results = []
+    for interview_id, hits in grouped.items():
+        hits.sort(key=lambda hit: hit[1], reverse=True)
+        scores = [similarity for _, similarity in hits]
+        score = scores[0] if mode == 'max' else sum(scores) / len(scores)
+        results.append({'interview_id': interview_id, 'score': score, 'passages': hits[:passages]})
+    results.sort(key=lambda result: result['score'], reverse=True)
+    return results
@@ -16,9 +16,30 @@ import time
 import boto3
 from botocore.config import Config
 
+from .llm_cache import cached_call, cached_chat_completion
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Bump when the journey map prompt or its expected JSON changes, so cached responses are not reused
+JOURNEY_MAP_VERSION = 1
+
+
+def _has_json_object(content: str) -> bool:
+    """Whether a response holds a JSON object somewhere, i.e. is worth caching."""
+    start, end = content.find("{"), content.rfind("}")
+    if start < 0 or end <= start:
+        return False
+    try:
+        return isinstance(json.loads(content[start:end + 1]), dict)
+    except json.JSONDecodeError:
+        return False
+
+def _claude_text(raw_body: str) -> str:
+    """Text of the first content block of a Bedrock Claude response body."""
+    return (json.loads(raw_body).get('content') or [{}])[0].get('text', '')
+
+
 def generate_journey_map_json(interviews: List[Dict], project_name: str, model: str = 'gpt-4') -> Dict[str, Any]:
     """
     Generate a journey map as structured JSON based on interview data.
@@ -111,7 +132,8 @@ def generate_with_openai(prompt: str) -> Dict[str, Any]:
         
         # Call OpenAI API to generate the journey map structure
         logger.info("Calling OpenAI API to generate journey map")
-        response = client.chat.completions.create(
+        result = cached_chat_completion(
+            client, "journey_map", JOURNEY_MAP_VERSION, accept=_has_json_object,
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are a UX research expert specializing in journey mapping. Your task is to analyze interview transcripts and create a structured journey map. You MUST return only valid JSON, with no additional text before or after. The JSON structure must exactly match the format provided in the prompt."},
@@ -121,8 +143,7 @@ def generate_with_openai(prompt: str) -> Dict[str, Any]:
         )
         logger.info("Successfully received response from OpenAI API")
         
-        # Extract and parse the generated JSON
-        result = response.choices[0].message.content
+        # Parse the generated JSON
         
         try:
             # Try to parse the JSON directly
@@ -201,25 +222,31 @@ You MUST return only valid JSON, with no additional text before or after. The JS
             {"role": "user", "content": prompt}
         ]
         
-        body = json.dumps({
+        payload = {
             "messages": messages,
             "system": system_prompt,
             "max_tokens": 4000,
             "temperature": 0.5,
             "top_p": 1.0,
             "anthropic_version": "bedrock-2023-05-31"
-        })
+        }
+        body = json.dumps(payload)
         
         logger.info(f"Sending request to Claude 3.7 Sonnet for project: {project_name}")
         start_time = time.time()
         
-        # Invoke the model
-        response = bedrock_runtime.invoke_model(
-            body=body, 
-            modelId=model_id,
-            accept="application/json", 
-            contentType="application/json"
-        )
+        # Invoke the model (or reuse its answer to the same request body)
+        def invoke():
+            response = bedrock_runtime.invoke_model(
+                body=body, 
+                modelId=model_id,
+                accept="application/json", 
+                contentType="application/json"
+            )
+            return response.get('body').read().decode('utf-8')
+        
+        raw_body = cached_call("journey_map", "bedrock", model_id, payload["temperature"], body, invoke,
+                               JOURNEY_MAP_VERSION, accept=lambda raw: _has_json_object(_claude_text(raw)))
         
         end_time = time.time()
         response_time = round(end_time - start_time, 2)
@@ -227,7 +254,7 @@ You MUST return only valid JSON, with no additional text before or after. The JS
         logger.info(f"Received response from Claude 3.7 Sonnet in {response_time} seconds")
         
         # Parse the response
-        response_body = json.loads(response.get('body').read())
+        response_body = json.loads(raw_body)
         
         # Extract content
         content = response_body.get('content', [{}])[0].get('text', '')
@@ -0,0 +1,130 @@
+"""
+ONNX Runtime backend with int8 weights for the CPU models.
+
+With DARIA_MODEL_BACKEND=onnx the model registry loads all-MiniLM-L6-v2 and
+the emotion classifier through ONNX Runtime instead of torch. Each model is
+exported to ONNX and its weights quantized to int8 (dynamic quantization,
+activations stay float) the first time it is needed; the result is kept under
+DARIA_ONNX_DIR and reused by later processes. The loaded objects are the usual
+SentenceTransformer and text-classification pipeline, so callers do not change.
+
+Needs optimum[onnxruntime] (and sentence-transformers >= 3.2 for the sentence
+model). Without it the registry stays on torch.
+
+Quantization costs a little accuracy; check it on real chunks with
+scripts/benchmark_onnx.py, which reports cosine agreement of embeddings, label
+agreement of emotions, latency and memory against the torch models.
+"""
+
+import importlib.util
+import logging
+import os
+import shutil
+from typing import Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+ONNX_DIR = os.getenv('DARIA_ONNX_DIR', os.path.join('.model_cache', 'onnx'))
+# Instruction set the int8 kernels target: arm64, avx2, avx512 or avx512_vnni
+QUANTIZATION = os.getenv('DARIA_ONNX_QUANTIZATION', 'avx2')
+SENTENCE_MODEL_FILE = os.path.join('onnx', f'model_int8_{QUANTIZATION}.onnx')
+CLASSIFIER_MODEL_FILE = 'model_quantized.onnx'
+
+
+def available() -> bool:
+    """Whether ONNX Runtime and optimum are installed."""
+    return all(importlib.util.find_spec(module) is not None for module in ('onnxruntime', 'optimum'))
+
+
+def model_dir(name: str) -> str:
+    """Directory holding the quantized export of name."""
+    return os.path.join(ONNX_DIR, f"{name.replace('/', '__')}-int8-{QUANTIZATION}")
+
+
+def _session_options():
+    """Session options honouring OMP_NUM_THREADS (set per worker by process_transcripts --workers)."""
+    import onnxruntime
+    options = onnxruntime.SessionOptions()
+    threads = os.getenv('OMP_NUM_THREADS')
+    if threads and threads.isdigit():
+        options.intra_op_num_threads = int(threads)
+    return options
+
+
+def _publish(build_dir: str, target: str) -> None:
+    """Move a finished export into place; another process may have got there first."""
+    try:
+        os.rename(build_dir, target)
+    except OSError:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        if not os.path.isdir(target):
+            raise
+
+
+def _build_dir(target: str) -> str:
+    build_dir = f"{target}.build-{os.getpid()}"
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    return build_dir
+
+
+def load_sentence_transformer(name: str, device: str = 'cpu'):
+    """SentenceTransformer for name running a quantized ONNX export, exporting it on first use."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    target = model_dir(name)
+    if not os.path.exists(os.path.join(target, SENTENCE_MODEL_FILE)):
+        logger.info(f"Exporting {name} to ONNX with int8 weights ({QUANTIZATION}) in {target}...")
+        build_dir = _build_dir(target)
+        model = SentenceTransformer(name, device=device, backend='onnx')
+        model.save_pretrained(build_dir)
+        export_dynamic_quantized_onnx_model(model, QUANTIZATION, build_dir, file_suffix=f'int8_{QUANTIZATION}')
+        _publish(build_dir, target)
+
+    return SentenceTransformer(target, device=device, backend='onnx',
+                               model_kwargs={'file_name': SENTENCE_MODEL_FILE,
+                                             'session_options': _session_options()})
+
+
+def load_text_classifier(name: str, **pipeline_kwargs):
+    """text-classification pipeline for name running a quantized ONNX export, exporting it on first use."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer, pipeline
+
+    target = model_dir(name)
+    if not os.path.exists(os.path.join(target, CLASSIFIER_MODEL_FILE)):
+        logger.info(f"Exporting {name} to ONNX with int8 weights ({QUANTIZATION}) in {target}...")
+        build_dir = _build_dir(target)
+        model = ORTModelForSequenceClassification.from_pretrained(name, export=True)
+        model.save_pretrained(build_dir)
+        AutoTokenizer.from_pretrained(name).save_pretrained(build_dir)
+        config = getattr(AutoQuantizationConfig, QUANTIZATION)(is_static=False, per_channel=False)
+        ORTQuantizer.from_pretrained(model).quantize(save_dir=build_dir, quantization_config=config)
+        _publish(build_dir, target)
+
+    model = ORTModelForSequenceClassification.from_pretrained(target, file_name=CLASSIFIER_MODEL_FILE,
+                                                              session_options=_session_options())
+    return pipeline('text-classification', model=model, tokenizer=AutoTokenizer.from_pretrained(target),
+                    **pipeline_kwargs)
+
+
+def embedding_agreement(reference: Sequence[Sequence[float]], candidate: Sequence[Sequence[float]]) -> Dict[str, float]:
+    """Cosine similarity between the reference and candidate embedding of each text."""
+    import numpy as np
+    reference = np.asarray(reference, dtype='float32')
+    candidate = np.asarray(candidate, dtype='float32')
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    cosines = np.sum(reference * candidate, axis=1) / np.maximum(norms, 1e-12)
+    return {
+        'mean_cosine': round(float(cosines.mean()), 4),
+        'min_cosine': round(float(cosines.min()), 4),
+        'p05_cosine': round(float(np.percentile(cosines, 5)), 4)
+    }
+
+
+def label_agreement(reference: Sequence[Dict], candidate: Sequence[Dict]) -> float:
+    """Share of texts whose top emotion label is the same under both models."""
+    if not reference:
+        return 1.0
+    return sum(a['label'] == b['label'] for a, b in zip(reference, candidate)) / len(reference)
@@ -8,6 +8,7 @@ from openai import OpenAI
 import os
 from dotenv import load_dotenv
 from .thesia_resources import get_complete_system_prompt
+from .llm_cache import cached_chat_completion, cached_call
 import re
 import tiktoken # Import tiktoken for accurate token counting
 import time
@@ -22,6 +23,9 @@ logger = logging.getLogger(__name__)
 # Use the complete system prompt from thesia_resources
 PERSONA_ARCHITECT_SYSTEM_PROMPT = get_complete_system_prompt()
 
+# Bump when the summary or synthesis prompts change, so cached responses are not reused
+PERSONA_SUMMARY_VERSION = 1
+
 # Enhanced JSON template for the persona
 PERSONA_JSON_TEMPLATE = """{
     "name": "Persona name (with role)",
@@ -96,6 +100,14 @@ def _get_token_count(text: str, model: str = "gpt-3.5-turbo") -> int:
         encoding = tiktoken.get_encoding("cl100k_base") 
     return len(encoding.encode(text))
 
+def _has_claude_text(raw_body: str) -> bool:
+    """Whether a Bedrock response body holds text content, i.e. is worth caching."""
+    try:
+        content = json.loads(raw_body).get('content') or [{}]
+        return bool(content[0].get('text'))
+    except (ValueError, AttributeError):
+        return False
+
 def _summarize_transcript_for_persona(client: OpenAI, transcript: str, project_name: str, model: str = "gpt-3.5-turbo", max_input_tokens: int = 15000) -> str:
     """Helper function to summarize a single transcript for persona generation, handling long inputs by chunking."""
     if not transcript or len(transcript.strip()) < 50:
@@ -126,13 +138,13 @@ def _summarize_transcript_for_persona(client: OpenAI, transcript: str, project_n
         logger.info(f"Transcript fits ({transcript_tokens} tokens), summarizing directly.")
         try:
             summary_prompt = base_prompt_template.format(transcript_chunk=transcript)
-            response = client.chat.completions.create(
+            summary = cached_chat_completion(
+                client, "persona.summary", PERSONA_SUMMARY_VERSION,
                 model=model,
                 messages=[{"role": "user", "content": summary_prompt}],
                 temperature=0.3,
                 max_tokens=output_tokens
-            )
-            summary = response.choices[0].message.content.strip()
+            ).strip()
             logger.info(f"Successfully summarized transcript (length: {len(summary)} chars)")
             return summary
         except Exception as e:
@@ -176,13 +188,13 @@ def _summarize_transcript_for_persona(client: OpenAI, transcript: str, project_n
             logger.info(f"Summarizing chunk {i+1}/{len(chunks)}...")
             try:
                 summary_prompt = base_prompt_template.format(transcript_chunk=chunk)
-                response = client.chat.completions.create(
+                chunk_summary = cached_chat_completion(
+                    client, "persona.summary", PERSONA_SUMMARY_VERSION,
                     model=model,
                     messages=[{"role": "user", "content": summary_prompt}],
                     temperature=0.3,
                     max_tokens=output_tokens
-                )
-                chunk_summary = response.choices[0].message.content.strip()
+                ).strip()
                 chunk_summaries.append(chunk_summary)
                 logger.info(f"Chunk {i+1} summarized.")
             except Exception as e:
@@ -253,7 +265,7 @@ def _synthesize_themes_from_summaries(client: OpenAI, summaries: List[str], proj
                 )
                 
                 # Create request body for a text response, not JSON
-                body = json.dumps({
+                payload = {
                     "messages": [
                         {"role": "user", "content": synthesis_prompt}
                     ],
@@ -262,25 +274,31 @@ def _synthesize_themes_from_summaries(client: OpenAI, summaries: List[str], proj
                     "temperature": 0.5,
                     "top_p": 1.0,
                     "anthropic_version": "bedrock-2023-05-31"
-                })
+                }
+                body = json.dumps(payload)
                 
                 logger.info(f"Sending theme synthesis request to Claude 3.7 Sonnet")
                 start_time = time.time()
                 
-                # Invoke the model
-                response = bedrock_runtime.invoke_model(
-                    body=body, 
-                    modelId=model_id,
-                    accept="application/json", 
-                    contentType="application/json"
-                )
+                # Invoke the model (or reuse its answer to the same request body)
+                def invoke():
+                    response = bedrock_runtime.invoke_model(
+                        body=body, 
+                        modelId=model_id,
+                        accept="application/json", 
+                        contentType="application/json"
+                    )
+                    return response.get('body').read().decode('utf-8')
+                
+                raw_body = cached_call("persona.synthesis", "bedrock", model_id, payload["temperature"], body, invoke,
+                                       PERSONA_SUMMARY_VERSION, accept=_has_claude_text)
                 
                 end_time = time.time()
                 response_time = round(end_time - start_time, 2)
                 logger.info(f"Received theme synthesis response from Claude in {response_time} seconds")
                 
                 # Parse the response - this should return Anthropic's standard format
-                response_body = json.loads(response.get('body').read())
+                response_body = json.loads(raw_body)
                 
                 # Extract content from Claude's response structure
                 if 'content' in response_body and len(response_body['content']) > 0:
@@ -312,13 +330,13 @@ def _synthesize_themes_from_summaries(client: OpenAI, summaries: List[str], proj
         elif input_tokens > 7500:
              logger.warning(f"Synthesis prompt is very long ({input_tokens} tokens). Result might be truncated or fail.")
 
-        response = client.chat.completions.create(
+        synthesized_themes = cached_chat_completion(
+            client, "persona.synthesis", PERSONA_SUMMARY_VERSION,
             model=model, 
             messages=[{"role": "user", "content": synthesis_prompt}],
             temperature=0.5,
             max_tokens=500  # Further reduced for extreme conciseness
-        )
-        synthesized_themes = response.choices[0].message.content.strip()
+        ).strip()
         logger.info(f"Successfully synthesized themes from summaries (length: {len(synthesized_themes)} chars)")
         return synthesized_themes
     except Exception as e:
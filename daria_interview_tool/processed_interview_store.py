@@ -1,17 +1,26 @@
 import json
 import os
+import logging
 from typing import List, Dict, Optional, Tuple, Set
-from datetime import datetime
 import uuid
-from sentence_transformers import SentenceTransformer, util
-import torch
 import re
 
+from .chunk_embedding_index import ChunkEmbeddingIndex, chunk_content, file_fingerprint
+from .model_registry import get_sentence_transformer, resolve_backend, resolve_model_name
+from .text_index import TextIndex, text_index_path
+from .hybrid_search import hybrid_search
+from .facet_index import FacetIndex, chunk_facets, facet_index_path, normalize_intensity
+
+logger = logging.getLogger(__name__)
+
 class ProcessedInterviewStore:
     def __init__(self, base_dir: str = "interviews/processed"):
         self.base_dir = base_dir
         self.default_project_name = "Daria Research of Researchers"
-        self.model = SentenceTransformer('multi-qa-MiniLM-L6-cos-v1')
+        # Shared per process; with DARIA_SHARE_MINILM=1 it is the MiniLM copy SemanticAnalyzer loads
+        self.model_name = resolve_model_name('multi-qa-MiniLM-L6-cos-v1')
+        self.model_backend = resolve_backend()
+        self.model = get_sentence_transformer(self.model_name, backend=self.model_backend)
         self.emotion_mapping = {
             'frustration': {'frustration', 'annoyed', 'irritated', 'angry', 'upset'},
             'positive': {'joy', 'happiness', 'excited', 'satisfied', 'pleased', 'admiration'},
@@ -20,6 +29,25 @@ class ProcessedInterviewStore:
             'neutral': {'neutral', 'calm', 'balanced'}
         }
         os.makedirs(base_dir, exist_ok=True)
+        # Chunk vectors are embedded once at ingest and memory-mapped for queries
+        self.embedding_index = ChunkEmbeddingIndex(
+            os.path.join(base_dir, '.embedding_index'),
+            self.model,
+            self.model_name,
+            backend=self.model_backend
+        )
+        # Chunk text is kept in an on-disk inverted index for text_search
+        self.text_index = TextIndex(text_index_path(base_dir))
+        # Emotions, themes and insight tags are indexed at ingest for the facet searches
+        self.facet_index = FacetIndex(facet_index_path(base_dir))
+
+    @staticmethod
+    def _chunk_documents(interview_id: str, data: Dict) -> List[Tuple[str, str, Dict]]:
+        """Text index documents for the chunks of one processed interview."""
+        return [
+            (f"{interview_id}:{index}", chunk_content(chunk), {'chunk_index': index})
+            for index, chunk in enumerate(data.get('chunks', []) or [])
+        ]
 
     def _get_interview_path(self, interview_id: str) -> str:
         return os.path.join(self.base_dir, f"{interview_id}.json")
@@ -29,6 +57,14 @@ class ProcessedInterviewStore:
         file_path = self._get_interview_path(interview_id)
         with open(file_path, 'w') as f:
             json.dump(data, f, indent=2)
+        try:
+            fingerprint = file_fingerprint(file_path)
+            self.embedding_index.update_interview(interview_id, data, fingerprint=fingerprint)
+            self.text_index.replace_group(interview_id, self._chunk_documents(interview_id, data), fingerprint)
+            self.facet_index.replace_group(interview_id, chunk_facets(interview_id, data), fingerprint)
+        except Exception as e:
+            # The next search sync picks the file up again
+            logger.error(f"Error indexing interview {interview_id}: {str(e)}")
 
     def load_interview(self, interview_id: str) -> Optional[Dict]:
         """Load processed interview data from JSON file."""
@@ -78,72 +114,51 @@ class ProcessedInterviewStore:
     def semantic_search(self, query: str, k: int = 10) -> List[Dict]:
         """Enhanced semantic search with emotion and theme filtering."""
         results = []
+        loaded = {}
         search_criteria = self._extract_search_criteria(query)
-        
-        # Encode the search query
-        query_embedding = self.model.encode(query, convert_to_tensor=True)
-        
-        for filename in os.listdir(self.base_dir):
-            if not filename.endswith('.json'):
+
+        # Pick up processed files written outside save_interview (only changed files are embedded)
+        self.embedding_index.sync(self.base_dir)
+
+        # One matrix-vector product scores every indexed chunk
+        for row, similarity in self.embedding_index.search(query, k=None, min_score=0.3):
+            # Apply filters based on search criteria
+            chunk_emotion = row.get('emotion', '')
+            chunk_themes = set(row.get('themes', []))
+
+            # Check if chunk matches any of the search criteria
+            emotion_match = (
+                not search_criteria['emotions'] or
+                any(emotion in self._normalize_emotion(chunk_emotion)
+                    for emotion in search_criteria['emotions'])
+            )
+            theme_match = (
+                not search_criteria['themes'] or
+                any(theme in chunk_themes for theme in search_criteria['themes'])
+            )
+            if not (emotion_match or theme_match):
                 continue
-                
-            interview_id = filename[:-5]
-            interview_data = self.load_interview(interview_id)
-            
-            if not interview_data or 'chunks' not in interview_data:
+
+            if row['interview_id'] not in loaded:
+                loaded[row['interview_id']] = self.load_interview(row['interview_id'])
+            interview_data = loaded[row['interview_id']]
+            chunks = (interview_data or {}).get('chunks', [])
+            if not interview_data or row['chunk_index'] >= len(chunks):
                 continue
-                
-            for chunk in interview_data['chunks']:
-                content = chunk.get('content') or chunk.get('text') or chunk.get('combined_text', '')
-                if not content:
-                    continue
-
-                # Get chunk embedding
-                chunk_embedding = self.model.encode(content, convert_to_tensor=True)
-                similarity = util.pytorch_cos_sim(query_embedding, chunk_embedding)[0][0].item()
-
-                # Apply filters based on search criteria
-                chunk_emotion = chunk.get('metadata', {}).get('emotion', '').lower()
-                chunk_themes = {theme.lower() for theme in chunk.get('metadata', {}).get('themes', [])}
-                
-                # Check if chunk matches any of the search criteria
-                emotion_match = (
-                    not search_criteria['emotions'] or
-                    any(emotion in self._normalize_emotion(chunk_emotion) 
-                        for emotion in search_criteria['emotions'])
-                )
-                theme_match = (
-                    not search_criteria['themes'] or
-                    any(theme in chunk_themes for theme in search_criteria['themes'])
-                )
-                
-                if similarity > 0.3 and (emotion_match or theme_match):
-                    results.append(self._create_search_result(
-                        interview_data=interview_data,
-                        chunk=chunk,
-                        similarity=similarity
-                    ))
-        
-        # Sort by similarity score
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:k]
+            results.append(self._create_search_result(
+                interview_data=interview_data,
+                chunk=chunks[row['chunk_index']],
+                similarity=similarity
+            ))
+            if len(results) >= k:
+                break
+
+        # Results arrive sorted by similarity score
+        return results
 
     def _normalize_emotion_intensity(self, intensity):
         """Normalize emotion intensity to a value between 0 and 1."""
-        if intensity is None:
-            return 0.5
-        try:
-            # Convert to float if it's a string
-            intensity = float(intensity)
-            # If it's already between 0 and 1, return as is
-            if 0 <= intensity <= 1:
-                return intensity
-            # If it's on a different scale (e.g. 0-3), normalize it
-            if intensity > 1:
-                return min(intensity / 3, 1.0)
-            return max(0.0, intensity)
-        except (ValueError, TypeError):
-            return 0.5
+        return normalize_intensity(intensity)
 
     def _get_interviewee_name(self, interview_data: Dict) -> str:
         """Extract interviewee name from interview data, prioritizing participant over researcher."""
@@ -262,187 +277,110 @@ class ProcessedInterviewStore:
             }
         }
 
-    def emotion_search(self, emotion: str, k: int = 10) -> List[Dict]:
-        """Search through processed interviews for chunks with specific emotions."""
+    def _facet_results(self, hits: List[Dict], similarity: Optional[str] = None) -> List[Dict]:
+        """Search results for facet index hits, loading each interview once.
+
+        similarity names the hit field used as the score (1.0 when None).
+        """
         results = []
-        emotion_lower = emotion.lower()
-        
-        for filename in os.listdir(self.base_dir):
-            if not filename.endswith('.json'):
+        loaded = {}
+        for hit in hits:
+            interview_id = hit['interview_id']
+            if interview_id not in loaded:
+                loaded[interview_id] = self.load_interview(interview_id)
+            interview_data = loaded[interview_id]
+            chunks = (interview_data or {}).get('chunks', [])
+            if not interview_data or not 0 <= hit['chunk_index'] < len(chunks):
                 continue
-                
-            interview_id = filename[:-5]  # Remove .json extension
-            interview_data = self.load_interview(interview_id)
-            
-            if not interview_data or 'chunks' not in interview_data:
-                continue
-                
-            for chunk in interview_data.get('chunks', []):
-                # Look for emotion in both the direct emotion field and in analysis
-                chunk_emotion = (
-                    chunk.get('emotion', '') or 
-                    chunk.get('analysis', {}).get('emotion', '') or 
-                    chunk.get('metadata', {}).get('emotion', '')
-                ).lower()
-                
-                # Get emotion intensity from various possible locations
-                emotion_intensity = (
-                    chunk.get('emotion_intensity') or 
-                    chunk.get('analysis', {}).get('emotion_intensity') or 
-                    chunk.get('metadata', {}).get('emotion_intensity') or 
-                    0.5
-                )
-                
-                # Normalize emotion intensity
-                normalized_intensity = self._normalize_emotion_intensity(emotion_intensity)
-                
-                if chunk_emotion == emotion_lower:
-                    results.append(self._create_search_result(
-                        interview_data=interview_data,
-                        chunk=chunk,
-                        similarity=normalized_intensity
-                    ))
-        
-        # Sort by emotion intensity and limit results
-        results.sort(key=lambda x: x['similarity'], reverse=True)
-        return results[:k]
+            results.append(self._create_search_result(
+                interview_data=interview_data,
+                chunk=chunks[hit['chunk_index']],
+                similarity=hit[similarity] if similarity else 1.0
+            ))
+        return results
+
+    def emotion_search(self, emotion: str, k: int = 10) -> List[Dict]:
+        """Search chunks with a specific emotion, most intense first."""
+        # Pick up processed files written outside save_interview
+        self.facet_index.sync(self.base_dir)
+        hits = self.facet_index.lookup('emotion', [emotion or ''], order='intensity', limit=k)
+        return self._facet_results(hits, similarity='intensity')
 
     def insight_tag_search(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search for chunks with matching insight tags."""
-        results = []
-        query = query.lower() if query else ''
-        
-        for filename in os.listdir(self.base_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            interview_id = filename[:-5]  # Remove .json extension
-            interview = self.load_interview(interview_id)
-            
-            if not interview:
-                continue
-                
-            for chunk in interview.get('chunks', []):
-                # Look for insight tags in various possible locations, handling None values
-                all_tags = []
-                
-                # Collect tags from all possible locations
-                chunk_tags = chunk.get('insight_tags', [])
-                if isinstance(chunk_tags, list):
-                    all_tags.extend(chunk_tags)
-                
-                analysis_tags = chunk.get('analysis', {}).get('insight_tags', [])
-                if isinstance(analysis_tags, list):
-                    all_tags.extend(analysis_tags)
-                
-                metadata_tags = chunk.get('metadata', {}).get('insight_tags', [])
-                if isinstance(metadata_tags, list):
-                    all_tags.extend(metadata_tags)
-                
-                # Convert all tags to lowercase for comparison
-                insight_tags = [tag.lower() for tag in all_tags if tag]
-                
-                if query in insight_tags:
-                    # Ensure all required fields have default values
-                    results.append({
-                        'interview_id': interview_id,
-                        'chunk_id': chunk.get('id') or str(uuid.uuid4()),
-                        'project_name': self.default_project_name,
-                        'content': chunk.get('content') or chunk.get('text') or chunk.get('combined_text', ''),
-                        'timestamp': chunk.get('timestamp') or datetime.now().isoformat(),
-                        'metadata': {
-                            'emotion': chunk.get('emotion', 'neutral'),
-                            'emotion_intensity': float(chunk.get('emotion_intensity', 0.5)),
-                            'themes': chunk.get('themes', []),
-                            'insight_tags': insight_tags,
-                            'related_feature': chunk.get('related_feature')
-                        },
-                        'similarity': 1.0  # Exact match
-                    })
-                    
-        # Sort by timestamp (most recent first) and limit results
-        results.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return results[:limit]
+        """Search for chunks with matching insight tags, most recent first."""
+        self.facet_index.sync(self.base_dir)
+        hits = self.facet_index.lookup('insight_tag', [query or ''], order='timestamp', limit=limit)
+        return self._facet_results(hits)
 
     def text_search(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search through processed interviews using basic text matching."""
+        """Search chunk text through the inverted index, best BM25 match first.
+
+        Words must all occur in a chunk, quoted parts must occur as phrases and
+        a trailing '*' matches a word prefix. An empty query lists every chunk,
+        most recent first.
+        """
+        if not (query or '').strip():
+            return self._recent_chunks(limit)
+
         results = []
-        query = query.lower() if query else ''
-        
-        for filename in os.listdir(self.base_dir):
-            if not filename.endswith('.json'):
-                continue
-                
-            interview_id = filename[:-5]  # Remove .json extension
-            interview_data = self.load_interview(interview_id)
-            
-            if not interview_data:
+        loaded = {}
+
+        # Pick up processed files written outside save_interview
+        self.text_index.sync(self.base_dir, self._chunk_documents)
+
+        for hit in self.text_index.search(query or '', limit=limit):
+            interview_id = hit['group_id']
+            if interview_id not in loaded:
+                loaded[interview_id] = self.load_interview(interview_id)
+            interview_data = loaded[interview_id]
+            chunks = (interview_data or {}).get('chunks', [])
+            chunk_index = hit['fields'].get('chunk_index', -1)
+            if not interview_data or not 0 <= chunk_index < len(chunks):
                 continue
-                
-            for chunk in interview_data.get('chunks', []):
-                # Get text content from various possible locations
-                text = (
-                    chunk.get('content') or 
-                    chunk.get('text') or 
-                    chunk.get('combined_text', '')
-                ).lower()
-                
-                if query in text:
-                    results.append(self._create_search_result(
-                        interview_data=interview_data,
-                        chunk=chunk
-                    ))
-        
-        # Sort by timestamp (most recent first) and limit results
-        results.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-        return results[:limit]
 
-    def theme_search(self, query: str, limit: int = 10) -> List[Dict]:
-        """Search for chunks with matching themes."""
+            result = self._create_search_result(
+                interview_data=interview_data,
+                chunk=chunks[chunk_index],
+                similarity=hit['score']
+            )
+            result['highlights'] = hit['highlights']
+            result['snippet'] = hit['snippet']
+            result['snippet_highlights'] = hit['snippet_highlights']
+            results.append(result)
+
+        return results
+
+    def _recent_chunks(self, limit: int) -> List[Dict]:
+        """Search results for every chunk, most recent first."""
         results = []
-        query = query.lower() if query else ''
-        
         for filename in os.listdir(self.base_dir):
             if not filename.endswith('.json'):
                 continue
-                
-            interview_id = filename[:-5]  # Remove .json extension
-            interview_data = self.load_interview(interview_id)
-            
+            interview_data = self.load_interview(filename[:-5])
             if not interview_data:
                 continue
-                
             for chunk in interview_data.get('chunks', []):
-                # Look for themes in various possible locations, handling None values
-                all_themes = []
-                
-                # Collect themes from all possible locations
-                chunk_themes = chunk.get('themes', [])
-                if isinstance(chunk_themes, list):
-                    all_themes.extend(chunk_themes)
-                
-                analysis_themes = chunk.get('analysis', {}).get('themes', [])
-                if isinstance(analysis_themes, list):
-                    all_themes.extend(analysis_themes)
-                
-                metadata_themes = chunk.get('metadata', {}).get('themes', [])
-                if isinstance(metadata_themes, list):
-                    all_themes.extend(metadata_themes)
-                
-                # Convert all themes to lowercase for comparison
-                themes = [theme.lower() for theme in all_themes if theme]
-                
-                # Check if any theme contains the query
-                if any(query in theme for theme in themes):
-                    results.append(self._create_search_result(
-                        interview_data=interview_data,
-                        chunk=chunk
-                    ))
-                    
-        # Sort by timestamp (most recent first) and limit results
+                results.append(self._create_search_result(interview_data=interview_data, chunk=chunk))
         results.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
         return results[:limit]
 
+    def theme_search(self, query: str, limit: int = 10, prefix: bool = False) -> List[Dict]:
+        """Search for chunks with themes containing query (or starting with it), most recent first."""
+        self.facet_index.sync(self.base_dir)
+        themes = [row['value'] for row in self.facet_index.values('theme', match=query, prefix=prefix)]
+        hits = self.facet_index.lookup('theme', themes, order='timestamp', limit=limit)
+        return self._facet_results(hits)
+
+    def facet_counts(self, facet: str, query: Optional[str] = None, prefix: bool = False,
+                     limit: Optional[int] = 50) -> List[Dict]:
+        """Values of a facet ('emotion', 'theme' or 'insight_tag') with their chunk counts.
+
+        query filters values by substring, or by prefix with prefix=True, for
+        autocompletion and filter lists.
+        """
+        self.facet_index.sync(self.base_dir)
+        return self.facet_index.values(facet, match=query, prefix=prefix, limit=limit)
+
     def search(self, query: str, search_type: str = 'text', limit: int = 10) -> List[Dict]:
         """Enhanced search method that handles natural language queries."""
         if search_type == 'semantic':
@@ -455,6 +393,8 @@ class ProcessedInterviewStore:
             results = self.insight_tag_search(query, limit)
         elif search_type == 'text':
             results = self.text_search(query, limit)
+        elif search_type == 'hybrid':
+            results, _ = hybrid_search(self, query, k=limit)
         else:
             raise ValueError(f"Invalid search type: {search_type}")
 
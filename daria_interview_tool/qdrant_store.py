@@ -0,0 +1,103 @@
+"""
+Persistent Qdrant collections for analysed interview chunks.
+
+Qdrant runs in its local on-disk mode (no server) under QDRANT_PATH, or
+against a server when QDRANT_URL is set. Collections are created once and
+reused on later starts, so chunks analysed by earlier runs stay searchable
+without repeating the model and LLM calls that produced them. One client is
+shared per path, since local mode locks its storage directory.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from typing import Dict, Optional, Union
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QDRANT_PATH = os.path.join('interviews', 'processed', '.qdrant')
+
+# Payload fields filtered on by emotion, theme and per-interview queries
+PAYLOAD_INDEXES = {
+    'metadata.emotion': models.PayloadSchemaType.KEYWORD,
+    'metadata.themes': models.PayloadSchemaType.KEYWORD,
+    'interview_id': models.PayloadSchemaType.KEYWORD
+}
+
+_clients: Dict[str, QdrantClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_qdrant_client(path: Optional[str] = None) -> QdrantClient:
+    """Shared client for QDRANT_URL, or for the on-disk store at path / QDRANT_PATH.
+
+    Falls back to an in-memory client (the previous behaviour) if the
+    directory is locked by another process.
+    """
+    url = os.getenv('QDRANT_URL')
+    location = url or path or os.getenv('QDRANT_PATH', DEFAULT_QDRANT_PATH)
+    with _clients_lock:
+        if location not in _clients:
+            try:
+                if url:
+                    client = QdrantClient(url=url, api_key=os.getenv('QDRANT_API_KEY'))
+                else:
+                    os.makedirs(location, exist_ok=True)
+                    client = QdrantClient(path=location)
+                logger.info(f"Using Qdrant at {location}")
+            except Exception as e:
+                logger.error(f"Error opening Qdrant at {location}, falling back to memory: {str(e)}")
+                client = QdrantClient(":memory:")
+            _clients[location] = client
+        return _clients[location]
+
+
+def ensure_collection(client: QdrantClient, collection_name: str, size: int = 384,
+                      distance: models.Distance = models.Distance.COSINE,
+                      payload_indexes: Optional[Dict[str, models.PayloadSchemaType]] = None) -> bool:
+    """Create collection_name unless it already exists with the same vector size.
+
+    Returns:
+        bool: True if the collection was (re)created, False if an existing one was reused
+    """
+    existing = {collection.name for collection in client.get_collections().collections}
+    created = False
+    if collection_name in existing:
+        vectors = client.get_collection(collection_name).config.params.vectors
+        if getattr(vectors, 'size', size) != size:
+            logger.warning(f"Collection {collection_name} has vector size {vectors.size}, expected {size}; recreating")
+            client.delete_collection(collection_name)
+            existing.discard(collection_name)
+    if collection_name not in existing:
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=size, distance=distance)
+        )
+        created = True
+        logger.info(f"Created Qdrant collection {collection_name}")
+    else:
+        logger.info(f"Reusing Qdrant collection {collection_name} "
+                    f"({client.count(collection_name).count} points)")
+
+    # Payload indexes only take effect on a Qdrant server; local mode filters by scanning
+    for field, schema in (PAYLOAD_INDEXES if payload_indexes is None else payload_indexes).items():
+        try:
+            client.create_payload_index(collection_name=collection_name, field_name=field, field_schema=schema)
+        except Exception as e:
+            logger.warning(f"Could not create payload index on {field}: {str(e)}")
+    return created
+
+
+def point_id(key: str) -> Union[int, str]:
+    """Qdrant point id for a chunk key: UUIDs and integers pass through, other keys map to a stable UUID."""
+    key = str(key)
+    if key.isdigit():
+        return int(key)
+    try:
+        return str(uuid.UUID(key))
+    except ValueError:
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
@@ -0,0 +1,203 @@
+"""
+Theme, insight tag and emotion intensity extraction with the chat API.
+
+Asking for one chunk per chat completion costs a round trip and a copy of the
+system prompt per chunk. ThemeExtractor packs consecutive chunks into one
+request under a token budget and asks for a JSON array with one analysis per
+chunk. Every element is validated with the rules single-chunk extraction has
+always applied; only the chunks whose element is missing or invalid are
+retried on their own. With an LLMCache, answers that parse are cached, so
+re-analyzing an unchanged transcript makes no requests.
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .embedding_executor import count_tokens, token_batches
+from .llm_cache import LLMCache, cached_chat_completion
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_BATCH_TOKENS = 6000
+DEFAULT_BATCH_ITEMS = 10
+TOKENS_PER_ANALYSIS = 200
+# Bump when the prompts or validation rules change, so stored analyses are redone
+PROMPT_VERSION = 2
+
+SYSTEM_PROMPT = ("You are a research analysis assistant that extracts themes and insights from interview text. "
+                 "You MUST respond with ONLY valid JSON, no other text.")
+
+# Used when the chat API is unreachable
+EMPTY_ANALYSIS = {"themes": [], "insight_tags": [], "emotion_intensity": 3}
+# Used when the model answers with something unusable
+FALLBACK_ANALYSIS = {"themes": ["unclear"], "insight_tags": ["needs review"], "emotion_intensity": 3}
+
+
+def validate_analysis(analysis: Any) -> Dict[str, Any]:
+    """Return analysis if it has non-empty themes and insight tags and an intensity of 1-5.
+
+    Raises:
+        ValueError: If the analysis does not meet those rules
+    """
+    if not isinstance(analysis, dict) or not all(k in analysis for k in ["themes", "insight_tags", "emotion_intensity"]):
+        raise ValueError(f"Invalid response structure: {analysis}")
+    if not analysis["themes"] or not analysis["insight_tags"]:
+        raise ValueError(f"Empty themes or insights: {analysis}")
+    try:
+        in_range = 1 <= analysis["emotion_intensity"] <= 5
+    except TypeError:
+        in_range = False
+    if not in_range:
+        raise ValueError(f"Invalid emotion intensity: {analysis['emotion_intensity']}")
+    return analysis
+
+
+def _is_valid_analysis(content: str) -> bool:
+    try:
+        validate_analysis(json.loads(content))
+        return True
+    except (json.JSONDecodeError, ValueError):
+        return False
+
+
+def _has_results(content: str) -> bool:
+    try:
+        return isinstance(json.loads(content).get("results"), list)
+    except (json.JSONDecodeError, AttributeError):
+        return False
+
+
+def chunk_analysis(text: str, emotion_result: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Analysis of one chunk from its emotion label and its LLM themes."""
+    return {
+        'text': text,
+        'emotion': emotion_result['label'],
+        'emotion_intensity': analysis.get('emotion_intensity', 3),
+        'themes': analysis.get('themes', []),
+        'insight_tags': analysis.get('insight_tags', []),
+        'sentiment_score': emotion_result['score']
+    }
+
+
+class ThemeExtractor:
+    def __init__(self, client, model: str = DEFAULT_MODEL, max_batch_tokens: int = DEFAULT_BATCH_TOKENS,
+                 max_batch_items: int = DEFAULT_BATCH_ITEMS, cache: Optional[LLMCache] = None):
+        """
+        Args:
+            client: OpenAI client (or None, which yields empty analyses)
+            model: Chat model
+            max_batch_tokens: Prompt tokens of chunk text packed into one request
+            max_batch_items: Chunks packed into one request
+            cache: Response cache (none by default)
+        """
+        self.client = client
+        self.model = model
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.cache = cache
+
+    def _complete(self, prompt: str, max_tokens: int, call_site: str, accept) -> str:
+        request = dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        )
+        if self.cache is None:
+            return self.client.chat.completions.create(**request).choices[0].message.content
+        return cached_chat_completion(self.client, call_site, PROMPT_VERSION, accept, self.cache, **request)
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Analysis of a single chunk."""
+        if self.client is None:
+            return dict(EMPTY_ANALYSIS)
+        try:
+            content = self._complete(f"""Analyze this interview text and extract themes and insights.
+
+Text: {text}
+
+Respond with ONLY this exact JSON structure, no other text:
+{{
+    "themes": ["theme1", "theme2", "theme3"],
+    "insight_tags": ["insight1", "insight2", "insight3"],
+    "emotion_intensity": 3
+}}""", TOKENS_PER_ANALYSIS, "themes", _is_valid_analysis)
+        except Exception as e:
+            logger.error(f"Error in theme analysis: {str(e)}")
+            return dict(EMPTY_ANALYSIS)
+
+        try:
+            return validate_analysis(json.loads(content))
+        except (json.JSONDecodeError, ValueError) as e:
+            logger.error(f"Error parsing OpenAI response: {e}")
+            logger.error(f"Raw response: {content}")
+            return dict(FALLBACK_ANALYSIS)
+
+    def _extract_packed(self, texts: Sequence[str]) -> List[Optional[Dict[str, Any]]]:
+        """One request for several chunks; None for each chunk without a valid analysis."""
+        passages = "\n\n".join(f"Passage {i}:\n{text}" for i, text in enumerate(texts))
+        prompt = f"""Analyze each of these interview text passages separately and extract themes and insights for each.
+
+{passages}
+
+Respond with ONLY this exact JSON structure, no other text, with one entry per passage in the same order:
+{{
+    "results": [
+        {{"index": 0, "themes": ["theme1", "theme2", "theme3"], "insight_tags": ["insight1", "insight2", "insight3"], "emotion_intensity": 3}}
+    ]
+}}"""
+        try:
+            content = self._complete(prompt, TOKENS_PER_ANALYSIS * len(texts) + 50, "themes.batch", _has_results)
+            elements = json.loads(content).get("results")
+            if not isinstance(elements, list):
+                raise ValueError("Missing results array")
+        except Exception as e:
+            logger.error(f"Error in batched theme analysis of {len(texts)} chunks: {str(e)}")
+            return [None] * len(texts)
+
+        analyses: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        for position, element in enumerate(elements):
+            index = element.get("index", position) if isinstance(element, dict) else position
+            if not isinstance(index, int) or not 0 <= index < len(texts) or analyses[index] is not None:
+                continue
+            try:
+                analyses[index] = validate_analysis({k: element[k] for k in ("themes", "insight_tags", "emotion_intensity")})
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Invalid analysis for passage {index}: {e}")
+        return analyses
+
+    def batches(self, texts: Sequence[str]) -> List[Tuple[int, int]]:
+        """[start, end) ranges of texts that extract_batch packs into one request."""
+        counts = [count_tokens(text, self.model) for text in texts]
+        return token_batches(counts, self.max_batch_tokens, self.max_batch_items)
+
+    def extract_batch(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """Analyses of many chunks, in input order.
+
+        Chunks are packed into as few requests as the token budget allows;
+        chunks the batched answer leaves out or gets wrong are analyzed on
+        their own.
+        """
+        if self.client is None:
+            return [dict(EMPTY_ANALYSIS) for _ in texts]
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        for start, end in self.batches(texts):
+            if end - start == 1:
+                continue
+            results[start:end] = self._extract_packed(texts[start:end])
+
+        retried = 0
+        for i, analysis in enumerate(results):
+            if analysis is None:
+                results[i] = self.extract(texts[i])
+                retried += 1
+        if retried:
+            logger.info(f"Analyzed {retried} of {len(texts)} chunks individually")
+        return results
@@ -2,17 +2,19 @@ from langchain_community.vectorstores import FAISS
 from openai import OpenAI
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import os
-from pathlib import Path
 import json
 from typing import List, Dict, Any, Optional, Union
 import traceback
 import numpy as np
 from dotenv import load_dotenv
-import faiss
 import logging
 from langchain_openai import OpenAIEmbeddings
 from langchain.docstore.document import Document
 from datetime import datetime
+from .id_index import IdMappedIndex
+from .embedding_cache import DEFAULT_CACHE_PATH, EmbeddingCache
+from .embedding_executor import EmbeddingExecutor
+from .interview_chunks import aggregate_chunk_scores, chunk_key, split_chunk_key
 
 # Load environment variables
 load_dotenv()
@@ -20,42 +22,68 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 class CustomEmbeddings:
-    def __init__(self, api_key: str):
-        """Initialize the embeddings class with API key."""
+    def __init__(self, api_key: str, cache_path: Optional[str] = None, base_url: Optional[str] = None):
+        """Initialize the embeddings class with API key and an embedding cache at cache_path."""
         try:
             self.api_key = api_key
             self.model = "text-embedding-3-small"
             self.embedding_dimension = 1536
             
-            # Initialize the client once during initialization
+            # Initialize the client once during initialization; retries are left to the executor
             self.client = OpenAI(
                 api_key=self.api_key,
-                base_url="https://api.openai.com/v1"
+                base_url=base_url or os.getenv('OPENAI_EMBEDDINGS_BASE_URL', "https://api.openai.com/v1"),
+                max_retries=0
             )
+            
+            # Several token-sized batches in flight, within an optional tokens-per-minute budget
+            tokens_per_minute = os.getenv('EMBEDDING_TOKENS_PER_MINUTE')
+            self.executor = EmbeddingExecutor(
+                self._embed_batch,
+                max_concurrency=int(os.getenv('EMBEDDING_CONCURRENCY', '4')),
+                tokens_per_minute=int(tokens_per_minute) if tokens_per_minute else None,
+                model=self.model
+            )
+            
+            # Texts embedded before are served from the cache instead of the API
+            try:
+                self.cache = EmbeddingCache(cache_path or os.getenv('EMBEDDING_CACHE_PATH', DEFAULT_CACHE_PATH))
+            except Exception as e:
+                logger.error(f"Error opening embedding cache, embedding without it: {str(e)}")
+                self.cache = None
             logger.info("CustomEmbeddings initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing CustomEmbeddings: {str(e)}")
             logger.error(traceback.format_exc())
             raise
 
+    def _embed_cached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, sending only the ones missing from the cache to the API."""
+        if self.cache is not None:
+            embeddings = self.cache.get_many(self.model, self.embedding_dimension, texts)
+        else:
+            embeddings = [None] * len(texts)
+        
+        # Each distinct missing text is sent once
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        fresh = dict(zip(missing, self.executor.embed(missing)))
+        return [embedding if embedding is not None else fresh[text] for text, embedding in zip(texts, embeddings)]
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """One embeddings API request; cached right away so a crash part-way through keeps finished batches."""
+        response = self.client.embeddings.create(
+            model=self.model,
+            input=batch
+        )
+        batch_embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        if self.cache is not None:
+            self.cache.put_many(self.model, self.embedding_dimension, batch, batch_embeddings)
+        return batch_embeddings
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of texts."""
         try:
-            # Process texts in batches of 100
-            batch_size = 100
-            all_embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
-            
-            return all_embeddings
+            return self._embed_cached(texts)
         except Exception as e:
             logger.error(f"Error embedding documents: {str(e)}")
             logger.error(traceback.format_exc())
@@ -64,16 +92,16 @@ class CustomEmbeddings:
     def embed_query(self, text: str) -> List[float]:
         """Embed a single piece of text."""
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return response.data[0].embedding
+            return self._embed_cached([text])[0]
         except Exception as e:
             logger.error(f"Error embedding query: {str(e)}")
             logger.error(traceback.format_exc())
             raise
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the embedding cache."""
+        return self.cache.stats() if self.cache is not None else {}
+
     def __call__(self, texts: Union[str, List[str]]) -> List[List[float]]:
         """Make the class callable for compatibility with LangChain."""
         if isinstance(texts, str):
@@ -93,14 +121,17 @@ class InterviewVectorStore:
                 length_function=len,
                 separators=["\n\n", "\n", " ", ""]  # Better separators for interview content
             )
-            self.index = None
-            self.interview_ids = []
+            # Passage vectors keyed "<interview_id>#<chunk_index>" through stable int64 FAISS ids
+            self.index: Optional[IdMappedIndex] = None
             self.interview_metadata = {}
+            # Text and position of every passage, kept in memory so search never reads interview files
+            self.chunk_payloads: Dict[str, Dict[str, Any]] = {}
+            self.interview_chunks: Dict[str, List[str]] = {}
             
             # Initialize FAISS index if it doesn't exist
             if not os.path.exists(vector_store_path):
                 dimension = self.embeddings.embedding_dimension
-                self.index = faiss.IndexFlatL2(dimension)
+                self.index = IdMappedIndex(dimension)
                 logger.info(f"Created new FAISS index with dimension {dimension}")
             else:
                 self.load_vector_store()
@@ -111,6 +142,11 @@ class InterviewVectorStore:
             logger.error(traceback.format_exc())
             raise
     
+    @property
+    def interview_ids(self) -> List[str]:
+        """Ids of the interviews currently in the index."""
+        return list(self.interview_chunks)
+    
     def _clean_content(self, content: str) -> str:
         """Clean content by removing Daria's comments and extracting only user responses."""
         try:
@@ -156,39 +192,55 @@ class InterviewVectorStore:
             print(f"Error extracting user responses: {str(e)}")
             return ""
     
-    def _prepare_interview_text(self, interview: Dict[str, Any]) -> str:
-        """Prepare interview text for vectorization."""
-        try:
-            # Extract user responses from transcript
-            user_responses = self._extract_user_responses(interview.get('transcript', ''))
-            
-            # Clean and format the analysis, handling None case
-            analysis = interview.get('analysis')
-            if analysis is None:
-                analysis = ''
-            else:
-                analysis = str(analysis).strip()
-            
-            # Add project context
-            project_name = interview.get('project_name', '')
-            interview_type = interview.get('interview_type', '')
-            
-            # Prepare the text with clear section markers
-            prepared_text = f"""
-Project: {project_name}
-Type: {interview_type}
+    def _prepare_interview_chunks(self, interview: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Split an interview into passages for vectorization: user responses, then analysis.
 
-User Responses:
-{user_responses}
+        Passages are embedded with a short project/type header for context;
+        the payload keeps just the passage text.
+        """
+        user_responses = self._extract_user_responses(interview.get('transcript', '') or '')
+        analysis = interview.get('analysis')
+        analysis = '' if analysis is None else str(analysis).strip()
+        header = f"Project: {interview.get('project_name', '')}\nType: {interview.get('interview_type', '')}\n\n"
 
-Analysis:
-{analysis}
-"""
-            return prepared_text
-        except Exception as e:
-            logger.error(f"Error preparing interview text: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
+        chunks = []
+        for section, text in (('responses', user_responses), ('analysis', analysis)):
+            if not text.strip():
+                continue
+            for passage in self.text_splitter.split_text(text):
+                chunks.append({'section': section, 'text': passage, 'embed_text': header + passage})
+        return chunks
+    
+    def _drop_chunks(self, interview_id: str) -> int:
+        """Remove every passage of an interview; returns how many vectors were removed."""
+        keys = self.interview_chunks.pop(interview_id, [])
+        for key in keys:
+            self.chunk_payloads.pop(key, None)
+        return self.index.remove(keys) if self.index is not None else 0
+    
+    def _store_chunks(self, prepared: List[tuple], embeddings: List[List[float]]) -> None:
+        """Replace the passages of each (interview_id, chunks) with their embeddings."""
+        keys = []
+        for interview_id, chunks in prepared:
+            self._drop_chunks(interview_id)
+            interview_keys = [chunk_key(interview_id, i) for i in range(len(chunks))]
+            for i, (key, chunk) in enumerate(zip(interview_keys, chunks)):
+                self.chunk_payloads[key] = {
+                    'interview_id': interview_id,
+                    'chunk_index': i,
+                    'section': chunk['section'],
+                    'text': chunk['text']
+                }
+            self.interview_chunks[interview_id] = interview_keys
+            keys.extend(interview_keys)
+        self.index.add(keys, embeddings)
+    
+    def _group_chunks(self) -> Dict[str, List[str]]:
+        """Chunk keys of each interview, in passage order, from the payload store."""
+        grouped: Dict[str, List[str]] = {}
+        for key, payload in sorted(self.chunk_payloads.items(), key=lambda item: item[1]['chunk_index']):
+            grouped.setdefault(payload['interview_id'], []).append(key)
+        return grouped
     
     def add_interviews(self, interviews: List[Dict[str, Any]]) -> None:
         """Add multiple interviews to the vector store."""
@@ -197,32 +249,38 @@ Analysis:
                 logger.warning("No interviews provided to add")
                 return
 
+            prepared = []
             texts = []
             for interview in interviews:
-                # Prepare the interview text using the helper method
-                prepared_text = self._prepare_interview_text(interview)
-                texts.append(prepared_text)
-                self.interview_ids.append(interview['id'])
+                # Prepare the interview passages using the helper method
+                chunks = self._prepare_interview_chunks(interview)
+                if not chunks:
+                    logger.warning(f"Skipping interview {interview['id']} with empty content")
+                    continue
+                prepared.append((interview['id'], chunks))
+                texts.extend(chunk['embed_text'] for chunk in chunks)
                 self.interview_metadata[interview['id']] = {
                     'project_name': interview.get('project_name', ''),
                     'interview_type': interview.get('interview_type', ''),
                     'date': interview.get('date', ''),
+                    'chunk_count': len(chunks),
                     'last_updated': datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
                 }
 
-            logger.info(f"Processing {len(texts)} interviews for vectorization")
+            logger.info(f"Processing {len(texts)} passages from {len(prepared)} interviews for vectorization")
 
-            # Get embeddings for all texts
-            embeddings = self.embeddings.embed_documents(texts)
+            # Get embeddings for all passages
+            embeddings = self.embeddings.embed_documents(texts) if texts else []
             
             # Add embeddings to the index
             if embeddings:
                 if self.index is None:
                     dimension = len(embeddings[0])
-                    self.index = faiss.IndexFlatL2(dimension)
+                    self.index = IdMappedIndex(dimension)
                     logger.info(f"Created new FAISS index with dimension {dimension}")
                 
-                self.index.add(np.array(embeddings).astype('float32'))
+                # Re-adding an interview replaces all of its passages
+                self._store_chunks(prepared, embeddings)
                 self.save_vector_store()
                 logger.info("Successfully added interviews to vector store")
             else:
@@ -238,10 +296,12 @@ Analysis:
         try:
             if self.index is not None:
                 print(f"Saving vector store to {self.vector_store_path}")
-                faiss.write_index(self.index, self.vector_store_path)
+                self.index.write(self.vector_store_path)
                 metadata = {
                     'interview_ids': self.interview_ids,
-                    'interview_metadata': self.interview_metadata
+                    'interview_metadata': self.interview_metadata,
+                    'chunk_payloads': self.chunk_payloads,
+                    'id_table': self.index.table()
                 }
                 with open(f"{self.vector_store_path}_metadata.json", 'w') as f:
                     json.dump(metadata, f)
@@ -257,13 +317,21 @@ Analysis:
         try:
             if os.path.exists(self.vector_store_path):
                 print(f"Loading vector store from {self.vector_store_path}")
-                self.index = faiss.read_index(self.vector_store_path)
+                metadata = {}
                 metadata_path = f"{self.vector_store_path}_metadata.json"
                 if os.path.exists(metadata_path):
                     with open(metadata_path, 'r') as f:
                         metadata = json.load(f)
-                        self.interview_ids = metadata.get('interview_ids', [])
                         self.interview_metadata = metadata.get('interview_metadata', {})
+                # Stores saved before the id map are converted without re-embedding
+                self.index = IdMappedIndex.read(self.vector_store_path, metadata)
+                self.chunk_payloads = metadata.get('chunk_payloads', {})
+                if 'chunk_payloads' not in metadata and len(self.index):
+                    # Whole-interview vectors from before chunking; add_interviews re-adds them as passages
+                    print("Discarding interview-level vectors, interviews will be re-indexed as passages")
+                    self.index = IdMappedIndex(self.index.dimension)
+                    self.interview_metadata = {}
+                self.interview_chunks = self._group_chunks()
                 print("Vector store loaded successfully")
                 return True
             return False
@@ -316,10 +384,16 @@ Analysis:
             print(f"Error extracting relevant content: {str(e)}")
             return content
 
-    def semantic_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Search for similar interviews using semantic search."""
+    def semantic_search(self, query: str, k: int = 5, aggregation: str = 'max',
+                        passages: int = 3) -> List[Dict[str, Any]]:
+        """Search interviews by their best-matching passages.
+
+        Passage scores are folded into one score per interview ('max' or
+        'mean' aggregation) and each result carries its top matching passages
+        from the in-memory payload store, so no interview file is read.
+        """
         try:
-            if not self.index or not self.interview_ids:
+            if self.index is None or not len(self.index):
                 logger.warning("No interviews in vector store")
                 return []
 
@@ -331,54 +405,33 @@ Analysis:
             # Get query embedding
             query_embedding = self.embeddings.embed_query(query)
             
-            # Search the index with a larger k to get more potential matches
-            search_k = min(k * 10, len(self.interview_ids))  # Increased from 5x to 10x
-            distances, indices = self.index.search(
-                np.array([query_embedding]).astype('float32'),
-                search_k
-            )
+            # Interviews contribute several passages each, so search a wide candidate pool
+            search_k = min(k * 20, len(self.index))
+            matches = self.index.search([query_embedding], search_k)[0]
             
-            # Get unique interview IDs from search results
-            unique_interviews = {}
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.interview_ids):  # Ensure valid index
-                    interview_id = self.interview_ids[idx]
-                    if interview_id not in unique_interviews:
-                        # Load the interview data
-                        interview_file = Path('interviews') / f"{interview_id}.json"
-                        interview_data = {}
-                        if interview_file.exists():
-                            with open(interview_file) as f:
-                                interview_data = json.load(f)
-                        
-                        # Skip interviews with empty transcripts
-                        if not interview_data.get('transcript'):
-                            continue
-                        
-                        # Calculate similarity score using a modified sigmoid function
-                        l2_distance = float(distances[0][i])
-                        similarity_score = 1 / (1 + np.exp(l2_distance / 5))
-                        
-                        # Skip results with very low similarity
-                        if similarity_score < 0.1:
-                            continue
-                        
-                        # Format the result with all necessary fields
-                        unique_interviews[interview_id] = {
-                            'id': interview_id,
-                            'project_name': interview_data.get('project_name', 'Unknown Project'),
-                            'interview_type': interview_data.get('interview_type', 'Unknown Type'),
-                            'date': interview_data.get('date') or datetime.now().isoformat(),
-                            'transcript': interview_data.get('transcript', ''),
-                            'analysis': interview_data.get('analysis', ''),
-                            'score': similarity_score
-                        }
-                        if len(unique_interviews) >= k:
-                            break
+            # Turn passage distances into similarities
+            scored = []
+            for key, l2_distance in matches:
+                similarity_score = float(1 / (1 + np.exp(l2_distance / 5)))
+                if similarity_score >= 0.1:
+                    scored.append((key, similarity_score))
             
-            # Convert to list and sort by score
-            results = list(unique_interviews.values())
-            results.sort(key=lambda x: x['score'], reverse=True)
+            # Fold passage scores into one score per interview, best first
+            results = []
+            for match in aggregate_chunk_scores(scored, mode=aggregation, passages=passages)[:k]:
+                interview_id = match['interview_id']
+                metadata = self.interview_metadata.get(interview_id, {})
+                results.append({
+                    'id': interview_id,
+                    'project_name': metadata.get('project_name') or 'Unknown Project',
+                    'interview_type': metadata.get('interview_type') or 'Unknown Type',
+                    'date': metadata.get('date') or datetime.now().isoformat(),
+                    'score': match['score'],
+                    'passages': [
+                        dict(self.chunk_payloads[key], score=score)
+                        for key, score in match['passages'] if key in self.chunk_payloads
+                    ]
+                })
             
             logger.info(f"Found {len(results)} unique interviews")
             return results
@@ -391,33 +444,31 @@ Analysis:
     def find_similar_interviews(self, interview_id: str, k: int = 3) -> List[Dict[str, Any]]:
         """Find interviews similar to a given interview."""
         try:
-            if interview_id not in self.interview_ids:
+            if self.index is None or interview_id not in self.interview_chunks:
                 return []
 
-            # Get the index of the interview
-            idx = self.interview_ids.index(interview_id)
-            
-            # Get the embedding at that index
-            embedding = self.index.reconstruct(idx)
+            # The mean of the interview's passage vectors stands in for the whole interview
+            own_keys = self.interview_chunks[interview_id]
+            centroid = np.mean([self.index.reconstruct(key) for key in own_keys], axis=0)
             
-            # Search for similar interviews
-            distances, indices = self.index.search(
-                np.array([embedding]).astype('float32'), k + 1
-            )
+            # Search enough passages to find k other interviews
+            search_k = min(len(self.index), len(own_keys) + (k + 1) * 20)
+            matches = self.index.search([centroid], search_k)[0]
 
-            # Get results (excluding the input interview)
-            results = []
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.interview_ids) and idx != self.interview_ids.index(interview_id):
-                    similar_id = self.interview_ids[idx]
-                    metadata = self.interview_metadata.get(similar_id, {})
-                    results.append({
-                        'id': similar_id,
-                        'score': float(distances[0][i]),
-                        'metadata': metadata
-                    })
+            # Each interview is as close as its closest passage (matches come nearest first)
+            closest = {}
+            for key, distance in matches:
+                similar_id = split_chunk_key(key)[0]
+                if similar_id != interview_id and similar_id not in closest:
+                    closest[similar_id] = distance
 
-            return results
+            results = [{
+                'id': similar_id,
+                'score': distance,
+                'metadata': self.interview_metadata.get(similar_id, {})
+            } for similar_id, distance in closest.items()]
+
+            return results[:k]
         except Exception as e:
             print(f"Error finding similar interviews: {str(e)}")
             return []
@@ -425,12 +476,7 @@ Analysis:
     def remove_interview(self, interview_id: str):
         """Remove an interview from the vector store."""
         try:
-            if interview_id in self.interview_ids:
-                idx = self.interview_ids.index(interview_id)
-                # Remove the embedding
-                self.index.remove_ids(np.array([idx]))
-                # Remove from metadata
-                self.interview_ids.pop(idx)
+            if self.index is not None and self._drop_chunks(interview_id):
                 self.interview_metadata.pop(interview_id, None)
                 self.save_vector_store()
                 print(f"Successfully removed interview {interview_id}")
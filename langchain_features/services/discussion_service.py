@@ -1,29 +1,31 @@
-import json
 import logging
-import os
+import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 from ..models import DiscussionGuide, InterviewSession
+from .discussion_store import create_store, merge_message_log
 
 logger = logging.getLogger(__name__)
 
 class DiscussionService:
     """Service for managing discussion guides and sessions"""
     
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, backend: str = None):
         """Initialize the discussion service.
         
         Args:
             data_dir (str, optional): Directory to store data files
+            backend (str, optional): Storage backend, "json" or "sqlite"
+                (defaults to the DISCUSSION_STORAGE_BACKEND environment variable, then "json")
         """
         self.data_dir = Path(data_dir or "data/discussions")
         self.sessions_dir = self.data_dir / "sessions"
-        os.makedirs(self.data_dir, exist_ok=True)
-        os.makedirs(self.sessions_dir, exist_ok=True)
-        logger.info(f"Initialized DiscussionService with data_dir={self.data_dir}")
+        self.store = create_store(self.data_dir, backend)
+        self._message_log_lock = threading.RLock()
+        logger.info(f"Initialized DiscussionService with data_dir={self.data_dir}, backend={type(self.store).__name__}")
     
     # Discussion Guide Methods
     
@@ -94,37 +96,30 @@ class DiscussionService:
         Returns:
             List[Dict]: List of guides
         """
-        guides = []
-        
-        if not self.data_dir.exists():
-            return guides
+        guides, _ = self.query_guides(status="active" if active_only else None)
+        return guides
+    
+    def query_guides(self, status: str = None, limit: int = None, cursor: str = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page through discussion guides, most recently updated first.
         
-        for file_path in self.data_dir.glob("*.json"):
-            if not file_path.is_file() or file_path.name.startswith("."):
-                continue
+        Args:
+            status (str, optional): Only return guides with this status
+            limit (int, optional): Page size; all matching guides if omitted
+            cursor (str, optional): Cursor returned with the previous page
             
-            try:
-                with open(file_path, "r") as f:
-                    guide_data = json.load(f)
-                
-                if active_only and guide_data.get("status") != "active":
-                    continue
-                    
-                # Ensure essential fields exist
-                if "id" not in guide_data:
-                    guide_data["id"] = file_path.stem
-                
-                if "updated_at" not in guide_data:
-                    guide_data["updated_at"] = datetime.now().isoformat()
-                
-                if "created_at" not in guide_data:
-                    guide_data["created_at"] = datetime.now().isoformat()
-                    
-                guides.append(guide_data)
-            except Exception as e:
-                logger.error(f"Error loading guide from {file_path}: {str(e)}")
-        
-        return sorted(guides, key=lambda g: g.get("updated_at", ""), reverse=True)
+        Returns:
+            Tuple[List[Dict], Optional[str]]: The page and the cursor for the next one (None on the last page)
+        """
+        guides, next_cursor = self.store.list_guides(status=status, limit=limit, cursor=cursor)
+        for guide_data in guides:
+            # Ensure essential fields exist
+            if "updated_at" not in guide_data:
+                guide_data["updated_at"] = datetime.now().isoformat()
+            
+            if "created_at" not in guide_data:
+                guide_data["created_at"] = datetime.now().isoformat()
+        
+        return guides, next_cursor
     
     def archive_guide(self, guide_id: str) -> bool:
         """Archive a discussion guide.
@@ -155,8 +150,7 @@ class DiscussionService:
         Returns:
             bool: True if successful
         """
-        guide_path = self.data_dir / f"{guide_id}.json"
-        if not guide_path.exists():
+        if not self.store.guide_exists(guide_id):
             logger.warning(f"Guide not found for deletion: {guide_id}")
             return False
             
@@ -174,9 +168,9 @@ class DiscussionService:
                     self._save_session(session_id, session)
                     logger.info(f"Marked session {session_id} as orphaned")
         
-        # Delete the guide file
+        # Delete the guide
         try:
-            guide_path.unlink()
+            self.store.delete_guide(guide_id)
             logger.info(f"Deleted discussion guide with ID {guide_id}")
             return True
         except Exception as e:
@@ -189,29 +183,8 @@ class DiscussionService:
         Returns:
             List[Dict]: List of all sessions
         """
-        all_sessions = []
-        
-        # List all session files in the sessions directory
         try:
-            session_files = list(self.sessions_dir.glob("*.json"))
-            
-            for session_file in session_files:
-                try:
-                    session_id = session_file.stem
-                    session = self._load_session(session_id)
-                    if session:
-                        all_sessions.append(session)
-                except Exception as e:
-                    logger.error(f"Error loading session from {session_file}: {str(e)}")
-                    continue
-                
-            # Sort by last updated time, most recent first
-            all_sessions = sorted(
-                all_sessions, 
-                key=lambda s: s.get("updated_at", s.get("created_at", "")),
-                reverse=True
-            )
-            
+            all_sessions, _ = self.query_sessions()
             logger.info(f"Loaded {len(all_sessions)} sessions across all guides")
             return all_sessions
             
@@ -219,6 +192,29 @@ class DiscussionService:
             logger.error(f"Error getting all sessions: {str(e)}")
             return []
     
+    def query_sessions(self, guide_id: str = None, status: str = None, order_by: str = "updated_at",
+                       limit: int = None, cursor: str = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Page through interview sessions, newest first.
+        
+        Args:
+            guide_id (str, optional): Only return sessions of this guide
+            status (str, optional): Only return sessions with this status
+            order_by (str): "updated_at" or "created_at"
+            limit (int, optional): Page size; all matching sessions if omitted
+            cursor (str, optional): Cursor returned with the previous page
+            
+        Returns:
+            Tuple[List[Dict], Optional[str]]: The page and the cursor for the next one (None on the last page)
+        """
+        sessions, next_cursor = self.store.list_sessions(
+            guide_id=guide_id, status=status, order_by=order_by, limit=limit, cursor=cursor
+        )
+        logs = self.store.read_message_logs(session.get("id") for session in sessions)
+        for session in sessions:
+            messages, logged_at = logs.get(session.get("id"), ([], None))
+            merge_message_log(session, messages, logged_at)
+        return sessions, next_cursor
+    
     # Alias list_sessions to get_all_sessions for compatibility with InterviewService
     list_sessions = get_all_sessions
     
@@ -319,17 +315,11 @@ class DiscussionService:
         Returns:
             List[Dict]: List of sessions
         """
-        guide = self._load_guide(guide_id)
-        if not guide or "sessions" not in guide:
+        if not self.store.guide_exists(guide_id):
             return []
         
-        sessions = []
-        for session_id in guide["sessions"]:
-            session = self._load_session(session_id)
-            if session:
-                sessions.append(session)
-        
-        return sorted(sessions, key=lambda s: s.get("created_at", ""), reverse=True)
+        sessions, _ = self.query_sessions(guide_id=guide_id, order_by="created_at")
+        return sessions
     
     def update_session(self, session_id: str, data: Dict[str, Any]) -> bool:
         """Update a session.
@@ -366,32 +356,43 @@ class DiscussionService:
         Returns:
             bool: True if successful
         """
-        session = self._load_session(session_id)
-        if not session:
+        if not self.store.session_exists(session_id):
             return False
         
-        if "messages" not in session:
-            session["messages"] = []
-        
         # Add timestamp if not present
         if "timestamp" not in message:
             message["timestamp"] = datetime.now().isoformat()
         
-        session["messages"].append(message)
-        session["updated_at"] = datetime.now().isoformat()
-        
-        # Update transcript
-        if "transcript" not in session:
-            session["transcript"] = ""
+        # The id lets compaction tell logged messages from ones already in the snapshot
+        if "id" not in message:
+            message["id"] = str(uuid.uuid4())
         
-        speaker = "Moderator" if message.get("role") == "assistant" else "Participant"
-        session["transcript"] += f"\n\n{speaker}: {message.get('content', '')}"
+        # Append one line instead of rewriting the session; messages, transcript
+        # and updated_at are derived from the log when the session is loaded
+        with self._message_log_lock:
+            if self.store.append_message(session_id, message):
+                self.compact_session(session_id)
         
-        self._save_session(session_id, session)
         logger.info(f"Added message to session {session_id}")
         
         return True
     
+    def compact_session(self, session_id: str) -> bool:
+        """Fold a session's message log into its snapshot.
+        
+        Args:
+            session_id (str): The session ID
+            
+        Returns:
+            bool: True if successful
+        """
+        with self._message_log_lock:
+            session = self._load_session(session_id)
+            if not session:
+                return False
+            
+            return self._save_session(session_id, session)
+    
     def add_message_to_session(self, session_id: str, content: str, role: str, message_id: str = None) -> str:
         """Add a message to a session with separate parameters.
         
@@ -471,8 +472,7 @@ class DiscussionService:
         Returns:
             bool: True if successful
         """
-        session_path = self.sessions_dir / f"{session_id}.json"
-        if not session_path.exists():
+        if not self.store.session_exists(session_id):
             logger.warning(f"Session not found for deletion: {session_id}")
             return False
         
@@ -489,9 +489,9 @@ class DiscussionService:
                     self._save_guide(guide_id, guide)
                     logger.info(f"Removed session {session_id} from guide {guide_id}")
         
-        # Delete the session file
+        # Delete the session and its message log
         try:
-            session_path.unlink()
+            self.store.delete_session(session_id)
             logger.info(f"Deleted session with ID {session_id}")
             return True
         except Exception as e:
@@ -548,9 +548,7 @@ class DiscussionService:
                 else:
                     serializable_data[key] = value
             
-            file_path = self.data_dir / f"{guide_id}.json"
-            with open(file_path, "w") as f:
-                json.dump(serializable_data, f, indent=2)
+            self.store.save_guide(guide_id, serializable_data)
             
             return True
         except Exception as e:
@@ -576,9 +574,11 @@ class DiscussionService:
                 else:
                     serializable_data[key] = value
             
-            file_path = self.sessions_dir / f"{session_id}.json"
-            with open(file_path, "w") as f:
-                json.dump(serializable_data, f, indent=2)
+            self.store.save_session(session_id, serializable_data)
+            
+            # Logged messages now stored in the snapshot no longer need the log
+            saved_ids = {m.get("id") for m in serializable_data.get("messages", []) or [] if m.get("id")}
+            self.store.trim_message_log(session_id, saved_ids)
             
             return True
         except Exception as e:
@@ -594,14 +594,11 @@ class DiscussionService:
         Returns:
             Dict or None: The guide data or None if not found
         """
-        guide_path = self.data_dir / f"{guide_id}.json"
-        if not guide_path.exists():
-            logger.warning(f"Guide file not found: {guide_path}")
-            return None
-        
         try:
-            with open(guide_path, "r") as f:
-                guide_data = json.load(f)
+            guide_data = self.store.load_guide(guide_id)
+            if guide_data is None:
+                logger.warning(f"Guide not found: {guide_id}")
+                return None
             
             # Ensure essential fields exist
             if "id" not in guide_data:
@@ -646,12 +643,14 @@ class DiscussionService:
             Dict: The session data or None if not found
         """
         try:
-            file_path = self.sessions_dir / f"{session_id}.json"
-            if not file_path.exists():
+            session = self.store.load_session(session_id)
+            if session is None:
                 return None
             
-            with open(file_path, "r") as f:
-                return json.load(f)
+            # Merge messages appended since the last compaction
+            merge_message_log(session, *self.store.read_message_log(session_id))
+            
+            return session
         except Exception as e:
             logger.error(f"Error loading session {session_id}: {str(e)}")
             return None 
\ No newline at end of file
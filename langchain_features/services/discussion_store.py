@@ -0,0 +1,509 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+# (messages, logged_at) for the messages appended since a session's last compaction
+MessageLog = Tuple[List[Dict[str, Any]], Optional[str]]
+
+
+def transcript_entry(message: Dict[str, Any]) -> str:
+    """Transcript text contributed by one message."""
+    speaker = "Moderator" if message.get("role") == "assistant" else "Participant"
+    return f"\n\n{speaker}: {message.get('content', '')}"
+
+
+def merge_message_log(session: Dict[str, Any], messages: List[Dict[str, Any]], logged_at: Optional[str]) -> Dict[str, Any]:
+    """Fold logged messages that the snapshot does not hold yet into a session.
+
+    Args:
+        session (Dict): The session snapshot
+        messages (List[Dict]): Messages from the session's log, in append order
+        logged_at (str, optional): When the last message was logged
+
+    Returns:
+        Dict: The same session with messages, transcript and updated_at brought up to date
+    """
+    known_ids = {m.get("id") for m in session.get("messages", []) or [] if m.get("id")}
+    pending = [m for m in messages if m.get("id") not in known_ids]
+    if pending:
+        session["messages"] = (session.get("messages") or []) + pending
+        session["transcript"] = (session.get("transcript") or "") + "".join(
+            transcript_entry(m) for m in pending
+        )
+        if logged_at and logged_at > str(session.get("updated_at") or ""):
+            session["updated_at"] = logged_at
+    return session
+
+
+def encode_cursor(sort_value: str, record_id: str) -> str:
+    """Opaque cursor for keyset pagination."""
+    return base64.urlsafe_b64encode(json.dumps([sort_value, record_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor."""
+    try:
+        sort_value, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return str(sort_value), str(record_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _sort_value(record: Dict[str, Any], order_by: str) -> str:
+    if order_by == "created_at":
+        return str(record.get("created_at") or "")
+    return str(record.get("updated_at") or record.get("created_at") or "")
+
+
+def _paginate(records: List[Dict[str, Any]], order_by: str, limit: Optional[int], cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Newest-first keyset pagination over in-memory records."""
+    records = sorted(records, key=lambda r: (_sort_value(r, order_by), str(r.get("id", ""))), reverse=True)
+    if cursor:
+        after = decode_cursor(cursor)
+        records = [r for r in records if (_sort_value(r, order_by), str(r.get("id", ""))) < after]
+    if limit is None or len(records) <= limit:
+        return records, None
+    page = records[:limit]
+    last = page[-1]
+    return page, encode_cursor(_sort_value(last, order_by), str(last.get("id", "")))
+
+
+class JsonDiscussionStore:
+    """One JSON file per guide and per session, plus a JSONL message log per session."""
+
+    # Fold a session's message log into its snapshot once it passes this size
+    MESSAGE_LOG_COMPACT_BYTES = 64 * 1024
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.sessions_dir = self.data_dir / "sessions"
+        os.makedirs(self.data_dir, exist_ok=True)
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        self._message_log_lock = threading.RLock()
+
+    # Guides
+
+    def guide_exists(self, guide_id: str) -> bool:
+        return (self.data_dir / f"{guide_id}.json").exists()
+
+    def load_guide(self, guide_id: str) -> Optional[Dict[str, Any]]:
+        guide_path = self.data_dir / f"{guide_id}.json"
+        if not guide_path.exists():
+            return None
+        with open(guide_path, "r") as f:
+            return json.load(f)
+
+    def save_guide(self, guide_id: str, guide_data: Dict[str, Any]) -> None:
+        with open(self.data_dir / f"{guide_id}.json", "w") as f:
+            json.dump(guide_data, f, indent=2)
+
+    def delete_guide(self, guide_id: str) -> bool:
+        guide_path = self.data_dir / f"{guide_id}.json"
+        if not guide_path.exists():
+            return False
+        guide_path.unlink()
+        return True
+
+    def list_guides(self, status: Optional[str] = None, limit: Optional[int] = None,
+                    cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        guides = []
+        for file_path in self.data_dir.glob("*.json"):
+            if not file_path.is_file() or file_path.name.startswith("."):
+                continue
+            try:
+                with open(file_path, "r") as f:
+                    guide_data = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading guide from {file_path}: {str(e)}")
+                continue
+            if status and guide_data.get("status") != status:
+                continue
+            guide_data.setdefault("id", file_path.stem)
+            guides.append(guide_data)
+        return _paginate(guides, "updated_at", limit, cursor)
+
+    # Sessions
+
+    def session_exists(self, session_id: str) -> bool:
+        return (self.sessions_dir / f"{session_id}.json").exists()
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        file_path = self.sessions_dir / f"{session_id}.json"
+        if not file_path.exists():
+            return None
+        with open(file_path, "r") as f:
+            return json.load(f)
+
+    def save_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        with open(self.sessions_dir / f"{session_id}.json", "w") as f:
+            json.dump(session_data, f, indent=2)
+
+    def delete_session(self, session_id: str) -> bool:
+        session_path = self.sessions_dir / f"{session_id}.json"
+        if not session_path.exists():
+            return False
+        session_path.unlink()
+        message_log_path = self.message_log_path(session_id)
+        if message_log_path.exists():
+            message_log_path.unlink()
+        return True
+
+    def list_sessions(self, guide_id: Optional[str] = None, status: Optional[str] = None,
+                      order_by: str = "updated_at", limit: Optional[int] = None,
+                      cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        if guide_id is not None:
+            # The guide file already lists its sessions, so only those are read
+            guide = self.load_guide(guide_id) or {}
+            session_ids = guide.get("sessions", [])
+        else:
+            session_ids = [path.stem for path in self.sessions_dir.glob("*.json")]
+
+        sessions = []
+        for session_id in session_ids:
+            try:
+                session = self.load_session(session_id)
+            except Exception as e:
+                logger.error(f"Error loading session {session_id}: {str(e)}")
+                continue
+            if not session or (status and session.get("status") != status):
+                continue
+            # Messages logged since the snapshot count towards updated_at, as in the SQLite store
+            merge_message_log(session, *self.read_message_log(session_id))
+            sessions.append(session)
+        return _paginate(sessions, order_by, limit, cursor)
+
+    # Message log
+
+    def message_log_path(self, session_id: str) -> Path:
+        """Path of a session's append-only message log."""
+        return self.sessions_dir / f"{session_id}.messages.jsonl"
+
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Append one message; returns True when the log is due for compaction."""
+        with self._message_log_lock:
+            with open(self.message_log_path(session_id), "a") as f:
+                f.write(json.dumps(message, default=str) + "\n")
+                return f.tell() >= self.MESSAGE_LOG_COMPACT_BYTES
+
+    def read_message_log(self, session_id: str) -> MessageLog:
+        log_path = self.message_log_path(session_id)
+        if not log_path.exists():
+            return [], None
+
+        messages = []
+        with open(log_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    messages.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-append
+                    logger.warning(f"Skipping unreadable message log line for session {session_id}")
+        return messages, datetime.fromtimestamp(log_path.stat().st_mtime).isoformat()
+
+    def read_message_logs(self, session_ids: Iterable[str]) -> Dict[str, MessageLog]:
+        return {session_id: self.read_message_log(session_id) for session_id in session_ids}
+
+    def trim_message_log(self, session_id: str, saved_ids: set) -> None:
+        """Drop logged messages that the snapshot already contains."""
+        with self._message_log_lock:
+            log_path = self.message_log_path(session_id)
+            if not log_path.exists():
+                return
+
+            remaining = [m for m in self.read_message_log(session_id)[0] if m.get("id") not in saved_ids]
+            if not remaining:
+                log_path.unlink()
+                return
+
+            tmp_path = log_path.with_name(log_path.name + ".tmp")
+            with open(tmp_path, "w") as f:
+                for message in remaining:
+                    f.write(json.dumps(message, default=str) + "\n")
+            os.replace(tmp_path, log_path)
+
+
+class SqliteDiscussionStore:
+    """Guides, sessions and message logs in one SQLite database in WAL mode.
+
+    The queried fields (guide_id, status, created_at, updated_at) are indexed
+    columns next to the JSON document, so list pages are index range scans.
+    """
+
+    # Fold a session's logged messages into its snapshot once this many are pending
+    MESSAGE_LOG_COMPACT_COUNT = 200
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS guides (
+            id TEXT PRIMARY KEY,
+            status TEXT,
+            created_at TEXT NOT NULL DEFAULT '',
+            updated_at TEXT NOT NULL DEFAULT '',
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_guides_updated ON guides (updated_at, id);
+        CREATE INDEX IF NOT EXISTS idx_guides_status_updated ON guides (status, updated_at, id);
+        CREATE INDEX IF NOT EXISTS idx_guides_created ON guides (created_at, id);
+
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            guide_id TEXT,
+            status TEXT,
+            created_at TEXT NOT NULL DEFAULT '',
+            updated_at TEXT NOT NULL DEFAULT '',
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at, id);
+        CREATE INDEX IF NOT EXISTS idx_sessions_created ON sessions (created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_sessions_status_updated ON sessions (status, updated_at, id);
+        CREATE INDEX IF NOT EXISTS idx_sessions_guide_created ON sessions (guide_id, created_at, id);
+        CREATE INDEX IF NOT EXISTS idx_sessions_guide_updated ON sessions (guide_id, updated_at, id);
+
+        CREATE TABLE IF NOT EXISTS session_messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            message_id TEXT,
+            logged_at TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_session_messages_session ON session_messages (session_id, seq);
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        os.makedirs(self.db_path.parent, exist_ok=True)
+        # One shared connection guarded by a lock works for both OS threads and
+        # eventlet greenlets; every statement here is a short indexed lookup.
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def _write(self, sql: str, params: Iterable[Any] = ()) -> int:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, tuple(params)).rowcount
+
+    def _page(self, table: str, filters: Dict[str, Any], order_by: str, limit: Optional[int],
+              cursor: Optional[str]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Newest-first keyset page of JSON documents from table."""
+        if order_by not in ("updated_at", "created_at"):
+            raise ValueError(f"Unsupported order_by: {order_by}")
+        where, params = [], []
+        for column, value in filters.items():
+            where.append(f"{column} = ?")
+            params.append(value)
+        if cursor:
+            sort_value, record_id = decode_cursor(cursor)
+            where.append(f"({order_by} < ? OR ({order_by} = ? AND id < ?))")
+            params.extend([sort_value, sort_value, record_id])
+        sql = f"SELECT id, {order_by} AS sort_value, data FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_by} DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        rows = self._query(sql, params)
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["sort_value"], rows[-1]["id"])
+        return [json.loads(row["data"]) for row in rows], next_cursor
+
+    # Guides
+
+    def guide_exists(self, guide_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM guides WHERE id = ?", (guide_id,)))
+
+    def load_guide(self, guide_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM guides WHERE id = ?", (guide_id,))
+        return json.loads(rows[0]["data"]) if rows else None
+
+    def save_guide(self, guide_id: str, guide_data: Dict[str, Any]) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO guides (id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?)",
+            (
+                guide_id,
+                guide_data.get("status"),
+                str(guide_data.get("created_at") or ""),
+                str(guide_data.get("updated_at") or guide_data.get("created_at") or ""),
+                json.dumps(guide_data, default=str)
+            )
+        )
+
+    def delete_guide(self, guide_id: str) -> bool:
+        return self._write("DELETE FROM guides WHERE id = ?", (guide_id,)) > 0
+
+    def list_guides(self, status: Optional[str] = None, limit: Optional[int] = None,
+                    cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        filters = {"status": status} if status else {}
+        return self._page("guides", filters, "updated_at", limit, cursor)
+
+    # Sessions
+
+    def session_exists(self, session_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM sessions WHERE id = ?", (session_id,)))
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM sessions WHERE id = ?", (session_id,))
+        return json.loads(rows[0]["data"]) if rows else None
+
+    def save_session(self, session_id: str, session_data: Dict[str, Any]) -> None:
+        self._write(
+            "INSERT OR REPLACE INTO sessions (id, guide_id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                session_id,
+                session_data.get("guide_id"),
+                session_data.get("status"),
+                str(session_data.get("created_at") or ""),
+                str(session_data.get("updated_at") or session_data.get("created_at") or ""),
+                json.dumps(session_data, default=str)
+            )
+        )
+
+    def delete_session(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            return self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+
+    def list_sessions(self, guide_id: Optional[str] = None, status: Optional[str] = None,
+                      order_by: str = "updated_at", limit: Optional[int] = None,
+                      cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        filters = {}
+        if guide_id is not None:
+            filters["guide_id"] = guide_id
+        if status:
+            filters["status"] = status
+        return self._page("sessions", filters, order_by, limit, cursor)
+
+    # Message log
+
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Append one message; returns True when the log is due for compaction."""
+        logged_at = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO session_messages (session_id, message_id, logged_at, data) VALUES (?, ?, ?, ?)",
+                (session_id, message.get("id"), logged_at, json.dumps(message, default=str))
+            )
+            # Keep the indexed sort column current without touching the document
+            self._conn.execute("UPDATE sessions SET updated_at = ? WHERE id = ?", (logged_at, session_id))
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM session_messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+        return pending >= self.MESSAGE_LOG_COMPACT_COUNT
+
+    def read_message_log(self, session_id: str) -> MessageLog:
+        return self.read_message_logs([session_id]).get(session_id, ([], None))
+
+    def read_message_logs(self, session_ids: Iterable[str]) -> Dict[str, MessageLog]:
+        session_ids = list(session_ids)
+        logs: Dict[str, MessageLog] = {}
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(session_ids), 500):
+            batch = session_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in batch)
+            rows = self._query(
+                f"SELECT session_id, logged_at, data FROM session_messages WHERE session_id IN ({placeholders}) ORDER BY seq",
+                batch
+            )
+            for row in rows:
+                messages, _ = logs.get(row["session_id"], ([], None))
+                messages.append(json.loads(row["data"]))
+                logs[row["session_id"]] = (messages, row["logged_at"])
+        return logs
+
+    def trim_message_log(self, session_id: str, saved_ids: set) -> None:
+        """Drop logged messages that the snapshot already contains."""
+        if not saved_ids:
+            return
+        saved_ids = list(saved_ids)
+        with self._lock, self._conn:
+            for start in range(0, len(saved_ids), 500):
+                batch = saved_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in batch)
+                self._conn.execute(
+                    f"DELETE FROM session_messages WHERE session_id = ? AND message_id IN ({placeholders})",
+                    [session_id] + batch
+                )
+
+
+def create_store(data_dir: Path, backend: Optional[str] = None):
+    """Build the storage backend named by backend or DISCUSSION_STORAGE_BACKEND.
+
+    Args:
+        data_dir (Path): Directory holding the JSON files or the SQLite database
+        backend (str, optional): "json" (default) or "sqlite"
+
+    Returns:
+        The storage backend instance
+    """
+    backend = (backend or os.getenv("DISCUSSION_STORAGE_BACKEND", "json")).lower()
+    if backend == "sqlite":
+        return SqliteDiscussionStore(Path(data_dir) / "discussions.db")
+    if backend == "json":
+        return JsonDiscussionStore(Path(data_dir))
+    raise ValueError(f"Unknown discussion storage backend: {backend}")
+
+
+def migrate_json_to_sqlite(data_dir: Path, db_path: Optional[Path] = None) -> Dict[str, int]:
+    """Import every JSON guide and session (with its message log) into SQLite.
+
+    Re-running is safe: rows are upserted by id. The JSON files are left in place.
+
+    Args:
+        data_dir (Path): Directory with the JSON guides and sessions/ subdirectory
+        db_path (Path, optional): Target database, defaults to data_dir/discussions.db
+
+    Returns:
+        Dict: Counts of imported guides, sessions and messages
+    """
+    source = JsonDiscussionStore(Path(data_dir))
+    target = SqliteDiscussionStore(Path(db_path) if db_path else Path(data_dir) / "discussions.db")
+    counts = {"guides": 0, "sessions": 0, "messages": 0}
+    try:
+        guides, _ = source.list_guides()
+        for guide in guides:
+            target.save_guide(guide["id"], guide)
+            counts["guides"] += 1
+
+        for session_file in source.sessions_dir.glob("*.json"):
+            session_id = session_file.stem
+            try:
+                session = source.load_session(session_id)
+            except Exception as e:
+                logger.error(f"Skipping unreadable session {session_file}: {str(e)}")
+                continue
+            if not session:
+                continue
+            session.setdefault("id", session_id)
+            session = merge_message_log(session, *source.read_message_log(session_id))
+            target.save_session(session_id, session)
+            counts["sessions"] += 1
+            counts["messages"] += len(session.get("messages") or [])
+    finally:
+        target.close()
+
+    logger.info(f"Migrated {counts['guides']} guides and {counts['sessions']} sessions into {target.db_path}")
+    return counts
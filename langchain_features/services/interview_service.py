@@ -17,6 +17,9 @@ from .interview_agent import InterviewAgent
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when the analysis template changes, so cached analyses are not reused
+ANALYSIS_TEMPLATE_VERSION = 1
+
 class InterviewService:
     """Service for managing LangChain interview agents and sessions"""
     
@@ -295,11 +298,13 @@ class InterviewService:
                 
             from langchain.chains import LLMChain
             from langchain.prompts import PromptTemplate
+            from daria_interview_tool.llm_cache import cached_call
             
             # Initialize the language model
+            model_name = "gpt-4" if os.environ.get("USE_GPT4", "").lower() == "true" else "gpt-3.5-turbo-16k"
             llm = ChatOpenAI(
                 temperature=0.3,  # Lower temperature for more focused/analytical responses
-                model_name="gpt-4" if os.environ.get("USE_GPT4", "").lower() == "true" else "gpt-3.5-turbo-16k",
+                model_name=model_name,
             )
             
             # Create a prompt template for analysis
@@ -320,8 +325,13 @@ class InterviewService:
             # Create the LLM chain
             chain = LLMChain(llm=llm, prompt=prompt_template)
             
-            # Generate the analysis
-            analysis = chain.run(analysis_prompt=prompt, transcript=transcript)
+            # Generate the analysis, unless this exact prompt was analyzed before
+            analysis = cached_call(
+                "interview_service.analysis", "openai", model_name, llm.temperature,
+                prompt_template.format(analysis_prompt=prompt, transcript=transcript),
+                lambda: chain.run(analysis_prompt=prompt, transcript=transcript),
+                ANALYSIS_TEMPLATE_VERSION
+            )
             
             logger.info(f"Successfully generated analysis of {len(transcript)} characters")
             return analysis
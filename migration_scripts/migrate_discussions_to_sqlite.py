@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Migration script to copy discussion guides and sessions from JSON files into SQLite.
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_features.services.discussion_store import migrate_json_to_sqlite
+
+# Define paths
+BASE_DIR = Path(__file__).parent.absolute().parent
+DATA_DIR = BASE_DIR / "data" / "discussions"
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy JSON discussion guides and sessions into SQLite")
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Directory with the JSON guides and sessions/")
+    parser.add_argument("--db", default=None, help="Target database (default: <data-dir>/discussions.db)")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    if not data_dir.exists():
+        print(f"Data directory {data_dir} does not exist")
+        return 1
+
+    print(f"Migrating discussions in {data_dir}")
+    counts = migrate_json_to_sqlite(data_dir, Path(args.db) if args.db else None)
+    print(f"Migrated {counts['guides']} guides, {counts['sessions']} sessions and {counts['messages']} messages")
+    print("Set DISCUSSION_STORAGE_BACKEND=sqlite to use the new database")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
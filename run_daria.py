@@ -12,7 +12,8 @@ os.environ['SKIP_EVENTLET'] = '1'
 
 # Add error handling
 try:
-    from app import app
+    from app import create_app
+    app = create_app()
 
     if __name__ == '__main__':
         # Instead of using socketio.run with eventlet, use the Flask development server
@@ -1,4 +1,6 @@
-from app import app, socketio
+from app import create_app, socketio
+
+app = create_app()
 
 if __name__ == '__main__':
     # Run the Daria Interview Tool on port 5003
@@ -6,7 +6,9 @@ import uuid
 os.environ['SKIP_EVENTLET'] = '1'
 
 # Import the app after setting environment variables
-from app import app
+from app import create_app
+
+app = create_app()
 
 try:
     # Try to import Flask-Session
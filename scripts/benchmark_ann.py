@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark approximate vector indexes against exact search on a synthetic corpus.
+
+Builds the flat, IVF-PQ and HNSW indexes through the same factory the vector
+store uses, sweeps nprobe / efSearch, and reports recall@k against the exact
+results together with p50/p99 single-query latency.
+
+    python scripts/benchmark_ann.py --vectors 100000 --dimension 384 --queries 500 --k 10
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path so we can import daria_interview_tool
+sys.path.append(str(Path(__file__).parent.parent))
+
+from daria_interview_tool.id_index import IdMappedIndex
+
+
+def synthetic_corpus(count: int, dimension: int, clusters: int, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to sentence embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype('float32')
+    vectors = centers[rng.integers(0, clusters, count)] + 0.5 * rng.standard_normal((count, dimension)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def measure(index: IdMappedIndex, queries: np.ndarray, k: int, truth, exact: bool = False):
+    latencies = []
+    recall = 0.0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        hits = index.search(query, k, exact=exact)[0]
+        latencies.append((time.perf_counter() - started) * 1000)
+        recall += len({key for key, _ in hits} & expected) / len(expected)
+    return recall / len(queries), np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency benchmark of flat vs IVF-PQ vs HNSW")
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128])
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.vectors + args.queries, args.dimension, args.clusters)
+    vectors, queries = corpus[:args.vectors], corpus[args.vectors:]
+    keys = [f"doc-{i}" for i in range(args.vectors)]
+
+    index = IdMappedIndex(args.dimension)
+    index.add(keys, vectors)
+    truth = [{key for key, _ in row} for row in index.search(queries, args.k, exact=True)]
+
+    print(f"{args.vectors} vectors, d={args.dimension}, {args.queries} queries, recall@{args.k}")
+    print(f"{'index':<28}{'build s':>10}{'recall':>10}{'p50 ms':>10}{'p99 ms':>10}")
+
+    recall, p50, p99 = measure(index, queries, args.k, truth, exact=True)
+    print(f"{'flat':<28}{0.0:>10.2f}{recall:>10.3f}{p50:>10.3f}{p99:>10.3f}")
+
+    for kind, setting, values in (('ivfpq', 'nprobe', args.nprobe), ('hnsw', 'ef_search', args.ef_search)):
+        started = time.perf_counter()
+        index.train(kind)
+        build = time.perf_counter() - started
+        for value in values:
+            index.tune(**{setting: value})
+            recall, p50, p99 = measure(index, queries, args.k, truth)
+            label = f"{kind} {setting}={value}"
+            print(f"{label:<28}{build:>10.2f}{recall:>10.3f}{p50:>10.3f}{p99:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Chunking time of long transcripts: offset-based vs substring entry alignment.
+
+Generates transcripts of the given lengths (one speaker turn every
+--turn-seconds) and times TranscriptProcessor.chunk_transcript against the
+previous alignment, which searched the remaining entries of every chunk with
+substring tests.
+
+    python scripts/benchmark_chunking.py --hours 1 2 4 8
+"""
+
+import sys
+import time
+import random
+import logging
+import argparse
+from pathlib import Path
+
+# Add parent directory to path so we can import the processor
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.process_transcripts import TranscriptProcessor
+from daria_interview_tool.transcript_splitter import TranscriptSplitter
+
+WORDS = ("so the checkout flow was slow and I kept losing my cart which was really frustrating "
+         "honestly onboarding felt quick but the pricing page confused me yes").split()
+
+
+def make_transcript(hours: float, turn_seconds: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    turns = []
+    for i in range(int(hours * 3600 / turn_seconds)):
+        seconds = i * turn_seconds
+        stamp = f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        speaker = 'Interviewer' if i % 2 == 0 else 'Participant'
+        words = rng.randint(5, 120)
+        turns.append(f"[{speaker}] {stamp}\n{' '.join(rng.choice(WORDS) for _ in range(words))}.")
+    return "\n\n".join(turns)
+
+
+def substring_alignment(processor: TranscriptProcessor, transcript: str):
+    """The previous chunk_transcript alignment (without its timestamp fallback)."""
+    entries = processor.parse_transcript(transcript)
+    entries.sort(key=lambda x: x['timestamp'])
+    chunks = []
+    remaining_entries = entries.copy()
+    for chunk_text in processor.splitter.split_texts(transcript):
+        chunk_entries = []
+        chunk_start_idx = None
+        for i, entry in enumerate(remaining_entries):
+            if entry['text'] in chunk_text:
+                if chunk_start_idx is None:
+                    chunk_start_idx = i
+                chunk_entries.append(entry)
+            elif chunk_entries:
+                break
+        if chunk_entries:
+            remaining_entries = remaining_entries[chunk_start_idx + len(chunk_entries):]
+            chunks.append({'entries': chunk_entries, 'combined_text': chunk_text,
+                           'timestamp': chunk_entries[0]['timestamp']})
+    return chunks
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entry-to-chunk alignment time on long transcripts")
+    parser.add_argument("--hours", type=float, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--turn-seconds", type=int, default=15)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    processor = TranscriptProcessor.__new__(TranscriptProcessor)
+    processor.splitter = TranscriptSplitter()
+    print(f"{'hours':>6}{'entries':>9}{'chunks':>8}{'substring s':>13}{'offsets s':>11}{'same':>6}")
+    for hours in args.hours:
+        transcript = make_transcript(hours, args.turn_seconds)
+        old_seconds, old = timed(substring_alignment, processor, transcript)
+        new_seconds, new = timed(processor.chunk_transcript, transcript)
+        entries = len(processor.parse_transcript(transcript))
+        print(f"{hours:>6g}{entries:>9}{len(new):>8}{old_seconds:>13.3f}{new_seconds:>11.3f}{str(old == new):>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
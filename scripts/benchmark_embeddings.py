@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of CustomEmbeddings against a local fake embeddings server.
+
+Compares the old behaviour (sequential batches of 100 items) with the
+concurrent, token-sized executor, with a cold cache on every run.
+
+    python scripts/benchmark_embeddings.py --texts 2000 --latency 0.3 --concurrency 1 4 8
+"""
+
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path so we can import daria_interview_tool and the test server
+sys.path.append(str(Path(__file__).parent.parent))
+
+from daria_interview_tool.embedding_executor import EmbeddingExecutor
+from daria_interview_tool.vector_store import CustomEmbeddings
+from tests.fake_embeddings_server import FakeEmbeddingsServer
+
+
+def run(server: FakeEmbeddingsServer, texts, **executor_args) -> float:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        embeddings = CustomEmbeddings(api_key="benchmark", cache_path=f"{cache_dir}/cache.db", base_url=server.url)
+        embeddings.executor = EmbeddingExecutor(embeddings._embed_batch, model=embeddings.model, **executor_args)
+        started = time.perf_counter()
+        embeddings.embed_documents(texts)
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding throughput: sequential vs concurrent batches")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=150, help="Words per text (~ a transcript chunk)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per fake API request")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-tokens", type=int, default=20000)
+    parser.add_argument("--fail-every", type=int, default=0, help="Inject a 429 every n requests")
+    args = parser.parse_args()
+
+    texts = [" ".join(f"word{(i * 7 + j) % 997}" for j in range(args.words)) + f" #{i}" for i in range(args.texts)]
+
+    with FakeEmbeddingsServer(latency=args.latency, fail_every=args.fail_every) as server:
+        print(f"{args.texts} texts x {args.words} words, {args.latency:.2f}s per request")
+        print(f"{'mode':<36}{'seconds':>10}{'texts/s':>10}")
+
+        elapsed = run(server, texts, max_concurrency=1, max_batch_items=100, max_batch_tokens=10 ** 9)
+        print(f"{'sequential, 100 items/batch':<36}{elapsed:>10.2f}{args.texts / elapsed:>10.0f}")
+
+        for concurrency in args.concurrency:
+            elapsed = run(server, texts, max_concurrency=concurrency, max_batch_tokens=args.batch_tokens,
+                          backoff_base=0.05)
+            label = f"{concurrency} in flight, {args.batch_tokens} tokens/batch"
+            print(f"{label:<36}{elapsed:>10.2f}{args.texts / elapsed:>10.0f}")
+        print(f"requests: {server.requests}, injected failures: {server.failures}, "
+              f"peak concurrency: {server.max_in_flight}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
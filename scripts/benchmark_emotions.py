@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Throughput of the emotion model on transcript chunks: one at a time vs batched.
+
+Chunks come from the processed interviews when there are any, otherwise
+from generated text of similar length.
+
+    python scripts/benchmark_emotions.py --chunks 256 --batch-sizes 8 16 32
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+# Add parent directory to path so we can import daria_interview_tool
+sys.path.append(str(Path(__file__).parent.parent))
+
+from daria_interview_tool.emotion_batching import classify_emotions, emotion_text, top_emotion
+from daria_interview_tool.model_registry import DEFAULT_EMOTION_MODEL, get_emotion_pipeline
+
+WORDS = ("the checkout flow was slow and I kept losing my cart which was really frustrating "
+         "honestly I loved how quick onboarding felt but the pricing page confused me").split()
+
+
+def load_chunks(processed_dir: Path, count: int):
+    texts = []
+    for path in sorted(processed_dir.glob('*.json')):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, json.JSONDecodeError):
+            continue
+        for chunk in data.get('chunks', []) or []:
+            text = chunk.get('combined_text') or chunk.get('text') or chunk.get('content')
+            if text:
+                texts.append(emotion_text(text))
+    if not texts:
+        rng = random.Random(0)
+        texts = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 300))) for _ in range(count)]
+    return (texts * (count // len(texts) + 1))[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emotion classification chunks/sec, sequential vs batched")
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--processed-dir", default="interviews/processed")
+    parser.add_argument("--model", default=DEFAULT_EMOTION_MODEL)
+    args = parser.parse_args()
+
+    texts = load_chunks(Path(args.processed_dir), args.chunks)
+    classifier = get_emotion_pipeline(args.model)
+    classifier(texts[:2])  # warm-up
+
+    print(f"{len(texts)} chunks, mean {sum(len(t.split()) for t in texts) / len(texts):.0f} words")
+    print(f"{'mode':<24}{'seconds':>10}{'chunks/s':>10}")
+
+    started = time.perf_counter()
+    baseline = [top_emotion(classifier(text, truncation=True)[0]) for text in texts]
+    elapsed = time.perf_counter() - started
+    print(f"{'one at a time':<24}{elapsed:>10.2f}{len(texts) / elapsed:>10.1f}")
+
+    for batch_size in args.batch_sizes:
+        started = time.perf_counter()
+        results = classify_emotions(classifier, texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        agree = sum(a['label'] == b['label'] for a, b in zip(baseline, results)) / len(texts)
+        print(f"{f'batch_size={batch_size}':<24}{elapsed:>10.2f}{len(texts) / elapsed:>10.1f}"
+              f"   labels agree: {agree:.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Parity and speed of the int8 ONNX backend against the torch models.
+
+Embeds and classifies the same transcript chunks with both backends and
+reports, per model, load time, resident memory added by the load, and
+chunks/sec, plus the accuracy parity of the ONNX models: cosine agreement of
+the embeddings and agreement of the top emotion label. Exits with 1 if parity
+is below the given thresholds, so it can gate switching DARIA_MODEL_BACKEND.
+
+    python scripts/benchmark_onnx.py --chunks 512 --min-cosine 0.98 --min-label-agreement 0.95
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add parent directory to path so we can import daria_interview_tool
+sys.path.append(str(Path(__file__).parent.parent))
+
+from daria_interview_tool import onnx_backend
+from daria_interview_tool.emotion_batching import classify_emotions
+from daria_interview_tool.model_registry import (DEFAULT_EMOTION_MODEL, DEFAULT_SENTENCE_MODEL, get_emotion_pipeline,
+                                                 get_sentence_transformer, model_stats)
+from scripts.benchmark_emotions import load_chunks
+
+
+def load_stats(kind: str, backend: str):
+    for stats in model_stats():
+        if stats['kind'] == kind and stats['options'].get('backend', 'torch') == backend:
+            return stats
+    return {'load_seconds': 0.0, 'rss_mb': 0.0}
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def run(backend: str, texts, batch_size: int, sentence_model: str, emotion_model: str):
+    embedder = get_sentence_transformer(sentence_model, backend=backend)
+    classifier = get_emotion_pipeline(emotion_model, backend=backend)
+    # Warm-up, so session initialisation is not timed
+    embedder.encode(texts[:2])
+    classify_emotions(classifier, texts[:2])
+
+    embed_seconds, embeddings = timed(embedder.encode, texts, batch_size=batch_size)
+    emotion_seconds, emotions = timed(classify_emotions, classifier, texts, batch_size=batch_size)
+    rows = [
+        ('embeddings', load_stats('sentence_transformer', backend), embed_seconds),
+        ('emotions', load_stats('emotion_pipeline', backend), emotion_seconds),
+    ]
+    for model, stats, seconds in rows:
+        print(f"{backend:<8}{model:<12}{stats['load_seconds']:>8.2f}{stats['rss_mb']:>10.1f}"
+              f"{seconds:>10.2f}{len(texts) / seconds:>10.1f}")
+    return embeddings, emotions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="int8 ONNX vs torch: accuracy parity, latency and memory")
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--processed-dir", default="interviews/processed")
+    parser.add_argument("--sentence-model", default=DEFAULT_SENTENCE_MODEL)
+    parser.add_argument("--emotion-model", default=DEFAULT_EMOTION_MODEL)
+    parser.add_argument("--min-cosine", type=float, default=0.98, help="Lowest acceptable mean cosine agreement")
+    parser.add_argument("--min-label-agreement", type=float, default=0.95,
+                        help="Lowest acceptable share of identical emotion labels")
+    args = parser.parse_args()
+
+    if not onnx_backend.available():
+        print("optimum[onnxruntime] is not installed; nothing to compare")
+        return 2
+
+    texts = load_chunks(Path(args.processed_dir), args.chunks)
+    print(f"{len(texts)} chunks, mean {sum(len(t.split()) for t in texts) / len(texts):.0f} words")
+    print(f"{'backend':<8}{'model':<12}{'load s':>8}{'load MB':>10}{'seconds':>10}{'chunks/s':>10}")
+    reference = run('torch', texts, args.batch_size, args.sentence_model, args.emotion_model)
+    candidate = run('onnx', texts, args.batch_size, args.sentence_model, args.emotion_model)
+
+    cosine = onnx_backend.embedding_agreement(reference[0], candidate[0])
+    labels = onnx_backend.label_agreement(reference[1], candidate[1])
+    print(f"embedding cosine: mean {cosine['mean_cosine']:.4f}, 5th percentile {cosine['p05_cosine']:.4f}, "
+          f"min {cosine['min_cosine']:.4f}")
+    print(f"emotion labels agree: {labels:.1%}")
+
+    if cosine['mean_cosine'] < args.min_cosine or labels < args.min_label_agreement:
+        print("Parity check FAILED")
+        return 1
+    print("Parity check passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
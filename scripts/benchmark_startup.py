@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Cold-start time and memory of app.py.
+
+Runs `python -X importtime` on importing app and calling create_app() in a
+fresh process, a few times, and reports the median wall time, the peak RSS of
+the process, the slowest imports by cumulative time and any model library
+that got imported. Model libraries should only load on first use, so finding
+one fails the run (exit 1), as does going over --max-seconds or --max-rss-mb.
+With --record each run's figures are appended to a JSON lines file, to track
+startup across changes.
+
+    python scripts/benchmark_startup.py --runs 5 --top 15 --record .benchmarks/startup.jsonl
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Libraries app.py must not import until a request needs them
+HEAVY_MODULES = ('torch', 'transformers', 'sentence_transformers', 'faiss', 'sklearn', 'numpy', 'langchain',
+                 'langchain_openai', 'langchain_community', 'elevenlabs', 'MySQLdb', 'PIL', 'google.generativeai',
+                 'qdrant_client', 'onnxruntime')
+
+CHILD = """
+import resource, sys, time, json
+started = time.perf_counter()
+import {module}
+{module}.{factory}()
+seconds = time.perf_counter() - started
+# Peak RSS: KB on Linux, bytes on macOS
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'import_seconds': seconds, 'rss_mb': rss / (1024 * 1024), 'heavy_modules': heavy}}))
+"""
+
+IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(stderr: str):
+    """(module, self us, cumulative us, depth) for each line of -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            imports.append((match.group(4), int(match.group(1)), int(match.group(2)), depth))
+    return imports
+
+
+def run_once(module: str, factory: str):
+    env = dict(os.environ)
+    # create_app() refuses to start without a key; it makes no API calls
+    env.setdefault('OPENAI_API_KEY', 'startup-benchmark')
+    code = CHILD.format(module=module, factory=factory, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"Starting {module} failed:\n" + '\n'.join(errors[-20:]))
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+    stats['wall_seconds'] = wall_seconds
+    return stats, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time, RSS and slowest imports of app.py")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--factory", default="create_app")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+    parser.add_argument("--max-seconds", type=float, help="Fail if the median wall time is higher")
+    parser.add_argument("--max-rss-mb", type=float, help="Fail if the median peak RSS is higher")
+    parser.add_argument("--record", help="JSON lines file the results are appended to")
+    args = parser.parse_args()
+
+    runs = []
+    imports = []
+    for _ in range(args.runs):
+        try:
+            stats, imports = run_once(args.module, args.factory)
+        except RuntimeError as e:
+            print(str(e))
+            return 2
+        runs.append(stats)
+
+    wall = statistics.median(run['wall_seconds'] for run in runs)
+    in_process = statistics.median(run['import_seconds'] for run in runs)
+    rss = statistics.median(run['rss_mb'] for run in runs)
+    heavy = runs[-1]['heavy_modules']
+    print(f"{len(runs)} runs of {args.module}.{args.factory}()")
+    print(f"wall: {wall:.2f}s  (import and {args.factory}: {in_process:.2f}s)  peak RSS: {rss:.0f} MB")
+
+    # Slowest imports of the last run, by cumulative time at the top level
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, self_us, cumulative_us, _ in sorted((i for i in imports if i[3] == 0),
+                                                 key=lambda i: i[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    if args.record:
+        os.makedirs(os.path.dirname(args.record) or '.', exist_ok=True)
+        with open(args.record, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'date': datetime.now().isoformat(), 'module': args.module, 'runs': len(runs),
+                                'wall_seconds': round(wall, 3), 'import_seconds': round(in_process, 3),
+                                'rss_mb': round(rss, 1), 'heavy_modules': heavy}) + '\n')
+
+    failed = False
+    if heavy:
+        print(f"Model libraries imported at startup: {', '.join(heavy)}")
+        failed = True
+    if args.max_seconds is not None and wall > args.max_seconds:
+        print(f"Startup took {wall:.2f}s, over the {args.max_seconds:.2f}s limit")
+        failed = True
+    if args.max_rss_mb is not None and rss > args.max_rss_mb:
+        print(f"Peak RSS {rss:.0f} MB is over the {args.max_rss_mb:.0f} MB limit")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,116 +1,135 @@
 import os
 import json
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import sys
 from pathlib import Path
 import re
 import uuid
+import time
+import asyncio
+import hashlib
+import multiprocessing
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path so we can import semantic_analysis
 sys.path.append(str(Path(__file__).parent.parent))
 
-from semantic_analysis import SemanticAnalyzer, split_transcript_safe
+from semantic_analysis import SemanticAnalyzer, chunk_analysis
+from daria_interview_tool.emotion_batching import DEFAULT_BATCH_SIZE, emotion_text
+from daria_interview_tool.llm_cache import get_llm_cache
+from daria_interview_tool.model_registry import DEFAULT_EMOTION_MODEL, resolve_backend
+from daria_interview_tool.theme_extraction import DEFAULT_MODEL as THEME_MODEL, PROMPT_VERSION
+from daria_interview_tool.transcript_splitter import DEFAULT_OVERLAP_TOKENS, TranscriptSplitter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bump when chunking changes; together with the models and prompt version it
+# decides whether an earlier analysis of an unchanged transcript is still current
+CHUNKING_VERSION = 2
+# The int8 ONNX emotion model can label a few chunks differently from the torch one
+MODEL_BACKEND = resolve_backend()
+EMOTION_MODEL_VERSION = DEFAULT_EMOTION_MODEL if MODEL_BACKEND == 'torch' else f"{DEFAULT_EMOTION_MODEL}+{MODEL_BACKEND}-int8"
+ANALYSIS_VERSION = (f"chunking-{CHUNKING_VERSION}-overlap-{DEFAULT_OVERLAP_TOKENS}/{EMOTION_MODEL_VERSION}/"
+                    f"{THEME_MODEL}/prompt-{PROMPT_VERSION}")
+MANIFEST_NAME = '.manifest.json'
+
 class TranscriptProcessor:
-    def __init__(self):
-        """Initialize the transcript processor with semantic analyzer."""
-        self.semantic_analyzer = SemanticAnalyzer()
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, load_models: bool = True):
+        """Initialize the transcript processor with semantic analyzer.
+
+        Args:
+            batch_size: Chunks per emotion model batch
+            load_models: Create the SemanticAnalyzer (not needed for a dry run)
+        """
+        self.semantic_analyzer = SemanticAnalyzer() if load_models else None
+        # Chunks are sized in tokens of the emotion model's tokenizer when it is loaded
+        self.splitter = self.semantic_analyzer.chunk_splitter() if load_models else TranscriptSplitter()
+        self.batch_size = batch_size
         self.raw_dir = "interviews/raw"
         self.processed_dir = "interviews/processed"
+        self.analysis_version = ANALYSIS_VERSION
         
         # Ensure processed directory exists
         os.makedirs(self.processed_dir, exist_ok=True)
+        self.manifest = TranscriptManifest(os.path.join(self.processed_dir, MANIFEST_NAME))
 
-    def parse_transcript(self, transcript_text: str) -> List[Dict[str, Any]]:
-        """Parse transcript text into a list of entries."""
-        # Split transcript into entries based on timestamp pattern
+    def parse_entries(self, transcript_text: str) -> List[Tuple[Dict[str, Any], int, int]]:
+        """Parse transcript text into entries, each with the offsets of its text in the transcript."""
         entries = []
         
         # Pattern matches "[Name] HH:MM:SS" followed by text
         pattern = r'\[(.*?)\]\s+(\d{2}:\d{2}:\d{2})\n(.*?)(?=\n\[|$)'
-        matches = re.finditer(pattern, transcript_text, re.DOTALL)
-        
-        for match in matches:
-            speaker = match.group(1).strip()
-            timestamp = match.group(2).strip()
-            text = match.group(3).strip()
+        for match in re.finditer(pattern, transcript_text, re.DOTALL):
+            raw_text = match.group(3)
+            text = raw_text.strip()
+            start = match.start(3) + len(raw_text) - len(raw_text.lstrip())
             
-            entries.append({
-                'speaker': speaker,
-                'timestamp': timestamp,
+            entries.append(({
+                'speaker': match.group(1).strip(),
+                'timestamp': match.group(2).strip(),
                 'text': text
-            })
+            }, start, start + len(text)))
         
         return entries
 
+    def parse_transcript(self, transcript_text: str) -> List[Dict[str, Any]]:
+        """Parse transcript text into a list of entries."""
+        return [entry for entry, _, _ in self.parse_entries(transcript_text)]
+
     def chunk_transcript(self, transcript: str) -> List[Dict[str, Any]]:
-        """Split transcript into safe-sized chunks while preserving chronological order."""
-        # First parse the transcript string into entries
+        """Split transcript into safe-sized chunks while preserving chronological order.
+
+        Entries are assigned to the chunk whose span in the transcript contains
+        them, in a single pass over entries and the chunks streamed by the
+        splitter (both in document order). With overlap, an entry belongs to
+        the first chunk containing it.
+        """
         logger.info("Parsing transcript into entries...")
-        entries = self.parse_transcript(transcript)
+        entries = self.parse_entries(transcript)
         logger.info(f"Found {len(entries)} entries in the transcript")
         
-        # Sort entries by timestamp to ensure chronological order
-        entries.sort(key=lambda x: x['timestamp'])
-        
-        # Now split into safe chunks, making sure each chunk doesn't exceed token limits
-        safe_chunks = split_transcript_safe(transcript, max_length=350)
-        logger.info(f"Split transcript into {len(safe_chunks)} safe chunks")
-        
+        # Chunks come from the splitter one at a time, each within the model's token limit
         chunks = []
-        remaining_entries = entries.copy()
-        
-        # For each safe chunk, find all entries that belong to it
-        for chunk_text in safe_chunks:
+        next_entry = 0
+        for chunk_text, chunk_start, chunk_end in self.splitter.split(transcript):
+            # Entries starting before this chunk straddle a chunk boundary and belong to no chunk
+            while next_entry < len(entries) and entries[next_entry][1] < chunk_start:
+                next_entry += 1
             chunk_entries = []
-            chunk_start_idx = None
+            while next_entry < len(entries) and entries[next_entry][2] <= chunk_end:
+                chunk_entries.append(entries[next_entry][0])
+                next_entry += 1
             
-            # Find entries that belong to this chunk
-            for i, entry in enumerate(remaining_entries):
-                # Check if entry text is in this chunk
-                if entry['text'] in chunk_text:
-                    if chunk_start_idx is None:
-                        chunk_start_idx = i
-                    chunk_entries.append(entry)
-                elif chunk_entries:  # If we've found entries but this one isn't in the chunk
-                    break  # Stop looking as we've gone past the chunk's entries
-            
-            # If we found entries, remove them from remaining entries
             if chunk_entries:
-                remaining_entries = remaining_entries[chunk_start_idx + len(chunk_entries):]
-                
                 chunks.append({
                     'entries': chunk_entries,
                     'combined_text': chunk_text,
                     'timestamp': chunk_entries[0]['timestamp']  # Use first entry's timestamp
                 })
-            else:
+            elif chunk_text.strip():
                 # If no entries found but chunk has content, try to extract timestamp
-                if chunk_text.strip():
-                    # Look for timestamp in the chunk text
-                    time_match = re.search(r'\d{2}:\d{2}:\d{2}', chunk_text)
-                    timestamp = time_match.group(0) if time_match else None
-                    
-                    # Look for speaker information
-                    speaker_match = re.search(r'\[(.*?)\]', chunk_text)
-                    speaker = speaker_match.group(1) if speaker_match else "Unknown"
-                    
-                    # If we found a timestamp, create an entry
-                    if timestamp:
-                        chunks.append({
-                            'entries': [{
-                                'speaker': speaker,
-                                'timestamp': timestamp,
-                                'text': chunk_text.strip()
-                            }],
-                            'combined_text': chunk_text,
-                            'timestamp': timestamp
-                        })
+                time_match = re.search(r'\d{2}:\d{2}:\d{2}', chunk_text)
+                timestamp = time_match.group(0) if time_match else None
+                
+                # Look for speaker information
+                speaker_match = re.search(r'\[(.*?)\]', chunk_text)
+                speaker = speaker_match.group(1) if speaker_match else "Unknown"
+                
+                # If we found a timestamp, create an entry
+                if timestamp:
+                    chunks.append({
+                        'entries': [{
+                            'speaker': speaker,
+                            'timestamp': timestamp,
+                            'text': chunk_text.strip()
+                        }],
+                        'combined_text': chunk_text,
+                        'timestamp': timestamp
+                    })
         
         # Sort final chunks by timestamp
         chunks.sort(key=lambda x: x['timestamp'])
@@ -118,122 +137,565 @@ class TranscriptProcessor:
         logger.info(f"Created {len(chunks)} chunks with chronological ordering")
         return chunks
 
-    def process_interview(self, file_path: str) -> Dict[str, Any]:
-        """Process a single interview file."""
-        try:
-            # Read raw interview
-            with open(file_path, 'r') as f:
-                interview = json.load(f)
+    def load_raw(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """Read a raw interview; None if it has no transcript."""
+        with open(file_path, 'r') as f:
+            interview = json.load(f)
+        if not interview.get('transcript'):
+            logger.warning(f"No transcript found in {file_path}")
+            return None
+        return interview
+
+    def prepare_chunks(self, transcript: str) -> List[Tuple[Dict[str, Any], str]]:
+        """(chunk, text) pairs to analyze, splitting chunks that are still too long."""
+        chunks = self.chunk_transcript(transcript)
+        pending = []
+        for i, chunk in enumerate(chunks):
+            combined_text = chunk['combined_text']
             
-            # Extract transcript
-            transcript = interview.get('transcript')
-            if not transcript:
-                logger.warning(f"No transcript found in {file_path}")
-                return None
+            # Skip empty chunks
+            if not combined_text.strip():
+                logger.warning(f"Skipping empty chunk {i+1}")
+                continue
+            
+            # Check token length
+            token_count = self.splitter.count(combined_text)
+            if token_count > self.splitter.max_tokens:
+                logger.warning(f"Chunk {i+1} still has {token_count} tokens, which might be too long. Splitting further.")
+                # Use same entries for all sub-chunks
+                for sub_text in self.splitter.split_texts(combined_text):
+                    pending.append((chunk, sub_text))
+            else:
+                pending.append((chunk, combined_text))
+        return pending
+
+    def build_processed(self, interview: Dict[str, Any], file_path: str,
+                        pending: List[Tuple[Dict[str, Any], str]], analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Processed version of an interview from its chunks and their analyses."""
+        analyzed_chunks = []
+        for (chunk, text), analysis in zip(pending, analyses):
+            analyzed_chunks.append({
+                'entries': chunk['entries'],
+                'combined_text': text,
+                'analysis': analysis,
+                'id': str(uuid.uuid4()),  # Generate unique ID
+                'timestamp': chunk['entries'][0]['timestamp'] if chunk['entries'] else "00:00:00"
+            })
+        
+        return {
+            'id': interview.get('id', Path(file_path).stem),
+            'metadata': {
+                'interviewee': interview.get('metadata', {}).get('interviewee', {}),
+                'researcher': interview.get('metadata', {}).get('researcher', {}),
+                'project': {
+                    'name': interview.get('project_name'),
+                    'type': interview.get('interview_type'),
+                    'description': interview.get('project_description')
+                },
+                'date': interview.get('date'),
+                'duration': interview.get('duration'),
+                'format': interview.get('format'),
+                'language': interview.get('language')
+            },
+            'chunks': analyzed_chunks
+        }
+
+    def output_path(self, file_path: str) -> str:
+        return os.path.join(self.processed_dir, os.path.basename(file_path))
+
+    def write_processed(self, file_path: str, processed_interview: Dict[str, Any]) -> str:
+        """Save the processed version; written to a temporary file first so a crash never leaves half a file."""
+        output_path = self.output_path(file_path)
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(processed_interview, f, indent=2)
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    def analyze_file(self, file_path: str) -> Dict[str, Any]:
+        """Process a single interview file without touching the manifest.
+
+        Returns:
+            Dict: Outcome with file_path, status ('processed', 'no_transcript',
+            'analysis_failed' or 'failed'), output, chunks, processed
+            (the processed interview) and error
+        """
+        outcome = {'file_path': file_path, 'status': 'failed', 'output': None, 'chunks': 0,
+                   'processed': None, 'error': None}
+        try:
+            interview = self.load_raw(file_path)
+            if interview is None:
+                outcome['status'] = 'no_transcript'
+                return outcome
             
             # Chunk transcript using safe chunking
             logger.info(f"Processing transcript from {file_path}...")
-            chunks = self.chunk_transcript(transcript)
+            pending = self.prepare_chunks(interview['transcript'])
             
-            # Analyze each chunk
-            analyzed_chunks = []
-            for i, chunk in enumerate(chunks):
-                logger.info(f"Analyzing chunk {i+1} of {len(chunks)}...")
-                combined_text = chunk['combined_text']
-                
-                # Skip empty chunks
-                if not combined_text.strip():
-                    logger.warning(f"Skipping empty chunk {i+1}")
-                    continue
-                
-                # Check token length
-                token_count = len(combined_text.split())
-                if token_count > 500:
-                    logger.warning(f"Chunk {i+1} still has {token_count} tokens, which might be too long. Splitting further.")
-                    # Split further if needed
-                    sub_chunks = split_transcript_safe(combined_text, max_length=250)
-                    for j, sub_text in enumerate(sub_chunks):
-                        try:
-                            logger.info(f"Analyzing sub-chunk {j+1} of {len(sub_chunks)} from chunk {i+1}...")
-                            sub_analysis = self.semantic_analyzer.analyze_chunk(sub_text)
-                            analyzed_chunks.append({
-                                'entries': chunk['entries'],  # Use same entries for all sub-chunks
-                                'combined_text': sub_text,
-                                'analysis': sub_analysis,
-                                'id': str(uuid.uuid4()),  # Generate unique ID
-                                'timestamp': chunk['entries'][0]['timestamp'] if chunk['entries'] else "00:00:00"
-                            })
-                        except Exception as e:
-                            logger.error(f"Error analyzing sub-chunk {j+1} of chunk {i+1}: {str(e)}")
-                            # Continue with next sub-chunk
-                else:
-                    # Normal analysis for appropriately sized chunks
-                    try:
-                        analysis = self.semantic_analyzer.analyze_chunk(combined_text)
-                        analyzed_chunks.append({
-                            'entries': chunk['entries'],
-                            'combined_text': combined_text,
-                            'analysis': analysis,
-                            'id': str(uuid.uuid4()),  # Generate unique ID
-                            'timestamp': chunk['entries'][0]['timestamp'] if chunk['entries'] else "00:00:00"
-                        })
-                    except Exception as e:
-                        logger.error(f"Error analyzing chunk {i+1}: {str(e)}")
-                        # Continue with next chunk
-            
-            # Create processed version
-            processed_interview = {
-                'id': interview.get('id', Path(file_path).stem),
-                'metadata': {
-                    'interviewee': interview.get('metadata', {}).get('interviewee', {}),
-                    'researcher': interview.get('metadata', {}).get('researcher', {}),
-                    'project': {
-                        'name': interview.get('project_name'),
-                        'type': interview.get('interview_type'),
-                        'description': interview.get('project_description')
-                    },
-                    'date': interview.get('date'),
-                    'duration': interview.get('duration'),
-                    'format': interview.get('format'),
-                    'language': interview.get('language')
-                },
-                'chunks': analyzed_chunks
-            }
+            # Emotions are classified for all chunks together, in padded batches
+            logger.info(f"Analyzing {len(pending)} chunks in batches of {self.batch_size}...")
+            outcome['status'] = 'processed'
+            try:
+                analyses = self.semantic_analyzer.analyze_chunks_batch(
+                    [text for _, text in pending], batch_size=self.batch_size
+                )
+            except Exception as e:
+                logger.error(f"Error analyzing chunks of {file_path}: {str(e)}")
+                analyses = []
+                outcome['status'] = 'analysis_failed'
+                outcome['error'] = str(e)
             
-            # Save processed version
-            output_path = os.path.join(
-                self.processed_dir,
-                os.path.basename(file_path)
-            )
-            with open(output_path, 'w') as f:
-                json.dump(processed_interview, f, indent=2)
+            processed_interview = self.build_processed(interview, file_path, pending, analyses)
+            output_path = self.write_processed(file_path, processed_interview)
+            outcome.update(output=output_path, chunks=len(analyses), processed=processed_interview)
             
             logger.info(f"Successfully processed {file_path} -> {output_path}")
-            return processed_interview
             
         except Exception as e:
+            logger.error(f"Error processing {file_path}: {str(e)}")
+            outcome.update(status='failed', error=str(e))
+        return outcome
+
+    def record_outcome(self, outcome: Dict[str, Any], sha256: str) -> None:
+        """Record an analyze_file outcome in the manifest.
+
+        A failed analysis is left out so the next run retries it.
+        """
+        if outcome['status'] in ('processed', 'no_transcript'):
+            self.manifest.record(outcome['file_path'], sha256, self.analysis_version, outcome['output'],
+                                 outcome['chunks'])
+
+    def process_interview(self, file_path: str, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Process a single interview file and record it in the manifest.
+
+        Args:
+            file_path: Raw interview file
+            sha256: Content hash of the file, if already computed
+        """
+        try:
+            sha256 = sha256 or content_hash(file_path)
+        except OSError as e:
             logger.error(f"Error processing {file_path}: {str(e)}")
             return None
+        outcome = self.analyze_file(file_path)
+        self.record_outcome(outcome, sha256)
+        return outcome['processed']
 
-    def process_all(self):
-        """Process all raw interview files."""
-        # Get all JSON files in raw directory
-        raw_files = [
+    def raw_files(self) -> List[str]:
+        """All JSON files in the raw directory."""
+        return sorted(
             os.path.join(self.raw_dir, f)
             for f in os.listdir(self.raw_dir)
             if f.endswith('.json')
-        ]
+        )
+
+    def plan(self, raw_files: List[str], force: bool = False) -> List[Dict[str, Any]]:
+        """Raw files that need processing, each with its content hash and the reason.
+
+        Reasons are 'new', 'changed' (content hash differs), 'stale' (analyzed
+        with another analysis version), 'missing output' and 'forced'.
+        """
+        planned = []
+        for file_path in raw_files:
+            sha256 = content_hash(file_path)
+            reason = 'forced' if force else self.manifest.reason(file_path, sha256, self.analysis_version)
+            if reason:
+                planned.append({'file_path': file_path, 'sha256': sha256, 'reason': reason})
+        return planned
+
+    def process_all(self, pipelined: bool = True, llm_concurrency: int = 4, queue_size: int = 4,
+                    force: bool = False, dry_run: bool = False, workers: int = 1) -> Dict[str, Any]:
+        """Process the raw interview files that are new, changed or stale.
+
+        Args:
+            pipelined: Overlap the stages of different files with TranscriptPipeline
+            llm_concurrency: Theme extraction requests in flight (pipelined only)
+            queue_size: Files waiting between two stages (pipelined only)
+            force: Reprocess every file regardless of the manifest
+            dry_run: Only report what would be processed
+            workers: Processes to spread the files over (see _process_parallel)
+
+        Returns:
+            Dict: Run report (see format_report)
+        """
+        raw_files = self.raw_files()
+        planned = self.plan(raw_files, force=force)
+        logger.info(f"Found {len(raw_files)} raw interview files, {len(planned)} to process")
         
-        logger.info(f"Found {len(raw_files)} raw interview files")
+        if dry_run:
+            report = new_report(len(raw_files))
+            report['dry_run'] = True
+            report['unchanged'] = len(raw_files) - len(planned)
+            report['plan'] = [{'file_path': job['file_path'], 'reason': job['reason']} for job in planned]
+            return report
         
-        # Process each file
-        processed = 0
-        for file_path in raw_files:
-            if self.process_interview(file_path):
-                processed += 1
+        if workers > 1:
+            report = self._process_parallel(planned, workers)
+        elif pipelined:
+            pipeline = TranscriptPipeline(self, llm_concurrency=llm_concurrency, queue_size=queue_size)
+            report = asyncio.run(pipeline.run(planned))
+        else:
+            report = new_report(len(planned))
+            started = time.perf_counter()
+            for job in planned:
+                outcome = self.analyze_file(job['file_path'])
+                self.record_outcome(outcome, job['sha256'])
+                add_outcome(report, outcome)
+            report['seconds'] = time.perf_counter() - started
         
-        logger.info(f"Successfully processed {processed} out of {len(raw_files)} interviews")
+        report['files'] = len(raw_files)
+        report['unchanged'] = len(raw_files) - len(planned)
+        logger.info(f"Successfully processed {report['processed']} out of {len(planned)} interviews")
+        return report
+
+    @staticmethod
+    def processor_factory(batch_size: int) -> 'TranscriptProcessor':
+        """Builds the processor of each pool worker; must be picklable by reference."""
+        return TranscriptProcessor(batch_size=batch_size)
+
+    def _process_parallel(self, planned: List[Dict[str, Any]], workers: int) -> Dict[str, Any]:
+        """Process planned files in a pool of `workers` processes.
+
+        Each worker loads the models once in its initializer and limits torch
+        to its share of the cores. Files are handed out one at a time, so a
+        long interview does not hold up a whole shard. Workers do not touch the
+        manifest; the parent records every outcome as it arrives and merges
+        results, errors and timings into one report.
+        """
+        report = new_report(len(planned))
+        report['workers'] = {}
+        started = time.perf_counter()
+        hashes = {job['file_path']: job['sha256'] for job in planned}
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        context = multiprocessing.get_context('spawn')
+        with context.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(self.processor_factory, self.raw_dir, self.processed_dir, self.batch_size, threads)
+        ) as pool:
+            for outcome in pool.imap_unordered(_process_in_worker, [job['file_path'] for job in planned]):
+                self.record_outcome(outcome, hashes[outcome['file_path']])
+                add_outcome(report, outcome)
+                stats = report['workers'].setdefault(outcome['worker'], {
+                    'files': 0, 'chunks': 0, 'busy_seconds': 0.0, 'load_seconds': outcome['load_seconds']
+                })
+                stats['files'] += 1
+                stats['chunks'] += outcome['chunks']
+                stats['busy_seconds'] += outcome['seconds']
+                logger.info(f"[worker {outcome['worker']}] {outcome['status']}: {outcome['file_path']} "
+                            f"({sum(w['files'] for w in report['workers'].values())}/{len(planned)})")
+        report['seconds'] = time.perf_counter() - started
+        return report
+
+
+# Per-process state of pool workers, set by _init_worker
+_worker_processor = None
+_worker_load_seconds = 0.0
+# Why the worker could not build its processor; a Pool would respawn a worker whose initializer raises
+_worker_error = None
+
+
+def _init_worker(processor_factory, raw_dir: str, processed_dir: str, batch_size: int, threads: int) -> None:
+    """Pool initializer: cap intra-op threads, then load the models once for this worker.
+
+    Never raises: Pool replaces a worker whose initializer fails, forever, so
+    the error is kept and every file handed to this worker fails with it.
+    """
+    global _worker_processor, _worker_load_seconds, _worker_error
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[name] = str(threads)
+    # Workers are already parallel; tokenizer threads would only oversubscribe
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    started = time.perf_counter()
+    try:
+        _worker_processor = processor_factory(batch_size)
+        _worker_processor.raw_dir = raw_dir
+        _worker_processor.processed_dir = processed_dir
+    except Exception as e:
+        logger.error(f"Error starting worker {os.getpid()}: {str(e)}")
+        _worker_processor = None
+        _worker_error = f"Worker failed to start: {str(e)}"
+    _worker_load_seconds = time.perf_counter() - started
+
+
+def _process_in_worker(file_path: str) -> Dict[str, Any]:
+    started = time.perf_counter()
+    if _worker_processor is None:
+        outcome = {'file_path': file_path, 'status': 'failed', 'output': None, 'chunks': 0, 'error': _worker_error}
+    else:
+        outcome = _worker_processor.analyze_file(file_path)
+    outcome.pop('processed', None)  # The parent only needs the outcome, not the data
+    outcome.update(worker=os.getpid(), seconds=time.perf_counter() - started, load_seconds=_worker_load_seconds)
+    return outcome
+
+
+def add_outcome(report: Dict[str, Any], outcome: Dict[str, Any]) -> None:
+    """Count an analyze_file outcome in a run report."""
+    if outcome['status'] == 'processed':
+        report['processed'] += 1
+        report['chunks'] += outcome['chunks']
+    elif outcome['status'] == 'no_transcript':
+        report['no_transcript'] += 1
+    else:
+        report['failed'].append(outcome['file_path'])
+        if outcome.get('error'):
+            report.setdefault('errors', {})[outcome['file_path']] = outcome['error']
+
+
+def content_hash(file_path: str) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def new_report(files: int) -> Dict[str, Any]:
+    return {
+        'files': files,
+        'processed': 0,
+        'unchanged': 0,
+        'no_transcript': 0,
+        'failed': [],
+        'chunks': 0,
+        'seconds': 0.0,
+        'stage_seconds': {},
+        'dry_run': False,
+        'plan': []
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Progress and throughput summary of a processing run, or the plan of a dry run."""
+    if report['dry_run']:
+        lines = [f"Would process {len(report['plan'])} of {report['files']} files "
+                 f"({report['unchanged']} unchanged):"]
+        lines.extend(f"  {job['file_path']}: {job['reason']}" for job in report['plan'])
+        return "\n".join(lines)
+    seconds = max(report['seconds'], 1e-9)
+    lines = [
+        f"Files: {report['files']} total, {report['processed']} processed, {report['unchanged']} unchanged, "
+        f"{report['no_transcript']} without transcript, {len(report['failed'])} failed",
+        f"Chunks: {report['chunks']} in {report['seconds']:.1f}s "
+        f"({report['processed'] / seconds:.2f} files/s, {report['chunks'] / seconds:.1f} chunks/s)"
+    ]
+    if report['stage_seconds']:
+        lines.append("Stage busy time: " + ", ".join(
+            f"{stage} {busy:.1f}s" for stage, busy in report['stage_seconds'].items()
+        ))
+    for worker, stats in sorted(report.get('workers', {}).items()):
+        lines.append(f"Worker {worker}: {stats['files']} files, {stats['chunks']} chunks, "
+                     f"{stats['busy_seconds']:.1f}s busy, models loaded in {stats['load_seconds']:.1f}s")
+    errors = report.get('errors', {})
+    lines.extend(f"Failed: {file_path}" + (f" ({errors[file_path]})" if file_path in errors else "")
+                 for file_path in report['failed'])
+    return "\n".join(lines)
+
+
+class TranscriptManifest:
+    """Content hash, analysis version and output of every processed raw file.
+
+    The manifest is rewritten (atomically) after every file, so a run
+    interrupted by a crash resumes with the files it had not finished.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f).get('files', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            logger.error(f"Error reading manifest {path}, reprocessing everything: {str(e)}")
+
+    def reason(self, file_path: str, sha256: str, analysis_version: str) -> Optional[str]:
+        """Why file_path needs processing, or None if its recorded output is current."""
+        entry = self.entries.get(os.path.basename(file_path))
+        if entry is None:
+            return 'new'
+        if entry.get('sha256') != sha256:
+            return 'changed'
+        if entry.get('analysis_version') != analysis_version:
+            return 'stale'
+        if entry.get('output') and not os.path.exists(entry['output']):
+            return 'missing output'
+        return None
+
+    def record(self, file_path: str, sha256: str, analysis_version: str, output: Optional[str],
+               chunks: int) -> None:
+        self.entries[os.path.basename(file_path)] = {
+            'sha256': sha256,
+            'analysis_version': analysis_version,
+            'output': output,
+            'chunks': chunks,
+            'processed_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'files': self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+class TranscriptPipeline:
+    """Processes many interviews with their stages overlapping.
+
+    parse -> chunk -> emotions (one CPU thread) -> themes (up to
+    llm_concurrency chat requests) -> write
+
+    Stages are connected by bounded queues, so a slow stage holds back the
+    ones feeding it instead of letting parsed transcripts pile up in memory.
+    Each finished file is recorded in the processor's manifest right away, so
+    a rerun after a crash skips it.
+    """
+
+    def __init__(self, processor: TranscriptProcessor, llm_concurrency: int = 4, queue_size: int = 4):
+        self.processor = processor
+        self.analyzer = processor.semantic_analyzer
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.queue_size = max(1, queue_size)
+        self.report = new_report(0)
+
+    async def _stage(self, name: str, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue], handle,
+                     workers: int = 1) -> None:
+        """Run handle on every job from inbox with `workers` tasks, passing results on to outbox.
+
+        A None job marks the end of the input; a handler returning None drops the job.
+        """
+        self.report['stage_seconds'].setdefault(name, 0.0)
+
+        async def worker():
+            while True:
+                job = await inbox.get()
+                if job is None:
+                    await inbox.put(None)  # Let the other workers of this stage see it
+                    return
+                started = time.perf_counter()
+                try:
+                    result = await handle(job)
+                except Exception as e:
+                    logger.error(f"Error in {name} stage for {job['file_path']}: {str(e)}")
+                    self.report['failed'].append(job['file_path'])
+                    result = None
+                self.report['stage_seconds'][name] += time.perf_counter() - started
+                if result is not None and outbox is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if outbox is not None:
+            await outbox.put(None)
+
+    async def run(self, jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Process planned jobs (file_path and sha256, see TranscriptProcessor.plan); returns the run report."""
+        loop = asyncio.get_running_loop()
+        cpu_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='emotions')
+        llm_executor = ThreadPoolExecutor(max_workers=self.llm_concurrency, thread_name_prefix='themes')
+        processor = self.processor
+        extractor = self.analyzer.theme_extractor
+        self.report = new_report(len(jobs))
+        started = time.perf_counter()
+
+        async def parse(job):
+            job['interview'] = await loop.run_in_executor(None, processor.load_raw, job['file_path'])
+            if job['interview'] is None:
+                processor.manifest.record(job['file_path'], job['sha256'], processor.analysis_version, None, 0)
+                self.report['no_transcript'] += 1
+                return None
+            return job
+
+        async def chunk(job):
+            job['pending'] = await loop.run_in_executor(None, processor.prepare_chunks, job['interview']['transcript'])
+            job['texts'] = [text for _, text in job['pending']]
+            return job
+
+        async def emotions(job):
+            job['emotions'] = await loop.run_in_executor(
+                cpu_executor, self.analyzer.analyze_emotions_batch,
+                [emotion_text(text) for text in job['texts']], processor.batch_size
+            )
+            return job
+
+        async def themes(job):
+            texts = job['texts']
+            packs = await asyncio.gather(*(
+                loop.run_in_executor(llm_executor, extractor.extract_batch, texts[start:end])
+                for start, end in extractor.batches(texts)
+            ))
+            job['themes'] = [analysis for pack in packs for analysis in pack]
+            return job
+
+        async def write(job):
+            analyses = [chunk_analysis(text, emotion, analysis)
+                        for text, emotion, analysis in zip(job['texts'], job['emotions'], job['themes'])]
+            processed = processor.build_processed(job['interview'], job['file_path'], job['pending'], analyses)
+            output_path = await loop.run_in_executor(None, processor.write_processed, job['file_path'], processed)
+            processor.manifest.record(job['file_path'], job['sha256'], processor.analysis_version,
+                                      output_path, len(analyses))
+            self.report['processed'] += 1
+            self.report['chunks'] += len(analyses)
+            logger.info(f"Processed {job['file_path']} -> {output_path} "
+                        f"({self.report['processed']}/{len(jobs)})")
+            return None
+
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(5)]
+
+        async def produce():
+            for job in jobs:
+                await queues[0].put({'file_path': job['file_path'], 'sha256': job['sha256']})
+            await queues[0].put(None)
+
+        try:
+            await asyncio.gather(
+                produce(),
+                self._stage('parse', queues[0], queues[1], parse),
+                self._stage('chunk', queues[1], queues[2], chunk),
+                self._stage('emotions', queues[2], queues[3], emotions),
+                # Several files in flight, so small interviews keep the LLM requests busy
+                self._stage('themes', queues[3], queues[4], themes, workers=self.llm_concurrency),
+                self._stage('write', queues[4], None, write)
+            )
+        finally:
+            cpu_executor.shutdown(wait=False)
+            llm_executor.shutdown(wait=False)
+
+        self.report['seconds'] = time.perf_counter() - started
+        return self.report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk and analyze the raw interviews into interviews/processed")
+    parser.add_argument("--sequential", action="store_true", help="Process one file after another")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Theme extraction requests in flight")
+    parser.add_argument("--queue-size", type=int, default=4, help="Files waiting between pipeline stages")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Chunks per emotion model batch")
+    parser.add_argument("--force", action="store_true", help="Reprocess every file, even if unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the files that would be processed")
+    parser.add_argument("--workers", type=int, default=1, help="Processes for large backfills, each with its own models")
+    args = parser.parse_args()
+
+    # With --workers the models are loaded by the worker processes only
+    processor = TranscriptProcessor(batch_size=args.batch_size, load_models=not args.dry_run and args.workers <= 1)
+    report = processor.process_all(
+        pipelined=not args.sequential,
+        llm_concurrency=args.llm_concurrency,
+        queue_size=args.queue_size,
+        force=args.force,
+        dry_run=args.dry_run,
+        workers=args.workers
+    )
+    print(format_report(report))
+    cache = get_llm_cache()
+    if cache is not None and processor.semantic_analyzer is not None:
+        stats = cache.stats()
+        print(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%})")
+    return 1 if report['failed'] else 0
 
 if __name__ == '__main__':
-    processor = TranscriptProcessor()
-    processor.process_all() 
\ No newline at end of file
+    sys.exit(main())
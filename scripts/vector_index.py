@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Train, rebuild and tune the approximate index of a saved InterviewVectorStore.
+
+The exact flat index is always kept next to the approximate one, so switching
+back to 'flat' or retraining never needs the interviews re-embedded.
+
+Examples:
+    python scripts/vector_index.py --store vector_store train --kind hnsw
+    python scripts/vector_index.py --store vector_store train --kind ivfpq --nlist 64
+    python scripts/vector_index.py --store vector_store tune --nprobe 16
+    python scripts/vector_index.py --store vector_store rebuild
+    python scripts/vector_index.py --store vector_store info
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from pathlib import Path
+
+# Add parent directory to path so we can import daria_interview_tool
+sys.path.append(str(Path(__file__).parent.parent))
+
+from daria_interview_tool.id_index import ANN_KINDS, IdMappedIndex
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def store_paths(store: str):
+    """(index file, metadata file) of a store directory or daria-style index file."""
+    if os.path.isdir(store):
+        return os.path.join(store, 'index.faiss'), os.path.join(store, 'metadata.json')
+    return store, f"{store}_metadata.json"
+
+
+def load(store: str):
+    index_path, metadata_path = store_paths(store)
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(f"Vector index not found at {index_path}")
+    metadata = {}
+    if os.path.exists(metadata_path):
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+    return IdMappedIndex.read(index_path, metadata), metadata, index_path, metadata_path
+
+
+def save(index: IdMappedIndex, metadata: dict, index_path: str, metadata_path: str) -> None:
+    index.write(index_path)
+    metadata['id_table'] = index.table()
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+
+def describe(index: IdMappedIndex) -> str:
+    ann = index.table()['ann']
+    return (f"{len(index)} vectors (d={index.dimension}), index={ann['kind']}, "
+            f"params={ann.get('params', {})}, search={ann.get('search', {})}, "
+            f"tombstones={ann.get('tombstones', 0)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the approximate index of an interview vector store")
+    parser.add_argument("--store", default="vector_store",
+                        help="Store directory (index.faiss + metadata.json) or index file (+ _metadata.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train = commands.add_parser("train", help="Build the approximate index from the stored vectors")
+    train.add_argument("--kind", choices=ANN_KINDS, required=True)
+    train.add_argument("--nlist", type=int, help="IVF-PQ: number of inverted lists")
+    train.add_argument("--m", type=int, help="IVF-PQ: number of PQ sub-quantizers")
+    train.add_argument("--nbits", type=int, help="IVF-PQ: bits per sub-quantizer code")
+    train.add_argument("--hnsw-m", type=int, help="HNSW: neighbours per node")
+    train.add_argument("--ef-construction", type=int, help="HNSW: build-time beam width")
+
+    commands.add_parser("rebuild", help="Retrain with the saved configuration (e.g. after many deletes)")
+
+    tune = commands.add_parser("tune", help="Set query-time parameters")
+    tune.add_argument("--nprobe", type=int, help="IVF-PQ: inverted lists visited per query")
+    tune.add_argument("--ef-search", type=int, help="HNSW: search beam width")
+
+    commands.add_parser("info", help="Show the index configuration")
+    args = parser.parse_args()
+
+    try:
+        index, metadata, index_path, metadata_path = load(args.store)
+    except Exception as e:
+        logger.error(f"Error loading vector store {args.store}: {str(e)}")
+        return 1
+
+    if args.command == "info":
+        print(describe(index))
+        return 0
+
+    if args.command == "train":
+        params = {
+            key: value for key, value in (
+                ('nlist', args.nlist), ('m', args.m), ('nbits', args.nbits),
+                ('hnsw_m', args.hnsw_m), ('ef_construction', args.ef_construction)
+            ) if value is not None
+        }
+        index.train(args.kind, params)
+    elif args.command == "rebuild":
+        index.rebuild()
+    elif args.command == "tune":
+        index.tune(nprobe=args.nprobe, ef_search=args.ef_search)
+
+    save(index, metadata, index_path, metadata_path)
+    print(describe(index))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_content(chunk: Dict) -> str:
+    """Return the searchable text of a processed chunk."""
+    return chunk.get('content') or chunk.get('text') or chunk.get('combined_text', '')
+
+
+def file_fingerprint(file_path: str) -> List[int]:
+    """Cheap change marker for a file: [mtime_ns, size]."""
+    stat = os.stat(file_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class ChunkEmbeddingIndex:
+    """Persistent chunk embedding matrix for processed interviews.
+
+    Every chunk is embedded once when its interview is ingested. The vectors
+    live in a float32 ``embeddings.npy`` that is memory-mapped for queries, and
+    ``chunks.json`` maps each matrix row back to its interview and chunk and
+    records the row range (offset table) owned by every interview. The table
+    is keyed on ``model_name@backend``, since torch and int8 ONNX weights give
+    slightly different vectors; changing either rebuilds the index.
+    """
+
+    MATRIX_FILE = 'embeddings.npy'
+    TABLE_FILE = 'chunks.json'
+
+    def __init__(self, index_dir: str, model, model_name: str, backend: str = 'torch'):
+        self.index_dir = index_dir
+        self.model = model
+        self.model_name = model_name
+        self.backend = backend
+        self.model_key = f"{model_name}@{backend}"
+        self.matrix_path = os.path.join(index_dir, self.MATRIX_FILE)
+        self.table_path = os.path.join(index_dir, self.TABLE_FILE)
+        self.rows: List[Dict] = []
+        self.interviews: Dict[str, Dict] = {}
+        self._matrix = None
+        self._lock = threading.RLock()
+        os.makedirs(index_dir, exist_ok=True)
+        self._load()
+
+    @property
+    def dimension(self) -> int:
+        return int(self.model.get_sentence_embedding_dimension())
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _empty_matrix(self) -> np.ndarray:
+        return np.zeros((0, self.dimension), dtype=np.float32)
+
+    def _load(self) -> None:
+        """Load the offset table and memory-map the embedding matrix."""
+        self._matrix = self._empty_matrix()
+        if not os.path.exists(self.table_path):
+            return
+        try:
+            with open(self.table_path, 'r') as f:
+                table = json.load(f)
+            if table.get('model') != self.model_key:
+                logger.info(f"Embedding index built with {table.get('model')}, rebuilding for {self.model_key}")
+                return
+            rows = table.get('rows', [])
+            if rows:
+                matrix = np.load(self.matrix_path, mmap_mode='r')
+                if matrix.shape != (len(rows), self.dimension):
+                    logger.warning(f"Embedding index shape {matrix.shape} does not match table, rebuilding")
+                    return
+                self._matrix = matrix
+            self.rows = rows
+            self.interviews = table.get('interviews', {})
+        except (OSError, ValueError) as e:
+            logger.error(f"Error loading embedding index: {str(e)}")
+            self.rows = []
+            self.interviews = {}
+
+    def _write(self, matrix: np.ndarray, rows: List[Dict], fingerprints: Dict[str, List[int]]) -> None:
+        """Atomically persist a new matrix/table pair and re-map it."""
+        interviews: Dict[str, Dict] = {}
+        for row_number, row in enumerate(rows):
+            entry = interviews.setdefault(row['interview_id'], {'start': row_number, 'count': 0})
+            entry['count'] += 1
+        for interview_id, fingerprint in fingerprints.items():
+            interviews.setdefault(interview_id, {'start': len(rows), 'count': 0})['fingerprint'] = fingerprint
+
+        tmp_matrix = self.matrix_path + '.tmp'
+        if rows:
+            with open(tmp_matrix, 'wb') as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        tmp_table = self.table_path + '.tmp'
+        with open(tmp_table, 'w') as f:
+            json.dump({
+                'model': self.model_key,
+                'dimension': self.dimension,
+                'rows': rows,
+                'interviews': interviews
+            }, f)
+
+        try:
+            # Release the current map before replacing the file underneath it
+            self._matrix = None
+            if rows:
+                os.replace(tmp_matrix, self.matrix_path)
+            elif os.path.exists(self.matrix_path):
+                os.remove(self.matrix_path)
+            os.replace(tmp_table, self.table_path)
+        except OSError:
+            # Re-map whatever pair is on disk so searches keep working; a half-replaced pair loads empty
+            self.rows = []
+            self.interviews = {}
+            self._load()
+            raise
+
+        self.rows = rows
+        self.interviews = interviews
+        self._matrix = np.load(self.matrix_path, mmap_mode='r') if rows else self._empty_matrix()
+
+    def _embed_interview(self, interview_id: str, data: Dict) -> Tuple[List[Dict], np.ndarray]:
+        """Embed every chunk of one interview, returning its rows and vectors."""
+        rows, texts = [], []
+        for chunk_index, chunk in enumerate(data.get('chunks', []) or []):
+            content = chunk_content(chunk)
+            if not content:
+                continue
+            metadata = chunk.get('metadata', {}) or {}
+            rows.append({
+                'interview_id': interview_id,
+                'chunk_id': chunk.get('chunk_id') or chunk.get('id'),
+                'chunk_index': chunk_index,
+                'emotion': (metadata.get('emotion') or '').lower(),
+                'themes': [theme.lower() for theme in metadata.get('themes', []) or [] if theme]
+            })
+            texts.append(content)
+        if not texts:
+            return rows, self._empty_matrix()
+        embeddings = self.model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return rows, np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+
+    def _apply(self, updates: Dict[str, Dict], removals: List[str]) -> None:
+        """Replace the rows of updated interviews and drop removed ones in one write."""
+        replaced = set(updates) | set(removals)
+        keep = [i for i, row in enumerate(self.rows) if row['interview_id'] not in replaced]
+        rows = [self.rows[i] for i in keep]
+        blocks = [np.asarray(self._matrix[keep], dtype=np.float32)] if keep else []
+        fingerprints = {
+            interview_id: entry['fingerprint']
+            for interview_id, entry in self.interviews.items()
+            if interview_id not in replaced and 'fingerprint' in entry
+        }
+        for interview_id, update in updates.items():
+            new_rows, embeddings = self._embed_interview(interview_id, update['data'])
+            rows.extend(new_rows)
+            if new_rows:
+                blocks.append(embeddings)
+            if update.get('fingerprint'):
+                fingerprints[interview_id] = update['fingerprint']
+        matrix = np.vstack(blocks) if blocks else self._empty_matrix()
+        self._write(matrix, rows, fingerprints)
+
+    def update_interview(self, interview_id: str, data: Dict, fingerprint: Optional[List[int]] = None) -> None:
+        """Embed (or re-embed) one interview's chunks; other rows are copied, not re-embedded."""
+        with self._lock:
+            self._apply({interview_id: {'data': data, 'fingerprint': fingerprint}}, [])
+
+    def remove_interview(self, interview_id: str) -> None:
+        """Drop an interview's rows from the index."""
+        with self._lock:
+            if interview_id in self.interviews:
+                self._apply({}, [interview_id])
+
+    def sync(self, base_dir: str) -> int:
+        """Bring the index up to date with the processed JSON files in base_dir.
+
+        Only files whose fingerprint changed (or that are new) are read and
+        embedded; deleted files are dropped. Returns the number of interviews
+        that were (re)indexed or removed.
+        """
+        with self._lock:
+            on_disk = {}
+            for filename in os.listdir(base_dir):
+                if filename.endswith('.json'):
+                    file_path = os.path.join(base_dir, filename)
+                    on_disk[filename[:-5]] = (file_path, file_fingerprint(file_path))
+
+            updates = {}
+            for interview_id, (file_path, fingerprint) in on_disk.items():
+                if self.interviews.get(interview_id, {}).get('fingerprint') == fingerprint:
+                    continue
+                try:
+                    with open(file_path, 'r') as f:
+                        data = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"Skipping unreadable processed interview {file_path}: {str(e)}")
+                    data = {}
+                updates[interview_id] = {'data': data, 'fingerprint': fingerprint}
+            removals = [interview_id for interview_id in self.interviews if interview_id not in on_disk]
+
+            if updates or removals:
+                logger.info(f"Embedding index sync: {len(updates)} updated, {len(removals)} removed")
+                self._apply(updates, removals)
+            return len(updates) + len(removals)
+
+    def score(self, query: str) -> np.ndarray:
+        """Cosine similarity of the query against every indexed chunk."""
+        if not self.rows:
+            return np.zeros(0, dtype=np.float32)
+        query_embedding = self.model.encode(
+            query,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+        return self._matrix @ np.asarray(query_embedding, dtype=np.float32)
+
+    def search(self, query: str, k: int = 10, min_score: Optional[float] = None) -> List[Tuple[Dict, float]]:
+        """Top-k (row, score) pairs for a query, best first."""
+        with self._lock:
+            scores = self.score(query)
+            rows = self.rows
+        return [(rows[i], float(scores[i])) for i in top_k(scores, k, min_score)]
+
+
+def top_k(scores: np.ndarray, k: Optional[int] = None, min_score: Optional[float] = None) -> np.ndarray:
+    """Indices of the k highest scores (all if k is None), best first."""
+    candidates = np.arange(len(scores))
+    if min_score is not None:
+        candidates = np.flatnonzero(scores > min_score)
+    if k is not None and k < len(candidates):
+        partition = np.argpartition(-scores[candidates], k)[:k]
+        candidates = candidates[partition]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
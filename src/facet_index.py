@@ -0,0 +1,283 @@
+"""
+Facet index of emotions, themes and insight tags of processed chunks.
+
+Chunks keep their tags in up to three places (the chunk itself, its
+'analysis' and its 'metadata'). They are collected and normalized once per
+file at ingest into an SQLite table keyed by (facet, value), with the
+normalized emotion intensity and the chunk timestamp precomputed. Lookups
+then walk only the index entries they return, instead of reading every
+processed file. A small vocabulary table with per-value counts answers
+prefix/substring matching on values and the facet counts shown in the UI.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('emotion', 'theme', 'insight_tag')
+
+# (interview_id, chunk_index, facet, value, intensity, timestamp)
+FacetRow = Tuple[str, int, str, str, float, str]
+
+
+def facet_index_path(interviews_dir: str) -> str:
+    """Where the facet index of an interview directory lives."""
+    return os.path.join(interviews_dir, '.facet_index', 'index.db')
+
+
+def normalize_intensity(intensity) -> float:
+    """Normalize emotion intensity to a value between 0 and 1."""
+    if intensity is None:
+        return 0.5
+    try:
+        # Convert to float if it's a string
+        intensity = float(intensity)
+        # If it's already between 0 and 1, return as is
+        if 0 <= intensity <= 1:
+            return intensity
+        # If it's on a different scale (e.g. 0-3), normalize it
+        if intensity > 1:
+            return min(intensity / 3, 1.0)
+        return max(0.0, intensity)
+    except (ValueError, TypeError):
+        return 0.5
+
+
+def _collect(chunk: Dict[str, Any], key: str) -> List[str]:
+    """List values of key from the chunk, its analysis and its metadata."""
+    values = []
+    for source in (chunk, chunk.get('analysis') or {}, chunk.get('metadata') or {}):
+        found = source.get(key, []) if isinstance(source, dict) else []
+        if isinstance(found, list):
+            values.extend(found)
+    return values
+
+
+def normalize_value(value: Any) -> str:
+    return ' '.join(str(value).lower().split())
+
+
+def chunk_timestamp(chunk: Dict[str, Any], interview_data: Dict[str, Any]) -> str:
+    """Same timestamp a search result of the chunk shows."""
+    entries = chunk.get('entries')
+    if entries and isinstance(entries, list) and isinstance(entries[0], dict):
+        timestamp = entries[0].get('timestamp', '')
+        if timestamp:
+            return str(timestamp)
+    return str(
+        chunk.get('timestamp', '') or
+        (chunk.get('metadata') or {}).get('timestamp', '') or
+        (interview_data.get('metadata') or {}).get('date', '') or
+        ''
+    )
+
+
+def chunk_facets(interview_id: str, data: Dict[str, Any]) -> List[FacetRow]:
+    """Facet rows of every chunk of one processed interview."""
+    rows = []
+    for index, chunk in enumerate(data.get('chunks', []) or []):
+        if not isinstance(chunk, dict):
+            continue
+        analysis = chunk.get('analysis') or {}
+        metadata = chunk.get('metadata') or {}
+        emotion = chunk.get('emotion') or analysis.get('emotion') or metadata.get('emotion') or ''
+        intensity = normalize_intensity(
+            chunk.get('emotion_intensity') or
+            analysis.get('emotion_intensity') or
+            metadata.get('emotion_intensity') or
+            0.5
+        )
+        timestamp = chunk_timestamp(chunk, data)
+
+        values = {('emotion', normalize_value(emotion))} if emotion else set()
+        values.update(('theme', normalize_value(theme)) for theme in _collect(chunk, 'themes') if theme)
+        values.update(('insight_tag', normalize_value(tag)) for tag in _collect(chunk, 'insight_tags') if tag)
+        rows.extend((interview_id, index, facet, value, intensity, timestamp)
+                    for facet, value in sorted(values) if value)
+    return rows
+
+
+class FacetIndex:
+    """Persistent facet -> chunk index backed by SQLite."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS facets (
+            facet TEXT NOT NULL,
+            value TEXT NOT NULL,
+            group_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            intensity REAL NOT NULL,
+            timestamp TEXT NOT NULL DEFAULT ''
+        );
+        CREATE INDEX IF NOT EXISTS idx_facets_intensity ON facets (facet, value, intensity DESC);
+        CREATE INDEX IF NOT EXISTS idx_facets_timestamp ON facets (facet, value, timestamp DESC);
+        CREATE INDEX IF NOT EXISTS idx_facets_group ON facets (group_id);
+
+        CREATE TABLE IF NOT EXISTS facet_values (
+            facet TEXT NOT NULL,
+            value TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (facet, value)
+        );
+
+        CREATE TABLE IF NOT EXISTS groups (
+            group_id TEXT PRIMARY KEY,
+            fingerprint TEXT
+        );
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _delete_group(self, group_id: str) -> set:
+        """Drop a group's rows, returning the (facet, value) pairs they touched."""
+        touched = set(self._conn.execute(
+            "SELECT DISTINCT facet, value FROM facets WHERE group_id = ?", (group_id,)
+        ).fetchall())
+        self._conn.execute("DELETE FROM facets WHERE group_id = ?", (group_id,))
+        return touched
+
+    def _recount(self, touched: Iterable[Tuple[str, str]]) -> None:
+        for facet, value in touched:
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM facets WHERE facet = ? AND value = ?", (facet, value)
+            ).fetchone()[0]
+            if count:
+                self._conn.execute(
+                    "INSERT INTO facet_values (facet, value, count) VALUES (?, ?, ?) "
+                    "ON CONFLICT(facet, value) DO UPDATE SET count = excluded.count",
+                    (facet, value, count)
+                )
+            else:
+                self._conn.execute("DELETE FROM facet_values WHERE facet = ? AND value = ?", (facet, value))
+
+    def replace_group(self, group_id: str, rows: Iterable[FacetRow],
+                      fingerprint: Optional[List[int]] = None) -> int:
+        """Replace the facet rows of one interview; returns the number of rows indexed."""
+        rows = list(rows)
+        with self._lock, self._conn:
+            touched = self._delete_group(group_id)
+            self._conn.executemany(
+                "INSERT INTO facets (group_id, chunk_index, facet, value, intensity, timestamp) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+            touched.update((facet, value) for _, _, facet, value, _, _ in rows)
+            self._recount(touched)
+            self._conn.execute(
+                "INSERT INTO groups (group_id, fingerprint) VALUES (?, ?) "
+                "ON CONFLICT(group_id) DO UPDATE SET fingerprint = excluded.fingerprint",
+                (group_id, json.dumps(fingerprint) if fingerprint else None)
+            )
+        return len(rows)
+
+    def remove_group(self, group_id: str) -> None:
+        with self._lock, self._conn:
+            self._recount(self._delete_group(group_id))
+            self._conn.execute("DELETE FROM groups WHERE group_id = ?", (group_id,))
+
+    def sync(self, base_dir: str) -> int:
+        """Index new or changed <id>.json files in base_dir and drop deleted ones."""
+        if not os.path.isdir(base_dir):
+            return 0
+
+        on_disk = {}
+        with os.scandir(base_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    on_disk[entry.name[:-len('.json')]] = [stat.st_mtime_ns, stat.st_size]
+
+        with self._lock:
+            known = {
+                group_id: json.loads(fingerprint) if fingerprint else None
+                for group_id, fingerprint in self._conn.execute("SELECT group_id, fingerprint FROM groups")
+            }
+
+            changed = 0
+            for group_id, fingerprint in known.items():
+                if fingerprint is not None and group_id not in on_disk:
+                    self.remove_group(group_id)
+                    changed += 1
+
+            for group_id, fingerprint in on_disk.items():
+                if known.get(group_id) == fingerprint:
+                    continue
+                file_path = os.path.join(base_dir, f"{group_id}.json")
+                try:
+                    with open(file_path, 'r') as f:
+                        data = json.load(f)
+                    self.replace_group(group_id, chunk_facets(group_id, data), fingerprint)
+                except Exception as e:
+                    logger.error(f"Error indexing facets of {file_path}: {str(e)}")
+                    continue
+                changed += 1
+
+        if changed:
+            logger.info(f"Facet index synced {changed} files from {base_dir}")
+        return changed
+
+    def values(self, facet: str, match: Optional[str] = None, prefix: bool = False,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Distinct values of a facet with their chunk counts, most frequent first.
+
+        match filters values by substring (or by prefix with prefix=True).
+        """
+        sql = "SELECT value, count FROM facet_values WHERE facet = ?"
+        params: List[Any] = [facet]
+        if match:
+            match = normalize_value(match)
+            if prefix:
+                sql += " AND value >= ? AND value < ?"
+                params += [match, match + '\U0010ffff']
+            else:
+                sql += " AND instr(value, ?) > 0"
+                params.append(match)
+        sql += " ORDER BY count DESC, value"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            return [{'value': value, 'count': count} for value, count in self._conn.execute(sql, params)]
+
+    def lookup(self, facet: str, values: Iterable[str], order: str = 'intensity',
+               limit: Optional[int] = 10) -> List[Dict[str, Any]]:
+        """Chunks tagged with any of values, by descending intensity or timestamp.
+
+        Each chunk is returned once, with the interview id, chunk index,
+        precomputed intensity and timestamp.
+        """
+        values = sorted({normalize_value(value) for value in values if value})
+        if not values:
+            return []
+        column = 'intensity' if order == 'intensity' else 'timestamp'
+        placeholders = ','.join('?' * len(values))
+        sql = (
+            f"SELECT group_id, chunk_index, MAX(intensity), MAX(timestamp) FROM facets "
+            f"WHERE facet = ? AND value IN ({placeholders}) "
+            f"GROUP BY group_id, chunk_index ORDER BY MAX({column}) DESC, group_id, chunk_index"
+        )
+        params: List[Any] = [facet] + values
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {'interview_id': group_id, 'chunk_index': chunk_index, 'intensity': intensity, 'timestamp': timestamp}
+            for group_id, chunk_index, intensity, timestamp in rows
+        ]
@@ -0,0 +1,124 @@
+"""
+Hybrid dense + keyword search over processed interview chunks.
+
+The MiniLM embedding index and the BM25 text index rank the same chunks
+independently. Both retrievers run concurrently, their rankings are merged
+with reciprocal rank fusion, and only the fused top-N is optionally reranked
+with the cross-encoder, so reranking cost does not grow with the corpus.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Constant from the original RRF paper; damps the weight of the very top ranks
+RRF_K = 60
+
+ChunkKey = Tuple[str, int]
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='hybrid-search')
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]], k: int = RRF_K,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[Hashable, float]]:
+    """Fuse ranked lists of keys into one list of (key, score), best first.
+
+    Each list contributes weight / (k + rank) for every key it contains (rank
+    starting at 1), so keys ranked well by several retrievers rise to the top
+    without having to calibrate their raw scores against each other.
+    """
+    scores: Dict[Hashable, float] = {}
+    for i, ranking in enumerate(rankings):
+        weight = weights[i] if weights else 1.0
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _timed(fn: Callable, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round((time.perf_counter() - started) * 1000, 2)
+
+
+def _dense_ranking(store, query: str, candidates: int) -> List[ChunkKey]:
+    store.embedding_index.sync(store.base_dir)
+    return [(row['interview_id'], row['chunk_index'])
+            for row, _ in store.embedding_index.search(query, k=candidates)]
+
+
+def _keyword_ranking(store, query: str, candidates: int) -> List[ChunkKey]:
+    store.text_index.sync(store.base_dir, store._chunk_documents)
+    return [(hit['group_id'], hit['fields'].get('chunk_index', -1))
+            for hit in store.text_index.search(query, limit=candidates, any_term=True)]
+
+
+def hybrid_search(store, query: str, k: int = 10, candidates: int = 50,
+                  reranker: Optional[Callable[[str, List[Dict], int], List[Dict]]] = None,
+                  rerank_top_n: int = 20) -> Tuple[List[Dict], Dict[str, float]]:
+    """Run dense and keyword retrieval on a ProcessedInterviewStore and fuse them.
+
+    Args:
+        store: ProcessedInterviewStore whose embedding and text indexes are searched
+        query: Search query
+        k: Number of results to return
+        candidates: How many chunks each retriever contributes to the fusion
+        reranker: Optional rerank_results(query, results, k) such as
+            SemanticAnalyzer.rerank_results; results carry their content as 'text'
+        rerank_top_n: How many fused results the reranker sees; they are
+            reordered and gain a 'cross_score', while 'similarity' stays the
+            RRF score for every result
+
+    Returns:
+        Tuple[List[Dict], Dict]: Search results and per-stage latency in milliseconds
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+
+    dense_future = _executor.submit(_timed, _dense_ranking, store, query, candidates)
+    keyword_future = _executor.submit(_timed, _keyword_ranking, store, query, candidates)
+    rankings = []
+    for name, future in (('dense_ms', dense_future), ('keyword_ms', keyword_future)):
+        try:
+            ranking, timings[name] = future.result()
+            rankings.append(ranking)
+        except Exception as e:
+            # One retriever failing still leaves the other's results
+            logger.error(f"Hybrid search {name[:-3]} retriever failed: {str(e)}")
+            timings[name] = None
+
+    fused, timings['fusion_ms'] = _timed(reciprocal_rank_fusion, rankings)
+
+    fusion_started = time.perf_counter()
+    keep = max(k, rerank_top_n) if reranker else k
+    results = []
+    loaded = {}
+    for (interview_id, chunk_index), score in fused:
+        if interview_id not in loaded:
+            loaded[interview_id] = store.load_interview(interview_id)
+        interview_data = loaded[interview_id]
+        chunks = (interview_data or {}).get('chunks', [])
+        if not interview_data or not 0 <= chunk_index < len(chunks):
+            continue
+        result = store._create_search_result(interview_data, chunks[chunk_index], similarity=score)
+        result['rrf_score'] = score
+        results.append(result)
+        if len(results) >= keep:
+            break
+    timings['load_ms'] = round((time.perf_counter() - fusion_started) * 1000, 2)
+
+    if reranker and results:
+        head, tail = results[:rerank_top_n], results[rerank_top_n:]
+        for result in head:
+            result['text'] = result['content']
+        head, timings['rerank_ms'] = _timed(reranker, query, head, len(head))
+        # similarity stays the RRF score on every result; the reranked head also carries cross_score
+        for result in head:
+            result.pop('text', None)
+        results = head + tail
+
+    timings['total_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return results[:k], timings
@@ -0,0 +1,287 @@
+"""
+FAISS index addressed by string keys through stable int64 ids.
+
+Vectors are stored in an IndexIDMap2, so each one keeps the int64 id it was
+added with no matter what is removed around it. Two dicts translate between
+keys (interview ids) and FAISS ids, which makes lookups, updates and removals
+independent of the vector's position in the index.
+
+Removing a vector from an IndexIDMap2 scans its id map and compacts its
+storage, which is O(n). remove() therefore only drops the key from the dicts
+and tombstones its id; searches over-fetch and skip tombstoned ids, and the
+vectors are dropped in one batch by compact(), which runs once tombstones
+pass a fraction of the index, before write() and in rebuild().
+
+The exact (flat) index is always kept: it is the source vectors for training
+and rebuilding, and answers reconstruct(). An optional approximate index
+(IVF-PQ or HNSW) built from it answers searches once trained; its kind,
+build parameters and query-time tuning (nprobe, efSearch) are persisted in
+table() so a reloaded store searches the same way.
+"""
+
+import logging
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ANN_KINDS = ('flat', 'ivfpq', 'hnsw')
+# Removed vectors kept before compacting: this share of the live ones, but at least the minimum
+COMPACT_RATIO = 0.25
+COMPACT_MIN = 64
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Largest PQ sub-quantizer count (<= 64) that divides the dimension."""
+    for m in (64, 48, 32, 24, 16, 12, 8, 4, 2, 1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def build_ann_index(kind: str, dimension: int, count: int, params: Optional[Dict[str, Any]] = None) -> faiss.Index:
+    """Create an untrained approximate index for about `count` vectors.
+
+    Args:
+        kind: 'ivfpq' or 'hnsw'
+        dimension: Vector dimension
+        count: Number of vectors it will be trained on / hold
+        params: Optional overrides: nlist, m, nbits (IVF-PQ); hnsw_m, ef_construction (HNSW)
+
+    Returns:
+        faiss.Index: The index wrapped in an IndexIDMap2
+    """
+    params = params or {}
+    if kind == 'ivfpq':
+        # ~4*sqrt(n) lists, but at least 39 training points per list
+        nlist = params.get('nlist') or max(1, min(int(4 * math.sqrt(max(count, 1))), count // 39 or 1))
+        m = params.get('m') or _pq_subquantizers(dimension)
+        # Each of the 2**nbits codebook entries needs ~39 training points
+        nbits = params.get('nbits') or max(1, min(8, int(math.log2(max(count / 39, 2)))))
+        quantizer = faiss.IndexFlatL2(dimension)
+        index = faiss.IndexIVFPQ(quantizer, dimension, int(nlist), int(m), int(nbits))
+    elif kind == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, int(params.get('hnsw_m', 32)))
+        index.hnsw.efConstruction = int(params.get('ef_construction', 40))
+    else:
+        raise ValueError(f"Unknown ANN index kind: {kind} (expected one of {', '.join(ANN_KINDS)})")
+    return faiss.IndexIDMap2(index)
+
+
+class IdMappedIndex:
+    """String-keyed wrapper around a faiss.IndexIDMap2."""
+
+    def __init__(self, dimension: int, index: Optional[faiss.Index] = None,
+                 key_to_id: Optional[Dict[str, int]] = None, next_id: int = 0):
+        self.dimension = dimension
+        self.index = index if index is not None else faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+        self.key_to_id: Dict[str, int] = dict(key_to_id or {})
+        self.id_to_key: Dict[int, str] = {faiss_id: key for key, faiss_id in self.key_to_id.items()}
+        self.next_id = max([next_id] + [faiss_id + 1 for faiss_id in self.id_to_key])
+        # Ids removed from the dicts but still in the index, dropped by compact()
+        self.tombstones: Set[int] = set()
+        if self.index.ntotal != len(self.key_to_id) and hasattr(self.index, 'id_map'):
+            self.tombstones = {faiss_id for faiss_id in faiss.vector_to_array(self.index.id_map).tolist()
+                               if faiss_id not in self.id_to_key}
+        # Optional approximate index and its persisted configuration
+        self.ann: Optional[faiss.Index] = None
+        self.ann_config: Dict[str, Any] = {'kind': 'flat', 'params': {}, 'search': {}}
+        # Ids removed from an HNSW graph, which cannot delete; filtered until rebuild()
+        self.ann_tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self.key_to_id)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.key_to_id
+
+    def keys(self) -> List[str]:
+        return list(self.key_to_id)
+
+    def add(self, keys: Sequence[str], vectors) -> None:
+        """Add vectors under keys; a key that already exists has its vector replaced."""
+        vectors = np.asarray(vectors, dtype='float32').reshape(len(keys), self.dimension)
+        self.remove([key for key in keys if key in self.key_to_id])
+
+        ids = np.arange(self.next_id, self.next_id + len(keys), dtype='int64')
+        self.next_id += len(keys)
+        self.index.add_with_ids(vectors, ids)
+        if self.ann is not None:
+            self.ann.add_with_ids(vectors, ids)
+        for key, faiss_id in zip(keys, ids.tolist()):
+            self.key_to_id[key] = faiss_id
+            self.id_to_key[faiss_id] = key
+
+    def remove(self, keys: Iterable[str]) -> int:
+        """Remove the vectors of keys; returns how many were present.
+
+        Constant time per key: the ids are tombstoned and their vectors
+        dropped by a later compact().
+        """
+        ids = [self.key_to_id.pop(key) for key in keys if key in self.key_to_id]
+        if not ids:
+            return 0
+        for faiss_id in ids:
+            del self.id_to_key[faiss_id]
+        self.tombstones.update(ids)
+        if len(self.tombstones) > max(COMPACT_MIN, COMPACT_RATIO * len(self)):
+            self.compact()
+        return len(ids)
+
+    def compact(self) -> int:
+        """Drop the vectors of tombstoned ids from the indexes in one pass; returns how many."""
+        if not self.tombstones:
+            return 0
+        id_array = np.array(sorted(self.tombstones), dtype='int64')
+        self.index.remove_ids(id_array)
+        if self.ann is not None:
+            if self.ann_config['kind'] == 'hnsw':
+                # HNSW graphs cannot delete; these stay filtered until rebuild()
+                self.ann_tombstones += len(id_array)
+            else:
+                self.ann.remove_ids(id_array)
+        self.tombstones.clear()
+        return len(id_array)
+
+    def reconstruct(self, key: str) -> np.ndarray:
+        """Stored vector of key (KeyError if absent)."""
+        return self.index.reconstruct(self.key_to_id[key])
+
+    def search(self, vectors, k: int, exact: bool = False) -> List[List[Tuple[str, float]]]:
+        """(key, L2 distance) pairs of the k nearest vectors, nearest first, per query.
+
+        Uses the approximate index when one is trained, unless exact=True.
+        """
+        vectors = np.asarray(vectors, dtype='float32').reshape(-1, self.dimension)
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(vectors))]
+        # Over-fetch to make up for removed entries still in the index
+        if self.ann is not None and not exact:
+            distances, ids = self.ann.search(vectors, k + len(self.tombstones) + self.ann_tombstones)
+        else:
+            distances, ids = self.index.search(vectors, k + len(self.tombstones))
+        return [
+            [(self.id_to_key[faiss_id], float(distance))
+             for faiss_id, distance in zip(row_ids.tolist(), row_distances.tolist())
+             if faiss_id in self.id_to_key][:k]
+            for row_ids, row_distances in zip(ids, distances)
+        ]
+
+    def _all_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, vectors) of everything in the exact index."""
+        self.compact()
+        ids = faiss.vector_to_array(self.index.id_map).astype('int64')
+        if not len(ids):
+            return ids, np.zeros((0, self.dimension), dtype='float32')
+        return ids, self.index.index.reconstruct_n(0, len(ids))
+
+    def train(self, kind: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Build (or drop, for 'flat') the approximate index from the exact vectors."""
+        if kind == 'flat':
+            self.ann = None
+            self.ann_config = {'kind': 'flat', 'params': {}, 'search': {}}
+            self.ann_tombstones = 0
+            return
+
+        ids, vectors = self._all_vectors()
+        if not len(ids):
+            raise ValueError("Cannot train an approximate index without vectors")
+        params = dict(params or {})
+        ann = build_ann_index(kind, self.dimension, len(ids), params)
+        ann.train(vectors)
+        ann.add_with_ids(vectors, ids)
+        self.ann = ann
+        self.ann_config = {'kind': kind, 'params': params, 'search': self.ann_config.get('search', {})}
+        self.ann_tombstones = 0
+        self.tune()
+        logger.info(f"Trained {kind} index on {len(ids)} vectors")
+
+    def rebuild(self) -> None:
+        """Compact, then retrain the approximate index with its saved configuration (drops HNSW tombstones)."""
+        self.compact()
+        if self.ann_config['kind'] != 'flat':
+            self.train(self.ann_config['kind'], self.ann_config.get('params'))
+
+    def tune(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> None:
+        """Set and remember query-time parameters of the approximate index."""
+        search = self.ann_config.setdefault('search', {})
+        if nprobe is not None:
+            search['nprobe'] = int(nprobe)
+        if ef_search is not None:
+            search['ef_search'] = int(ef_search)
+        if self.ann is None:
+            return
+        space = faiss.ParameterSpace()
+        if self.ann_config['kind'] == 'ivfpq' and 'nprobe' in search:
+            space.set_index_parameter(self.ann, 'nprobe', search['nprobe'])
+        if self.ann_config['kind'] == 'hnsw' and 'ef_search' in search:
+            space.set_index_parameter(self.ann, 'efSearch', search['ef_search'])
+
+    def table(self) -> Dict:
+        """JSON-serializable key/id table to persist next to write()."""
+        return {
+            'dimension': self.dimension,
+            'next_id': self.next_id,
+            'ids': self.key_to_id,
+            'ann': dict(self.ann_config, tombstones=self.ann_tombstones)
+        }
+
+    def write(self, index_path: str) -> None:
+        """Compact, then write the exact index, and the approximate one to <index_path>.ann."""
+        self.compact()
+        faiss.write_index(self.index, index_path)
+        ann_path = f"{index_path}.ann"
+        if self.ann is not None:
+            faiss.write_index(self.ann, ann_path)
+        elif os.path.exists(ann_path):
+            os.remove(ann_path)
+
+    @classmethod
+    def read(cls, index_path: str, metadata: Dict) -> 'IdMappedIndex':
+        """Load an index written by write() using the store metadata saved with it."""
+        loaded = cls.from_metadata(faiss.read_index(index_path), metadata)
+        ann_config = metadata.get('id_table', {}).get('ann')
+        ann_path = f"{index_path}.ann"
+        if ann_config and ann_config.get('kind', 'flat') != 'flat' and os.path.exists(ann_path):
+            loaded.ann = faiss.read_index(ann_path)
+            loaded.ann_tombstones = int(ann_config.get('tombstones', 0))
+            loaded.ann_config = {k: v for k, v in ann_config.items() if k != 'tombstones'}
+            loaded.tune()
+        return loaded
+
+    @classmethod
+    def restore(cls, index: faiss.Index, table: Dict) -> 'IdMappedIndex':
+        """Rebuild from faiss.read_index() output and a table() written alongside it."""
+        return cls(table.get('dimension', index.d), index, table.get('ids', {}), table.get('next_id', 0))
+
+    @classmethod
+    def from_metadata(cls, index: faiss.Index, metadata: Dict) -> 'IdMappedIndex':
+        """Restore from saved store metadata, converting pre-id-map stores on the fly."""
+        if 'id_table' in metadata:
+            return cls.restore(index, metadata['id_table'])
+        return cls.from_positional(index, metadata.get('interview_ids', []))
+
+    @classmethod
+    def from_positional(cls, index: faiss.Index, keys: Sequence[str]) -> 'IdMappedIndex':
+        """Convert a plain index whose row i belongs to keys[i], reusing its vectors.
+
+        Rows beyond the known keys (left behind by the old position-based
+        removal) are dropped; no text is re-embedded.
+        """
+        count = min(index.ntotal, len(keys))
+        if index.ntotal != len(keys):
+            logger.warning(f"Positional index has {index.ntotal} vectors for {len(keys)} ids, keeping {count}")
+        converted = cls(index.d)
+        if count:
+            latest = {}
+            for position, key in enumerate(keys[:count]):
+                latest[key] = position
+            positions = sorted(latest.values())
+            vectors = index.reconstruct_n(0, count)[positions]
+            converted.add([keys[p] for p in positions], vectors)
+        return converted
@@ -0,0 +1,238 @@
+"""
+Persistent cache of LLM responses for deterministic analysis calls.
+
+Re-analyzing an unchanged transcript or regenerating a persona, journey map
+or report sends the same prompt again. Responses are keyed by (provider,
+model, temperature, sha256 of the messages and request parameters, template
+version), so an identical request is answered from an SQLite table instead
+of the API. Only calls at or below a temperature threshold are cached, since
+sampling at a high temperature is asking for a different answer each time.
+Entries expire after a TTL, and the least recently used are evicted above a
+size limit. Hits and misses are counted per call site.
+
+Bump a call site's template version when its prompt template or the parsing
+of its answer changes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .sqlite_cache import evict_least_recently_used, open_cache_db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join('.llm_cache', 'responses.db')
+DEFAULT_TTL_SECONDS = float(os.getenv('LLM_CACHE_TTL_DAYS', '30')) * 86400
+DEFAULT_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '20000'))
+DEFAULT_MAX_TEMPERATURE = float(os.getenv('LLM_CACHE_MAX_TEMPERATURE', '0.5'))
+# OpenAI samples at temperature 1 unless told otherwise
+DEFAULT_TEMPERATURE = 1.0
+
+
+def request_key(provider: str, model: str, temperature: float, messages: Any, template_version: Any = 1,
+                **params) -> str:
+    """Cache key of a request: sha256 over everything that shapes the answer."""
+    payload = json.dumps([provider, model, float(temperature), str(template_version), messages, params],
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """SQLite response cache with TTL, LRU eviction and per-call-site hit counters."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            call_site TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created REAL NOT NULL,
+            last_used REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_temperature: float = DEFAULT_MAX_TEMPERATURE):
+        """
+        Args:
+            db_path: SQLite file holding the cached responses
+            ttl_seconds: Age after which a response is requested again
+            max_entries: Responses kept before the least recently used are evicted
+            max_temperature: Highest sampling temperature whose responses are cached
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_temperature = max_temperature
+        self._sites: Dict[str, Dict[str, int]] = {}
+
+        self._lock = threading.RLock()
+        self._conn, self._count = open_cache_db(db_path, self.SCHEMA, 'responses')
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, call_site: str, outcome: str) -> None:
+        counters = self._sites.setdefault(call_site, {'hits': 0, 'misses': 0, 'bypassed': 0})
+        counters[outcome] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None if there is none or it has expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            with self._conn:
+                if now - row[1] > self.ttl_seconds:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._count -= 1
+                    return None
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, key: str, provider: str, model: str, call_site: str, response: str) -> None:
+        """Store a response, evicting expired and then least recently used entries if over the limit."""
+        now = time.time()
+        with self._lock, self._conn:
+            exists = self._conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, call_site, response, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (key, provider, model, call_site, response, now, now)
+            )
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._count -= self._conn.execute(
+                    "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+                ).rowcount
+            self._count = evict_least_recently_used(self._conn, 'responses', self._count, self.max_entries)
+
+    def call(self, call_site: str, provider: str, model: str, temperature: float, messages: Any,
+             request: Callable[[], Optional[str]], template_version: Any = 1,
+             accept: Optional[Callable[[str], bool]] = None, **params) -> Optional[str]:
+        """Response to a request, from the cache when an identical one was answered before.
+
+        Args:
+            call_site: Name the hit rate is reported under
+            provider, model, temperature, messages, template_version, params: What the answer depends on
+            request: Sends the request and returns the response text
+            accept: Whether a fresh response may be cached (e.g. it parses); every non-empty one by default
+
+        Returns:
+            The response text; exceptions from request propagate and nothing is cached
+        """
+        if temperature is None or temperature > self.max_temperature:
+            with self._lock:
+                self._record(call_site, 'bypassed')
+            return request()
+
+        key = request_key(provider, model, temperature, messages, template_version, **params)
+        try:
+            cached = self.get(key)
+        except sqlite3.Error as e:
+            logger.error(f"Error reading LLM cache: {str(e)}")
+            cached = None
+        with self._lock:
+            self._record(call_site, 'hits' if cached is not None else 'misses')
+        if cached is not None:
+            return cached
+
+        response = request()
+        if isinstance(response, str) and response and self._accepts(accept, response):
+            try:
+                self.put(key, provider, model, call_site, response)
+            except sqlite3.Error as e:
+                logger.error(f"Error writing LLM cache: {str(e)}")
+        return response
+
+    @staticmethod
+    def _accepts(accept: Optional[Callable[[str], bool]], response: str) -> bool:
+        try:
+            return accept is None or bool(accept(response))
+        except Exception as e:
+            logger.warning(f"Not caching response that failed its check: {str(e)}")
+            return False
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self._count = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since this cache was opened, in total and per call site."""
+        with self._lock:
+            sites = {site: dict(counters) for site, counters in self._sites.items()}
+        for counters in sites.values():
+            lookups = counters['hits'] + counters['misses']
+            counters['hit_rate'] = round(counters['hits'] / lookups, 4) if lookups else 0.0
+        hits = sum(counters['hits'] for counters in sites.values())
+        lookups = hits + sum(counters['misses'] for counters in sites.values())
+        return {
+            'hits': hits,
+            'misses': lookups - hits,
+            'bypassed': sum(counters['bypassed'] for counters in sites.values()),
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'entries': self._count,
+            'call_sites': sites
+        }
+
+
+_cache: Optional[LLMCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Process-wide cache at LLM_CACHE_PATH; None if it is disabled (empty path) or cannot be opened."""
+    global _cache, _cache_failed
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            path = os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH)
+            try:
+                if path:
+                    _cache = LLMCache(path)
+            except Exception as e:
+                logger.error(f"Error opening LLM cache at {path}: {str(e)}")
+            _cache_failed = _cache is None
+        return _cache
+
+
+def cached_call(call_site: str, provider: str, model: str, temperature: float, messages: Any,
+                request: Callable[[], Optional[str]], template_version: Any = 1,
+                accept: Optional[Callable[[str], bool]] = None, cache: Optional[LLMCache] = None,
+                **params) -> Optional[str]:
+    """LLMCache.call on cache (the process-wide cache by default); just request() without a cache."""
+    if cache is None:
+        cache = get_llm_cache()
+    if cache is None:
+        return request()
+    return cache.call(call_site, provider, model, temperature, messages, request, template_version, accept, **params)
+
+
+def cached_chat_completion(client, call_site: str, template_version: Any = 1,
+                           accept: Optional[Callable[[str], bool]] = None, cache: Optional[LLMCache] = None,
+                           **request) -> Optional[str]:
+    """Message content of an OpenAI chat completion, from the cache when possible.
+
+    request holds the chat.completions.create arguments (model, messages,
+    temperature, max_tokens, ...); all of them are part of the key.
+    """
+    def complete() -> Optional[str]:
+        return client.chat.completions.create(**request).choices[0].message.content
+
+    params = {k: v for k, v in request.items() if k not in ('model', 'temperature', 'messages')}
+    return cached_call(call_site, 'openai', request.get('model'), request.get('temperature', DEFAULT_TEMPERATURE),
+                       request.get('messages'), complete, template_version, accept, cache, **params)
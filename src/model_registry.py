@@ -0,0 +1,161 @@
+"""
+Process-wide registry for the transformer models used by search and analysis.
+
+Each SentenceTransformer, emotion pipeline and CrossEncoder is loaded the first
+time it is requested and then shared by every caller in the process, so
+request handlers can construct analyzers and stores without paying a model
+load. Loading is serialized per model with a lock, which eventlet's
+monkey-patching turns into a green lock under the Socket.IO server.
+
+DARIA_MODEL_BACKEND=onnx runs the sentence model and the emotion classifier
+through ONNX Runtime with int8 weights (see onnx_backend); the default is
+torch in fp32.
+"""
+
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENTENCE_MODEL = 'sentence-transformers/all-MiniLM-L6-v2'
+DEFAULT_EMOTION_MODEL = 'j-hartmann/emotion-english-distilroberta-base'
+DEFAULT_CROSS_ENCODER = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+# Both MiniLM-L6 sentence models produce 384-d vectors, so with
+# DARIA_SHARE_MINILM=1 they share one loaded copy and save a model's worth of
+# memory. Off by default: multi-qa-MiniLM is trained for question-to-passage
+# retrieval and all-MiniLM is not, so sharing can change search results.
+MODEL_ALIASES = {
+    'multi-qa-MiniLM-L6-cos-v1': DEFAULT_SENTENCE_MODEL,
+    'sentence-transformers/multi-qa-MiniLM-L6-cos-v1': DEFAULT_SENTENCE_MODEL,
+    'all-MiniLM-L6-v2': DEFAULT_SENTENCE_MODEL,
+}
+
+MODEL_DEVICE = os.getenv('DARIA_MODEL_DEVICE', 'cpu')
+MODEL_BACKEND = os.getenv('DARIA_MODEL_BACKEND', 'torch')
+BACKENDS = ('torch', 'onnx')
+
+_registry_lock = threading.Lock()
+_load_locks: Dict[Tuple, threading.Lock] = {}
+_models: Dict[Tuple, Any] = {}
+_stats: Dict[Tuple, Dict[str, Any]] = {}
+
+
+def resolve_model_name(name: str) -> str:
+    """Map interchangeable model names onto the copy that is actually loaded."""
+    if os.getenv('DARIA_SHARE_MINILM') != '1':
+        return name
+    return MODEL_ALIASES.get(name, name)
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Backend to load models with: backend, else DARIA_MODEL_BACKEND; torch if ONNX Runtime is missing."""
+    backend = backend or MODEL_BACKEND
+    if backend not in BACKENDS:
+        logger.warning(f"Unknown model backend {backend}, using torch")
+        return 'torch'
+    if backend == 'onnx':
+        from . import onnx_backend
+        if not onnx_backend.available():
+            logger.warning("optimum[onnxruntime] is not installed, using the torch backend")
+            return 'torch'
+    return backend
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Peak RSS is the best we can do off Linux (KB on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _get_or_load(key: Tuple, loader: Callable[[], Any]) -> Any:
+    """Return the cached model for key, loading it at most once per process."""
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        lock = _load_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        model = _models.get(key)
+        if model is not None:
+            return model
+
+        kind, name = key[0], key[1]
+        logger.info(f"Loading {kind} model {name}...")
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        model = loader()
+        load_seconds = time.perf_counter() - started
+        rss_delta = max(0, _rss_bytes() - rss_before)
+
+        _stats[key] = {
+            'kind': kind,
+            'name': name,
+            'options': dict(key[2:]),
+            'load_seconds': round(load_seconds, 3),
+            'rss_mb': round(rss_delta / (1024 * 1024), 1),
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        _models[key] = model
+        logger.info(f"Loaded {kind} model {name} in {load_seconds:.2f}s (+{rss_delta / (1024 * 1024):.1f} MB RSS)")
+        return model
+
+
+def get_sentence_transformer(name: str = DEFAULT_SENTENCE_MODEL, backend: Optional[str] = None):
+    """Shared SentenceTransformer for name (after alias resolution), on backend (see resolve_backend)."""
+    name = resolve_model_name(name)
+    backend = resolve_backend(backend)
+
+    def load():
+        if backend == 'onnx':
+            from . import onnx_backend
+            return onnx_backend.load_sentence_transformer(name, device=MODEL_DEVICE)
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(name, device=MODEL_DEVICE)
+
+    key = ('sentence_transformer', name)
+    return _get_or_load(key + ((('backend', backend),) if backend != 'torch' else ()), load)
+
+
+def get_emotion_pipeline(name: str = DEFAULT_EMOTION_MODEL, backend: Optional[str] = None, **pipeline_kwargs):
+    """Shared transformers text-classification pipeline for emotion labels, on backend (see resolve_backend).
+
+    Pipelines built with different keyword arguments (e.g. return_all_scores)
+    are cached separately.
+    """
+    backend = resolve_backend(backend)
+
+    def load():
+        if backend == 'onnx':
+            from . import onnx_backend
+            return onnx_backend.load_text_classifier(name, **pipeline_kwargs)
+        from transformers import pipeline
+        device = -1 if MODEL_DEVICE == 'cpu' else MODEL_DEVICE
+        return pipeline('text-classification', model=name, device=device, **pipeline_kwargs)
+
+    options = dict(pipeline_kwargs, backend=backend) if backend != 'torch' else pipeline_kwargs
+    return _get_or_load(('emotion_pipeline', name) + tuple(sorted(options.items())), load)
+
+
+def get_cross_encoder(name: str = DEFAULT_CROSS_ENCODER):
+    """Shared CrossEncoder used to rerank search results."""
+    def load():
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(name, device=MODEL_DEVICE)
+
+    return _get_or_load(('cross_encoder', name), load)
+
+
+def model_stats() -> List[Dict[str, Any]]:
+    """Load time and resident memory growth for every model loaded so far."""
+    return [dict(stats) for stats in _stats.values()]
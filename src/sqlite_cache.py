@@ -0,0 +1,39 @@
+"""
+SQLite plumbing shared by the on-disk caches (embedding_cache, llm_cache).
+
+Each cache keeps one WAL-mode connection, tracks its row count in memory
+instead of running COUNT(*) per write, and evicts the least recently used
+rows (by a ``last_used`` column) once the count goes over its limit.
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def open_cache_db(db_path: str, schema: str, table: str) -> Tuple[sqlite3.Connection, int]:
+    """Open (creating if needed) a cache database; returns the connection and the rows in table."""
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    return conn, conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def evict_least_recently_used(conn: sqlite3.Connection, table: str, count: int, max_entries: int) -> int:
+    """Delete the least recently used rows of table above max_entries; returns the new row count.
+
+    Call inside the transaction that inserted the rows.
+    """
+    if count <= max_entries:
+        return count
+    excess = count - max_entries
+    conn.execute(
+        f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} ORDER BY last_used LIMIT ?)", (excess,)
+    )
+    logger.info(f"Evicted {excess} rows from {table}")
+    return max_entries
@@ -0,0 +1,302 @@
+"""
+On-disk full-text index for interview transcripts and chunks.
+
+Documents live in an SQLite FTS5 table, which keeps a positional inverted
+index on disk, answers phrase and prefix queries from it and ranks matches
+with BM25. Documents are grouped by interview so one interview can be
+replaced or removed in a single transaction, and each group remembers the
+fingerprint of the file it came from so sync() only re-reads files that
+changed since the last run.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Same notion of a token as FTS5's unicode61 tokenizer, for building queries
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+# Markers passed to highlight(); they never occur in transcript text
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+Document = Tuple[str, str, Dict[str, Any]]
+
+
+def interview_transcript_text(interview: Dict[str, Any]) -> str:
+    """Full transcript text of a raw interview, whatever shape it was saved in."""
+    transcript = interview.get('transcript')
+    if isinstance(transcript, str) and transcript.strip():
+        return transcript
+    if isinstance(transcript, list):
+        return '\n'.join(
+            f"{msg.get('speaker', '')}: {msg.get('text', '')}" if isinstance(msg, dict) else str(msg)
+            for msg in transcript
+        )
+    return '\n'.join(
+        f"{chunk.get('speaker', '')}: {chunk.get('text', '')}"
+        for chunk in interview.get('chunks', []) or []
+        if isinstance(chunk, dict) and chunk.get('text')
+    )
+
+
+def raw_interview_documents(interview_id: str, interview: Dict[str, Any]) -> List[Document]:
+    """One document per raw interview: its transcript plus the fields search results show."""
+    return [(interview_id, interview_transcript_text(interview), {
+        'id': interview.get('id', interview_id),
+        'title': interview.get('title'),
+        'project_name': interview.get('project_name'),
+        'created_at': interview.get('created_at'),
+        'type': interview.get('type')
+    })]
+
+
+def text_index_path(interviews_dir: str) -> str:
+    """Where the text index of an interview directory lives."""
+    return os.path.join(interviews_dir, '.text_index', 'index.db')
+
+
+def build_match_query(query: str, phrase: bool = False, any_term: bool = False) -> str:
+    """Translate a user query into an FTS5 MATCH expression.
+
+    Quoted parts become phrase queries and remaining words must all occur (or,
+    with any_term=True, at least one must). With phrase=True the whole query is
+    one phrase. A phrase or word whose last token
+    is written with a trailing '*' (and, in phrase mode, always) matches as a
+    prefix, so "frustrat" still finds "frustrated". Everything is re-tokenized,
+    so user input can never inject FTS5 syntax.
+    """
+    def quoted(text: str, prefix: bool) -> Optional[str]:
+        tokens = TOKEN_RE.findall(text)
+        if not tokens:
+            return None
+        return '"' + ' '.join(tokens) + '"' + (' *' if prefix else '')
+
+    if phrase:
+        expr = quoted(query.replace('"', ' '), prefix=True)
+        return expr or ''
+
+    parts = []
+    for text in PHRASE_RE.findall(query):
+        expr = quoted(text, prefix=False)
+        if expr:
+            parts.append(expr)
+    for word in PHRASE_RE.sub(' ', query).split():
+        expr = quoted(word, prefix=word.endswith('*'))
+        if expr:
+            parts.append(expr)
+    return (' OR ' if any_term else ' AND ').join(parts)
+
+
+def _strip_highlights(marked: str) -> Tuple[str, List[List[int]]]:
+    """Remove highlight markers, returning the text and [start, end) offsets of each match."""
+    text = []
+    spans = []
+    length = 0
+    start = None
+    for char in marked:
+        if char == _MATCH_START:
+            start = length
+        elif char == _MATCH_END:
+            if start is not None:
+                spans.append([start, length])
+            start = None
+        else:
+            text.append(char)
+            length += 1
+    return ''.join(text), spans
+
+
+def make_snippet(text: str, spans: List[List[int]], window: int = 100) -> Tuple[str, List[List[int]]]:
+    """Cut a snippet around the first match, with match offsets relative to the snippet."""
+    if not spans:
+        snippet = text[:2 * window]
+        return (snippet + '...' if len(text) > len(snippet) else snippet), []
+
+    begin = max(0, spans[0][0] - window)
+    end = min(len(text), spans[0][1] + window)
+    prefix = '...' if begin > 0 else ''
+    snippet = prefix + text[begin:end] + ('...' if end < len(text) else '')
+    shift = len(prefix) - begin
+    inside = [[s + shift, e + shift] for s, e in spans if s >= begin and e <= end]
+    return snippet, inside
+
+
+class TextIndex:
+    """Persistent BM25 full-text index backed by SQLite FTS5."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            rowid INTEGER PRIMARY KEY,
+            doc_id TEXT NOT NULL UNIQUE,
+            group_id TEXT NOT NULL,
+            fields TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS idx_documents_group ON documents (group_id);
+
+        CREATE TABLE IF NOT EXISTS groups (
+            group_id TEXT PRIMARY KEY,
+            fingerprint TEXT
+        );
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            body,
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def _delete_group(self, group_id: str) -> None:
+        rowids = [row[0] for row in self._conn.execute(
+            "SELECT rowid FROM documents WHERE group_id = ?", (group_id,)
+        )]
+        for rowid in rowids:
+            self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (rowid,))
+        self._conn.execute("DELETE FROM documents WHERE group_id = ?", (group_id,))
+
+    def replace_group(self, group_id: str, documents: Iterable[Document],
+                      fingerprint: Optional[List[int]] = None) -> int:
+        """Replace every document of one interview with (doc_id, text, fields) triples.
+
+        Returns the number of documents indexed.
+        """
+        count = 0
+        with self._lock, self._conn:
+            self._delete_group(group_id)
+            for doc_id, text, fields in documents:
+                if not text:
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT INTO documents (doc_id, group_id, fields) VALUES (?, ?, ?)",
+                    (doc_id, group_id, json.dumps(fields or {}, default=str))
+                )
+                self._conn.execute(
+                    "INSERT INTO documents_fts (rowid, body) VALUES (?, ?)", (cursor.lastrowid, text)
+                )
+                count += 1
+            self._conn.execute(
+                "INSERT INTO groups (group_id, fingerprint) VALUES (?, ?) "
+                "ON CONFLICT(group_id) DO UPDATE SET fingerprint = excluded.fingerprint",
+                (group_id, json.dumps(fingerprint) if fingerprint else None)
+            )
+        return count
+
+    def remove_group(self, group_id: str) -> None:
+        """Drop every document of one interview."""
+        with self._lock, self._conn:
+            self._delete_group(group_id)
+            self._conn.execute("DELETE FROM groups WHERE group_id = ?", (group_id,))
+
+    def sync(self, base_dir: str, extract: Callable[[str, Dict[str, Any]], Iterable[Document]]) -> int:
+        """Index new or changed <id>.json files in base_dir and drop deleted ones.
+
+        extract(interview_id, data) yields the documents of one file. Groups
+        indexed directly (without a fingerprint) are only replaced, never
+        dropped, by a sync. Returns the number of files (re)indexed or removed.
+        """
+        if not os.path.isdir(base_dir):
+            return 0
+
+        on_disk = {}
+        with os.scandir(base_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    on_disk[entry.name[:-len('.json')]] = [stat.st_mtime_ns, stat.st_size]
+
+        with self._lock:
+            known = {
+                group_id: json.loads(fingerprint) if fingerprint else None
+                for group_id, fingerprint in self._conn.execute("SELECT group_id, fingerprint FROM groups")
+            }
+
+            changed = 0
+            for group_id, fingerprint in known.items():
+                if fingerprint is not None and group_id not in on_disk:
+                    self.remove_group(group_id)
+                    changed += 1
+
+            for group_id, fingerprint in on_disk.items():
+                if known.get(group_id) == fingerprint:
+                    continue
+                file_path = os.path.join(base_dir, f"{group_id}.json")
+                try:
+                    with open(file_path, 'r') as f:
+                        data = json.load(f)
+                    self.replace_group(group_id, extract(group_id, data), fingerprint)
+                except Exception as e:
+                    logger.error(f"Error indexing {file_path}: {str(e)}")
+                    continue
+                changed += 1
+
+        if changed:
+            logger.info(f"Text index synced {changed} files from {base_dir}")
+        return changed
+
+    def search(self, query: str, limit: Optional[int] = 10, phrase: bool = False,
+               any_term: bool = False, snippet_window: int = 100) -> List[Dict[str, Any]]:
+        """BM25-ranked matches for query, best first.
+
+        Each hit has doc_id, group_id, fields, score (higher is better), the
+        character offsets of every match in the document (highlights), and a
+        snippet around the first match with its own match offsets.
+        """
+        match = build_match_query(query, phrase=phrase, any_term=any_term)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT d.doc_id, d.group_id, d.fields, bm25(documents_fts) AS rank, "
+            "highlight(documents_fts, 0, ?, ?) "
+            "FROM documents_fts JOIN documents d ON d.rowid = documents_fts.rowid "
+            "WHERE documents_fts MATCH ? ORDER BY rank"
+        )
+        params: List[Any] = [_MATCH_START, _MATCH_END, match]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.error(f"Error in text index search for {query!r}: {str(e)}")
+            return []
+
+        hits = []
+        for doc_id, group_id, fields, rank, marked in rows:
+            text, spans = _strip_highlights(marked)
+            snippet, snippet_spans = make_snippet(text, spans, snippet_window)
+            hits.append({
+                'doc_id': doc_id,
+                'group_id': group_id,
+                'fields': json.loads(fields),
+                'score': -float(rank),
+                'highlights': spans,
+                'snippet': snippet,
+                'snippet_highlights': snippet_spans
+            })
+        return hits
@@ -0,0 +1,206 @@
+"""
+Token-accurate, streaming transcript splitting.
+
+Word counts are a poor proxy for the 512-token inputs of the MiniLM and
+distilroberta models: punctuation, numbers and rare words take several word
+pieces each, so a word budget either leaves most of the window unused or
+overflows it. TranscriptSplitter counts tokens with the tokenizer of the model
+the chunks are fed to and yields chunks one at a time as (text, start, end),
+where text is transcript[start:end] verbatim.
+
+A chunk never ends inside a speaker turn unless that turn alone is over the
+limit; such a turn is split at sentence ends, and sentences that are still too
+long at the last word boundary under the limit. Consecutive chunks can share a
+configurable number of tokens of overlap, cut at a sentence or turn start.
+"""
+
+import logging
+import os
+import re
+from bisect import bisect_left
+from typing import Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Input limit of the MiniLM and distilroberta models, minus their two special tokens
+DEFAULT_MAX_TOKENS = 510
+DEFAULT_OVERLAP_TOKENS = int(os.getenv('TRANSCRIPT_OVERLAP_TOKENS', '0'))
+SPEAKER_PATTERN = r'\[.*?\]\s+'
+SENTENCE_END = r'(?<=[.!?])\s+'
+# Roughly one word piece per word or punctuation mark
+APPROXIMATE_TOKEN = r'\w+|[^\w\s]'
+
+TokenOffsets = Callable[[str], List[int]]
+
+
+def approximate_offsets(text: str) -> List[int]:
+    """Start offsets of the words and punctuation marks of text; used without a tokenizer."""
+    return [match.start() for match in re.finditer(APPROXIMATE_TOKEN, text)]
+
+
+def tokenizer_offsets(tokenizer) -> TokenOffsets:
+    """Start offsets of the tokens a Hugging Face tokenizer cuts text into.
+
+    Only fast tokenizers report offsets; any other falls back to
+    approximate_offsets.
+    """
+    if not getattr(tokenizer, 'is_fast', False):
+        logger.warning(f"{type(tokenizer).__name__} reports no token offsets, approximating token counts")
+        return approximate_offsets
+
+    def offsets(text: str) -> List[int]:
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+        return [start for start, end in encoding['offset_mapping'] if end > start]
+    return offsets
+
+
+def tokenizer_limit(tokenizer, default: int = DEFAULT_MAX_TOKENS) -> int:
+    """Tokens of text the model behind tokenizer accepts, special tokens excluded."""
+    length = getattr(tokenizer, 'model_max_length', None)
+    if not isinstance(length, int) or not 0 < length <= 100000:
+        # Some tokenizers report a huge placeholder instead of their limit
+        return default
+    try:
+        return length - tokenizer.num_special_tokens_to_add()
+    except Exception:
+        return length - 2
+
+
+def _strip(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class TranscriptSplitter:
+    def __init__(self, token_offsets: TokenOffsets = approximate_offsets, max_tokens: int = DEFAULT_MAX_TOKENS,
+                 overlap_tokens: int = DEFAULT_OVERLAP_TOKENS):
+        """
+        Args:
+            token_offsets: Start offsets of the tokens of a text (see tokenizer_offsets)
+            max_tokens: Most tokens in a chunk
+            overlap_tokens: Most tokens a chunk repeats from the end of the previous one
+        """
+        if max_tokens < 1 or not 0 <= overlap_tokens < max_tokens:
+            raise ValueError(f"Invalid chunk size {max_tokens} with overlap {overlap_tokens}")
+        self.token_offsets = token_offsets
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    @classmethod
+    def for_tokenizer(cls, tokenizer, max_tokens: Optional[int] = None,
+                      overlap_tokens: int = DEFAULT_OVERLAP_TOKENS) -> 'TranscriptSplitter':
+        """Splitter counting with tokenizer; max_tokens defaults to the model's input limit."""
+        return cls(tokenizer_offsets(tokenizer), max_tokens or tokenizer_limit(tokenizer), overlap_tokens)
+
+    def count(self, text: str) -> int:
+        """Tokens of text."""
+        return len(self.token_offsets(text))
+
+    def split_texts(self, transcript: str) -> Iterator[str]:
+        """Chunk texts of transcript, one at a time."""
+        for text, _, _ in self.split(transcript):
+            yield text
+
+    def split(self, transcript: str) -> Iterator[Tuple[str, int, int]]:
+        """Chunks of transcript as (text, start, end), in document order.
+
+        The transcript is tokenized one speaker turn (or paragraph) at a time
+        as the chunks are consumed.
+        """
+        # Token start offsets from the start of the chunk being built (or its overlap) on
+        tokens: List[int] = []
+        pieces: List[Tuple[int, int]] = []
+
+        def count(start: int, end: int) -> int:
+            return bisect_left(tokens, end) - bisect_left(tokens, start)
+
+        def flush() -> Iterator[Tuple[str, int, int]]:
+            if not pieces:
+                return
+            start, end = pieces[0][0], pieces[-1][1]
+            yield transcript[start:end], start, end
+            pieces.clear()
+            overlap = self._overlap_start(transcript, tokens, start, end)
+            if overlap is not None:
+                pieces.append((overlap, end))
+            del tokens[:bisect_left(tokens, pieces[0][0] if pieces else end)]
+
+        def add(piece: Tuple[int, int]) -> Iterator[Tuple[str, int, int]]:
+            if pieces and count(pieces[0][0], piece[1]) > self.max_tokens:
+                yield from flush()
+                # Drop the overlap if it leaves no room for the piece
+                if pieces and count(pieces[0][0], piece[1]) > self.max_tokens:
+                    pieces.clear()
+            pieces.append(piece)
+
+        for unit_start, unit_end in self._units(transcript):
+            tokens.extend(unit_start + offset for offset in self.token_offsets(transcript[unit_start:unit_end]))
+            start, end = _strip(transcript, unit_start, unit_end)
+            if start == end:
+                continue
+            if count(start, end) <= self.max_tokens:
+                yield from add((start, end))
+                continue
+            # A turn over the limit starts and ends a chunk of its own
+            yield from flush()
+            for piece in self._split_long(transcript, tokens, start, end):
+                yield from add(piece)
+            yield from flush()
+        yield from flush()
+
+    @staticmethod
+    def _units(transcript: str) -> Iterator[Tuple[int, int]]:
+        """Consecutive spans covering transcript, each one speaker turn or, without speaker markers, one paragraph."""
+        if '[' in transcript and ']' in transcript:
+            boundaries = (match.start() for match in re.finditer(SPEAKER_PATTERN, transcript))
+        else:
+            boundaries = (match.end() for match in re.finditer(r'\n\n', transcript))
+        start = 0
+        for boundary in boundaries:
+            if boundary > start:
+                yield start, boundary
+                start = boundary
+        if start < len(transcript):
+            yield start, len(transcript)
+
+    def _split_long(self, transcript: str, tokens: List[int], start: int, end: int) -> List[Tuple[int, int]]:
+        """Sentences of transcript[start:end], sentences over the limit cut at word boundaries."""
+        pieces = []
+        sentence_start = start
+        ends = [(match.start(), match.end()) for match in re.finditer(SENTENCE_END, transcript[start:end])]
+        for sentence_end, next_start in [(start + a, start + b) for a, b in ends] + [(end, end)]:
+            first = bisect_left(tokens, sentence_start)
+            last = bisect_left(tokens, sentence_end)
+            while last - first > self.max_tokens:
+                cut = tokens[first + self.max_tokens]
+                # Cut at the last whitespace before the first token that does not fit
+                space = max(transcript.rfind(' ', tokens[first], cut), transcript.rfind('\n', tokens[first], cut))
+                if space > tokens[first]:
+                    cut = space
+                pieces.append(_strip(transcript, tokens[first], cut))
+                first = bisect_left(tokens, _strip(transcript, cut, sentence_end)[0])
+            if first < last:
+                pieces.append(_strip(transcript, tokens[first], sentence_end))
+            sentence_start = next_start
+        return pieces
+
+    def _overlap_start(self, transcript: str, tokens: List[int], start: int, end: int) -> Optional[int]:
+        """Start of the overlap the chunk after transcript[start:end] begins with; None for no overlap.
+
+        The overlap starts at the first sentence or turn start within the last
+        overlap_tokens tokens of the chunk.
+        """
+        if not self.overlap_tokens:
+            return None
+        last = bisect_left(tokens, end)
+        first = max(bisect_left(tokens, start) + 1, last - self.overlap_tokens)
+        if first >= last:
+            return None
+        boundary = re.search(r'(?:[.!?]\s+|\n)(?=\S)', transcript[tokens[first] - 1:end])
+        if boundary is None:
+            return None
+        overlap = tokens[first] - 1 + boundary.end()
+        return overlap if overlap < end else None
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+
+class LetterModel:
+    """Bag-of-letters encoder standing in for MiniLM, so tests don't need to download a transformer."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def get_sentence_embedding_dimension(self):
+        return 26
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False):
+        single = isinstance(texts, str)
+        vectors = []
+        for text in ([texts] if single else texts):
+            self.encoded += 1
+            vector = np.zeros(26, dtype=np.float32)
+            for char in text.lower():
+                if 'a' <= char <= 'z':
+                    vector[ord(char) - ord('a')] += 1
+            norm = np.linalg.norm(vector)
+            vectors.append(vector / norm if norm else vector)
+        return vectors[0] if single else np.array(vectors)
+
+
+@pytest.fixture
+def letter_model():
+    return LetterModel()
+
+
+class FakeChatAPI:
+    """chat.completions stand-in recording every request; content is a string or a function of the request."""
+
+    def __init__(self, content):
+        self.content = content
+        self.requests = []
+
+    @property
+    def client(self):
+        return SimpleNamespace(chat=SimpleNamespace(completions=self))
+
+    @property
+    def prompts(self):
+        return [request['messages'][-1]['content'] for request in self.requests]
+
+    def create(self, **request):
+        self.requests.append(request)
+        content = self.content(request) if callable(self.content) else self.content
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def fake_chat():
+    """Builds FakeChatAPIs: fake_chat('answer').client is an OpenAI client that always says 'answer'."""
+    return FakeChatAPI
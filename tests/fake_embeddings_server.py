@@ -0,0 +1,134 @@
+"""
+Local OpenAI-compatible /v1/embeddings server for tests and benchmarks.
+
+Vectors are derived from a hash of each input, so the same text always gets
+the same embedding. Latency, rate-limit (429) and server (500) failures can be
+injected, and the server records request counts and peak concurrency.
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def fake_embedding(text: str, dimension: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype('float32')
+    return vector / np.linalg.norm(vector)
+
+
+class FakeEmbeddingsServer:
+    def __init__(self, dimension: int = 1536, latency: float = 0.0, fail_every: int = 0,
+                 server_error_every: int = 0):
+        """
+        Args:
+            dimension: Length of the returned vectors
+            latency: Seconds each request takes
+            fail_every: Answer every n-th request with 429 (0 disables)
+            server_error_every: Answer every n-th request with 500 (0 disables)
+        """
+        self.dimension = dimension
+        self.latency = latency
+        self.fail_every = fail_every
+        self.server_error_every = server_error_every
+        self.requests = 0
+        self.failures = 0
+        self.inputs = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> 'FakeEmbeddingsServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeEmbeddingsServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _reply(self, status, body, headers=None):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                if not self.path.endswith('/embeddings'):
+                    self._reply(404, {'error': {'message': 'not found'}})
+                    return
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                with server._lock:
+                    server.requests += 1
+                    number = server.requests
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    if server.fail_every and number % server.fail_every == 0:
+                        with server._lock:
+                            server.failures += 1
+                        self._reply(429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit'}},
+                                    {'Retry-After': '0'})
+                        return
+                    if server.server_error_every and number % server.server_error_every == 0:
+                        with server._lock:
+                            server.failures += 1
+                        self._reply(500, {'error': {'message': 'Internal error', 'type': 'server_error'}})
+                        return
+
+                    inputs = request['input']
+                    inputs = [inputs] if isinstance(inputs, str) else inputs
+                    dimension = request.get('dimensions') or server.dimension
+                    data = []
+                    for i, text in enumerate(inputs):
+                        vector = fake_embedding(text, dimension)
+                        if request.get('encoding_format') == 'base64':
+                            embedding = base64.b64encode(vector.tobytes()).decode('ascii')
+                        else:
+                            embedding = vector.tolist()
+                        data.append({'object': 'embedding', 'index': i, 'embedding': embedding})
+                    with server._lock:
+                        server.inputs += len(inputs)
+                    tokens = sum(len(text.split()) for text in inputs)
+                    self._reply(200, {
+                        'object': 'list',
+                        'data': data,
+                        'model': request.get('model'),
+                        'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+                    })
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+        return Handler
@@ -0,0 +1,93 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from daria_interview_tool import chunk_embedding_index
+from daria_interview_tool.chunk_embedding_index import ChunkEmbeddingIndex, top_k
+
+
+def write_interview(base_dir, interview_id, texts):
+    data = {'chunks': [{'chunk_id': f"{interview_id}_{i}", 'content': text} for i, text in enumerate(texts)]}
+    with open(os.path.join(base_dir, f"{interview_id}.json"), 'w') as f:
+        json.dump(data, f)
+    return data
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    return str(tmp_path / 'index')
+
+
+def test_sync_embeds_each_chunk_once(tmp_path, index_dir, letter_model):
+    write_interview(str(tmp_path), 'a', ['zzz zzz', 'apple pie'])
+    write_interview(str(tmp_path), 'b', ['banana bread'])
+    index = ChunkEmbeddingIndex(index_dir, letter_model, 'fake')
+
+    assert index.sync(str(tmp_path)) == 2
+    assert len(index) == 3
+    assert letter_model.encoded == 3
+
+    # Unchanged files are not re-embedded, and a reopened index is reused
+    assert index.sync(str(tmp_path)) == 0
+    reopened = ChunkEmbeddingIndex(index_dir, letter_model, 'fake')
+    assert reopened.sync(str(tmp_path)) == 0
+    assert letter_model.encoded == 3
+
+    row, score = reopened.search('zzz', k=1)[0]
+    assert row['chunk_id'] == 'a_0'
+    assert score == pytest.approx(1.0)
+
+
+def test_update_and_remove_keep_offsets_consistent(tmp_path, index_dir, letter_model):
+    index = ChunkEmbeddingIndex(index_dir, letter_model, 'fake')
+    index.update_interview('a', write_interview(str(tmp_path), 'a', ['aaa', 'bbb']))
+    index.update_interview('b', write_interview(str(tmp_path), 'b', ['ccc']))
+    index.update_interview('a', write_interview(str(tmp_path), 'a', ['ddd']))
+
+    assert [row['chunk_id'] for row in index.rows] == ['b_0', 'a_0']
+    assert index.interviews['b'] == {'start': 0, 'count': 1}
+    assert index.interviews['a'] == {'start': 1, 'count': 1}
+    assert index.search('ddd', k=1)[0][0]['interview_id'] == 'a'
+
+    index.remove_interview('b')
+    assert [row['chunk_id'] for row in index.rows] == ['a_0']
+    assert index.search('ccc', k=5, min_score=0.5) == []
+
+
+def test_model_change_discards_index(tmp_path, index_dir, letter_model):
+    index = ChunkEmbeddingIndex(index_dir, letter_model, 'fake')
+    index.update_interview('a', write_interview(str(tmp_path), 'a', ['aaa']))
+
+    assert len(ChunkEmbeddingIndex(index_dir, letter_model, 'other-model')) == 0
+
+
+def test_backend_change_discards_index(tmp_path, index_dir, letter_model):
+    index = ChunkEmbeddingIndex(index_dir, letter_model, 'fake')
+    index.update_interview('a', write_interview(str(tmp_path), 'a', ['aaa']))
+
+    assert len(ChunkEmbeddingIndex(index_dir, letter_model, 'fake', backend='torch')) == 1
+    assert len(ChunkEmbeddingIndex(index_dir, letter_model, 'fake', backend='onnx')) == 0
+
+
+def test_failed_write_keeps_serving_the_previous_index(tmp_path, index_dir, monkeypatch, letter_model):
+    index = ChunkEmbeddingIndex(index_dir, letter_model, 'fake')
+    index.update_interview('a', write_interview(str(tmp_path), 'a', ['aaa']))
+
+    def disk_full(src, dst):
+        raise OSError('No space left on device')
+
+    monkeypatch.setattr(chunk_embedding_index.os, 'replace', disk_full)
+    with pytest.raises(OSError):
+        index.update_interview('b', write_interview(str(tmp_path), 'b', ['bbb']))
+
+    assert [row['chunk_id'] for row in index.rows] == ['a_0']
+    assert index.search('aaa', k=1)[0][0]['interview_id'] == 'a'
+
+
+def test_top_k_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+
+    assert list(top_k(scores, 2)) == [1, 3]
+    assert list(top_k(scores, None, min_score=0.4)) == [1, 3, 2]
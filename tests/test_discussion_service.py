@@ -0,0 +1,132 @@
+import json
+import sqlite3
+
+import pytest
+
+from langchain_features.services.discussion_service import DiscussionService
+from langchain_features.services.discussion_store import (
+    JsonDiscussionStore,
+    SqliteDiscussionStore,
+    migrate_json_to_sqlite,
+)
+
+
+@pytest.fixture
+def service(tmp_path):
+    return DiscussionService(data_dir=str(tmp_path / "discussions"), backend="json")
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def any_service(request, tmp_path):
+    return DiscussionService(data_dir=str(tmp_path / "discussions"), backend=request.param)
+
+
+@pytest.fixture
+def session_id(service):
+    guide_id = service.create_guide({"title": "Checkout research"})
+    return service.create_session(guide_id, {"name": "Sam"})
+
+
+def test_add_message_appends_to_log_without_rewriting_snapshot(service, session_id):
+    snapshot_path = service.sessions_dir / f"{session_id}.json"
+    snapshot_before = snapshot_path.read_text()
+
+    service.add_message_to_session(session_id, "Hello, I'm Daria.", "assistant")
+    service.add_message_to_session(session_id, "Hi!", "user")
+
+    assert snapshot_path.read_text() == snapshot_before
+    log_lines = service.store.message_log_path(session_id).read_text().splitlines()
+    assert [json.loads(line)["content"] for line in log_lines] == ["Hello, I'm Daria.", "Hi!"]
+
+    session = service.get_session(session_id)
+    assert [m["content"] for m in session["messages"]] == ["Hello, I'm Daria.", "Hi!"]
+    assert session["transcript"] == "\n\nModerator: Hello, I'm Daria.\n\nParticipant: Hi!"
+    assert service.get_messages(session_id) == session["messages"]
+
+
+def test_compaction_folds_log_into_snapshot(service, session_id, monkeypatch):
+    monkeypatch.setattr(JsonDiscussionStore, "MESSAGE_LOG_COMPACT_BYTES", 200)
+
+    for i in range(10):
+        service.add_message_to_session(session_id, f"message {i}", "user")
+
+    with open(service.sessions_dir / f"{session_id}.json") as f:
+        snapshot = json.load(f)
+    assert len(snapshot["messages"]) >= 1
+    assert [m["content"] for m in service.get_messages(session_id)] == [f"message {i}" for i in range(10)]
+
+
+def test_full_session_save_keeps_messages_logged_after_load(any_service):
+    session_id = any_service.create_session(any_service.create_guide({"title": "Onboarding"}))
+    any_service.add_message_to_session(session_id, "first", "user")
+    stale = any_service.get_session(session_id)
+    any_service.add_message_to_session(session_id, "second", "user")
+
+    stale["character"] = "thomas"
+    assert any_service.update_session(session_id, stale)
+
+    session = any_service.get_session(session_id)
+    assert session["character"] == "thomas"
+    assert [m["content"] for m in session["messages"]] == ["first", "second"]
+    assert session["transcript"].count("Participant:") == 2
+
+
+def test_delete_session_removes_message_log(service, session_id):
+    service.add_message_to_session(session_id, "bye", "user")
+
+    assert service.delete_session(session_id)
+    assert not service.store.message_log_path(session_id).exists()
+    assert not service.add_message(session_id, {"role": "user", "content": "late"})
+
+
+def test_query_sessions_pages_with_cursor_and_filters(any_service):
+    guide_a = any_service.create_guide({"title": "A"})
+    guide_b = any_service.create_guide({"title": "B"})
+    any_service.update_guide(guide_b, {"status": "archived"})
+    created = [any_service.create_session(guide_a) for _ in range(5)]
+    other = any_service.create_session(guide_b)
+    any_service.update_session(created[0], {"status": "completed"})
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = any_service.query_sessions(guide_id=guide_a, order_by="created_at", limit=2, cursor=cursor)
+        assert len(page) <= 2
+        seen.extend(s["id"] for s in page)
+        if cursor is None:
+            break
+    assert seen == list(reversed(created))
+
+    completed, _ = any_service.query_sessions(status="completed")
+    assert [s["id"] for s in completed] == [created[0]]
+    assert other in [s["id"] for s in any_service.get_all_sessions()]
+    assert [g["id"] for g in any_service.list_guides(active_only=True)] == [guide_a]
+
+
+def test_migrate_json_to_sqlite(tmp_path, service, session_id):
+    service.add_message_to_session(session_id, "logged only", "user")
+
+    counts = migrate_json_to_sqlite(service.data_dir)
+    assert counts == {"guides": 1, "sessions": 1, "messages": 1}
+
+    migrated = DiscussionService(data_dir=str(service.data_dir), backend="sqlite")
+    assert isinstance(migrated.store, SqliteDiscussionStore)
+    assert [m["content"] for m in migrated.get_messages(session_id)] == ["logged only"]
+    guide_id = migrated.get_session(session_id)["guide_id"]
+    assert [s["id"] for s in migrated.list_guide_sessions(guide_id)] == [session_id]
+
+    conn = sqlite3.connect(str(migrated.store.db_path))
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_sessions_with_new_messages_list_first(any_service):
+    guide_id = any_service.create_guide({"title": "Ordering"})
+    first = any_service.create_session(guide_id, {"name": "A"})
+    second = any_service.create_session(guide_id, {"name": "B"})
+    assert [s["id"] for s in any_service.get_all_sessions()] == [second, first]
+
+    any_service.add_message_to_session(first, "Hello again", "user")
+
+    assert [s["id"] for s in any_service.get_all_sessions()] == [first, second]
+    page, cursor = any_service.query_sessions(limit=1)
+    assert [s["id"] for s in page] == [first] and cursor
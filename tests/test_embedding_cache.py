@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+
+from daria_interview_tool.embedding_cache import EmbeddingCache
+from daria_interview_tool.vector_store import CustomEmbeddings
+
+
+class FakeEmbeddingsAPI:
+    def __init__(self):
+        self.inputs = []
+
+    def create(self, model, input):
+        self.inputs.append(list(input))
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=[float(len(text)), 1.0])
+                                    for i, text in enumerate(input)])
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache.db'), memory_entries=1, max_entries=2)
+    cache.put_many('m', 2, ['a', 'b'], [[1.0, 0.0], [0.0, 1.0]])
+    assert cache.get_many('m', 2, ['a']) == [[1.0, 0.0]]
+    cache.put_many('m', 2, ['c'], [[1.0, 1.0]])
+
+    assert len(cache) == 2
+    assert cache.get_many('m', 2, ['b', 'a', 'x']) == [None, [1.0, 0.0], None]
+    # Another model or dimension never shares vectors
+    assert cache.get_many('other', 2, ['a']) == [None]
+    assert cache.stats()['hits'] == 2
+
+
+def test_only_misses_are_sent_to_the_api(tmp_path):
+    embeddings = CustomEmbeddings(api_key='test', cache_path=str(tmp_path / 'cache.db'))
+    api = FakeEmbeddingsAPI()
+    embeddings.client = SimpleNamespace(embeddings=api)
+
+    first = embeddings.embed_documents(['one', 'three', 'one'])
+    assert api.inputs == [['one', 'three']]
+    assert first[0] == first[2] == [3.0, 1.0]
+
+    assert embeddings.embed_documents(['three', 'four']) == [[5.0, 1.0], [4.0, 1.0]]
+    assert api.inputs[-1] == ['four']
+
+    # A new process reads the vectors back from disk
+    reopened = CustomEmbeddings(api_key='test', cache_path=str(tmp_path / 'cache.db'))
+    reopened.client = SimpleNamespace(embeddings=api)
+    assert reopened.embed_query('four') == [4.0, 1.0]
+    assert len(api.inputs) == 2
+    assert reopened.cache_stats()['hits'] == 1
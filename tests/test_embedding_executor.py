@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from daria_interview_tool.embedding_executor import EmbeddingExecutor, TokenBucket, token_batches
+from daria_interview_tool.vector_store import CustomEmbeddings
+from tests.fake_embeddings_server import FakeEmbeddingsServer, fake_embedding
+
+
+def test_token_batches_respect_token_and_item_limits():
+    assert token_batches([5, 5, 5, 20, 1], max_tokens=10, max_items=10) == [(0, 2), (2, 3), (3, 4), (4, 5)]
+    assert token_batches([1] * 5, max_tokens=100, max_items=2) == [(0, 2), (2, 4), (4, 5)]
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(tokens_per_minute=600)
+    assert bucket.acquire(600) == 0.0
+    assert bucket.acquire(5) > 0.4
+
+
+def test_concurrent_batches_retry_and_keep_input_order(tmp_path):
+    texts = [f"interview sentence number {i}" for i in range(300)]
+    with FakeEmbeddingsServer(dimension=1536, latency=0.02, fail_every=4, server_error_every=7) as server:
+        embeddings = CustomEmbeddings(api_key='test', cache_path=str(tmp_path / 'cache.db'), base_url=server.url)
+        embeddings.executor = EmbeddingExecutor(embeddings._embed_batch, max_concurrency=4,
+                                                max_batch_tokens=200, backoff_base=0.01)
+        vectors = embeddings.embed_documents(texts)
+
+    assert server.failures > 0 and server.max_in_flight > 1
+    assert len(vectors) == len(texts)
+    for text, vector in zip(texts, vectors):
+        assert np.allclose(vector, fake_embedding(text, 1536))
+
+
+def test_non_retryable_errors_fail_fast():
+    class BadRequest(Exception):
+        status_code = 400
+
+    calls = []
+
+    def embed_batch(texts):
+        calls.append(texts)
+        raise BadRequest("invalid input")
+
+    with pytest.raises(BadRequest):
+        EmbeddingExecutor(embed_batch, max_concurrency=1).embed(["a"])
+    assert len(calls) == 1
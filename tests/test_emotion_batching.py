@@ -0,0 +1,47 @@
+from daria_interview_tool.emotion_batching import classify_emotions, emotion_text, top_emotion
+
+
+class FakeClassifier:
+    """Stands in for a text-classification pipeline; labels each text by its first word."""
+
+    def __init__(self, all_scores=False, fail_on=None):
+        self.all_scores = all_scores
+        self.fail_on = fail_on
+        self.calls = []
+
+    def _label(self, text):
+        if text == self.fail_on:
+            raise RuntimeError("bad input")
+        label = {'label': text.split()[0], 'score': 0.9}
+        return [label, {'label': 'other', 'score': 0.1}] if self.all_scores else label
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append((inputs, kwargs))
+        if isinstance(inputs, str):
+            return [self._label(inputs)]
+        return [self._label(text) for text in inputs]
+
+
+def test_batches_sorted_by_length_and_returned_in_order():
+    classifier = FakeClassifier()
+    texts = ['joy ' * 5, '', 'anger', 'fear ' * 3, '  ', 'sadness ' * 9]
+    results = classify_emotions(classifier, texts, batch_size=2, max_length=128)
+
+    assert [r['label'] for r in results] == ['joy', 'neutral', 'anger', 'fear', 'neutral', 'sadness']
+    batches = [inputs for inputs, _ in classifier.calls]
+    assert [[text.split()[0] for text in batch] for batch in batches] == [['anger', 'fear'], ['joy', 'sadness']]
+    assert all(kwargs['truncation'] and kwargs['max_length'] == 128 for _, kwargs in classifier.calls)
+
+
+def test_all_scores_outputs_and_failed_batches():
+    classifier = FakeClassifier(all_scores=True, fail_on='surprise')
+    results = classify_emotions(classifier, ['joy', 'surprise', 'anger'], batch_size=8)
+    assert results == [{'label': 'joy', 'score': 0.9}, {'label': 'neutral', 'score': 0.0},
+                       {'label': 'anger', 'score': 0.9}]
+    assert classify_emotions(None, ['joy']) == [{'label': 'neutral', 'score': 0.0}]
+    assert top_emotion([]) == {'label': 'neutral', 'score': 0.0}
+
+
+def test_emotion_text_uses_participant_answer():
+    assert emotion_text('[Interviewer] How was it? [Participant] Great [laughs] really') == 'Great  really'
+    assert emotion_text('no markers') == 'no markers'
@@ -0,0 +1,70 @@
+import json
+import os
+
+from daria_interview_tool.facet_index import FacetIndex, chunk_facets
+
+
+def interview(*chunks):
+    return {'metadata': {'date': '2024-01-01'}, 'chunks': list(chunks)}
+
+
+def test_chunk_facets_collects_and_normalizes_tags():
+    rows = chunk_facets('a', interview(
+        {'emotion': 'Frustration', 'emotion_intensity': 3, 'themes': ['Checkout  Flow'],
+         'analysis': {'themes': ['checkout flow', None], 'insight_tags': ['Pain Point']},
+         'entries': [{'timestamp': '00:01', 'text': 'hi'}]},
+        {'metadata': {'emotion': 'joy', 'emotion_intensity': '0.2', 'themes': 'not a list'}},
+    ))
+    assert rows == [
+        ('a', 0, 'emotion', 'frustration', 1.0, '00:01'),
+        ('a', 0, 'insight_tag', 'pain point', 1.0, '00:01'),
+        ('a', 0, 'theme', 'checkout flow', 1.0, '00:01'),
+        ('a', 1, 'emotion', 'joy', 0.2, '2024-01-01'),
+    ]
+
+
+def test_lookup_orders_and_counts(tmp_path):
+    index = FacetIndex(str(tmp_path / 'index.db'))
+    index.replace_group('a', chunk_facets('a', interview(
+        {'emotion': 'joy', 'emotion_intensity': 0.4, 'timestamp': '1', 'themes': ['checkout flow']},
+        {'emotion': 'joy', 'emotion_intensity': 0.9, 'timestamp': '3', 'themes': ['checkout speed', 'flow']},
+    )))
+    index.replace_group('b', chunk_facets('b', interview(
+        {'emotion': 'anger', 'timestamp': '2', 'themes': ['onboarding flow'], 'insight_tags': ['bug']},
+    )))
+
+    assert [(hit['interview_id'], hit['chunk_index']) for hit in index.lookup('emotion', ['JOY'])] == \
+        [('a', 1), ('a', 0)]
+    assert [hit['intensity'] for hit in index.lookup('emotion', ['anger'])] == [0.5]
+    assert [hit['interview_id'] for hit in index.lookup('insight_tag', ['bug'], order='timestamp')] == ['b']
+
+    assert [row['value'] for row in index.values('theme', match='check', prefix=True)] == \
+        ['checkout flow', 'checkout speed']
+    themes = [row['value'] for row in index.values('theme', match='flow')]
+    assert sorted(themes) == ['checkout flow', 'flow', 'onboarding flow']
+    hits = index.lookup('theme', themes, order='timestamp', limit=2)
+    assert [hit['timestamp'] for hit in hits] == ['3', '2']
+
+    assert index.values('emotion') == [{'value': 'joy', 'count': 2}, {'value': 'anger', 'count': 1}]
+    index.remove_group('a')
+    assert index.values('emotion') == [{'value': 'anger', 'count': 1}]
+    assert index.lookup('theme', ['checkout flow']) == []
+
+
+def test_sync_follows_directory(tmp_path):
+    path = tmp_path / 'a.json'
+    path.write_text(json.dumps(interview({'emotion': 'joy'})))
+    index = FacetIndex(str(tmp_path / '.facet_index' / 'index.db'))
+
+    assert index.sync(str(tmp_path)) == 1
+    assert index.sync(str(tmp_path)) == 0
+    assert [row['value'] for row in index.values('emotion')] == ['joy']
+
+    path.write_text(json.dumps(interview({'emotion': 'anger'}, {'emotion': 'anger'})))
+    os.utime(path, ns=(1, 1))
+    assert index.sync(str(tmp_path)) == 1
+    assert index.values('emotion') == [{'value': 'anger', 'count': 2}]
+
+    path.unlink()
+    assert index.sync(str(tmp_path)) == 1
+    assert index.values('emotion') == []
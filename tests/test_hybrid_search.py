@@ -0,0 +1,50 @@
+from daria_interview_tool import processed_interview_store
+from daria_interview_tool.hybrid_search import hybrid_search, reciprocal_rank_fusion
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([['a', 'b', 'c'], ['c', 'a', 'd']])
+
+    assert [key for key, _ in fused] == ['a', 'c', 'b', 'd']
+    assert fused[0][1] == 1 / 61 + 1 / 62
+
+
+def test_hybrid_search_fuses_and_reranks(tmp_path, monkeypatch, letter_model):
+    monkeypatch.setattr(processed_interview_store, 'get_sentence_transformer', lambda name, backend=None: letter_model)
+    store = processed_interview_store.ProcessedInterviewStore(base_dir=str(tmp_path))
+    store.save_interview('i1', {'chunks': [
+        {'chunk_id': 'i1_0', 'content': 'Pricing page was confusing'},
+        {'chunk_id': 'i1_1', 'content': 'Loved the onboarding emails'},
+    ]})
+    store.save_interview('i2', {'chunks': [{'chunk_id': 'i2_0', 'content': 'Confusing pricing tiers everywhere'}]})
+
+    results, timings = hybrid_search(store, 'confusing pricing', k=2)
+    assert {r['chunk_id'] for r in results} == {'i1_0', 'i2_0'}
+    assert {'dense_ms', 'keyword_ms', 'fusion_ms', 'load_ms', 'total_ms'} <= set(timings)
+
+    def reverse_reranker(query, candidates, k):
+        for i, candidate in enumerate(candidates):
+            candidate['cross_score'] = float(i)
+        return sorted(candidates, key=lambda c: c['cross_score'], reverse=True)[:k]
+
+    reranked, timings = hybrid_search(store, 'confusing pricing', k=3, reranker=reverse_reranker, rerank_top_n=2)
+    assert [r['chunk_id'] for r in reranked[:2]] == [results[1]['chunk_id'], results[0]['chunk_id']]
+    assert 'text' not in reranked[0] and 'rerank_ms' in timings
+    # Reranked and unranked results stay on the RRF scale; the cross-encoder score is kept beside it
+    assert all(r['similarity'] == r['rrf_score'] for r in reranked)
+    assert [r.get('cross_score') for r in reranked] == [1.0, 0.0, None]
+
+
+def test_empty_text_query_lists_chunks_most_recent_first(tmp_path, monkeypatch, letter_model):
+    monkeypatch.setattr(processed_interview_store, 'get_sentence_transformer', lambda name, backend=None: letter_model)
+    store = processed_interview_store.ProcessedInterviewStore(base_dir=str(tmp_path))
+    store.save_interview('i1', {'chunks': [
+        {'chunk_id': 'i1_0', 'content': 'Pricing page was confusing', 'timestamp': '00:00:05'},
+        {'chunk_id': 'i1_1', 'content': 'Loved the onboarding emails', 'timestamp': '00:03:00'},
+    ]})
+    store.save_interview('i2', {'chunks': [
+        {'chunk_id': 'i2_0', 'content': 'Confusing pricing tiers', 'timestamp': '00:01:00'}
+    ]})
+
+    assert [r['chunk_id'] for r in store.text_search('')] == ['i1_1', 'i2_0', 'i1_0']
+    assert [r['chunk_id'] for r in store.text_search('', limit=1)] == ['i1_1']
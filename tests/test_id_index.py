@@ -0,0 +1,115 @@
+import json
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip('faiss')
+
+from daria_interview_tool.id_index import IdMappedIndex
+
+
+def unit(i, dimension=8):
+    vector = np.zeros(dimension, dtype='float32')
+    vector[i] = 1.0
+    return vector
+
+
+def test_remove_keeps_remaining_ids_stable():
+    index = IdMappedIndex(8)
+    index.add(['a', 'b', 'c'], [unit(0), unit(1), unit(2)])
+
+    assert index.remove(['a']) == 1
+    assert index.search([unit(2)], 1)[0][0] == ('c', 0.0)
+    assert np.array_equal(index.reconstruct('b'), unit(1))
+
+    # Re-adding a key replaces its vector instead of duplicating it
+    index.add(['b'], [unit(3)])
+    assert len(index) == 2
+    assert index.search([unit(3)], 2)[0][0][0] == 'b'
+
+
+def test_removals_are_tombstoned_and_compacted_in_batches(tmp_path):
+    index = IdMappedIndex(8)
+    keys = [f"k{i}" for i in range(200)]
+    index.add(keys, np.tile(unit(0), (200, 1)))
+    index.add(['near'], [unit(1)])
+
+    index.remove(keys[:40])
+    # Still in the index, but never returned
+    assert index.index.ntotal == 201 and len(index.tombstones) == 40
+    assert [key for key, _ in index.search([unit(0)], 200)[0]] == keys[40:] + ['near']
+
+    # Past COMPACT_MIN (and a quarter of the live vectors) they are dropped in one pass
+    index.remove(keys[40:70])
+    assert index.index.ntotal == 131 and not index.tombstones
+
+    index.remove(['near'])
+    index.write(str(tmp_path / 'index.faiss'))
+    assert index.index.ntotal == 130 and not index.tombstones
+
+
+def test_table_round_trip(tmp_path):
+    index = IdMappedIndex(8)
+    index.add(['a', 'b'], [unit(0), unit(1)])
+    index.remove(['a'])
+    faiss.write_index(index.index, str(tmp_path / 'index.faiss'))
+    table = json.loads(json.dumps(index.table()))
+
+    restored = IdMappedIndex.restore(faiss.read_index(str(tmp_path / 'index.faiss')), table)
+    restored.add(['c'], [unit(2)])
+    assert restored.key_to_id == {'b': 1, 'c': 2}
+    assert restored.search([unit(1)], 1)[0] == [('b', 0.0)]
+
+
+def test_positional_index_is_converted_without_reembedding():
+    flat = faiss.IndexFlatL2(8)
+    flat.add(np.stack([unit(0), unit(1), unit(2)]))
+
+    converted = IdMappedIndex.from_metadata(flat, {'interview_ids': ['a', 'b', 'c']})
+    assert converted.keys() == ['a', 'b', 'c']
+    assert np.array_equal(converted.reconstruct('c'), unit(2))
+
+
+def clustered(count, dimension=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((count, dimension)).astype('float32')
+
+
+@pytest.mark.parametrize('kind', ['ivfpq', 'hnsw'])
+def test_trained_index_searches_and_removes(kind):
+    vectors = clustered(2000)
+    index = IdMappedIndex(16)
+    index.add([f"k{i}" for i in range(len(vectors))], vectors)
+    index.train(kind)
+    index.tune(nprobe=16, ef_search=64)
+
+    exact = {key for key, _ in index.search(vectors[:1], 10, exact=True)[0]}
+    approx = {key for key, _ in index.search(vectors[:1], 10)[0]}
+    assert len(exact & approx) >= 5
+
+    index.remove(['k0'])
+    assert 'k0' not in [key for key, _ in index.search(vectors[:1], 10)[0]]
+    assert len(index.search(vectors[:1], 10)[0]) == 10
+
+
+def test_ann_config_round_trip(tmp_path):
+    vectors = clustered(500)
+    index = IdMappedIndex(16)
+    index.add([f"k{i}" for i in range(len(vectors))], vectors)
+    index.train('hnsw', {'hnsw_m': 16})
+    index.tune(ef_search=80)
+    index.remove(['k1'])
+    path = str(tmp_path / 'index.faiss')
+    index.write(path)
+    metadata = json.loads(json.dumps({'id_table': index.table()}))
+
+    restored = IdMappedIndex.read(path, metadata)
+    assert restored.ann is not None
+    assert restored.ann_config['search'] == {'ef_search': 80}
+    assert restored.ann_tombstones == 1
+    assert restored.search(vectors[2:3], 1)[0][0][0] == 'k2'
+
+    # Going back to flat removes the stale approximate index file
+    restored.train('flat')
+    restored.write(path)
+    assert not (tmp_path / 'index.faiss.ann').exists()
@@ -0,0 +1,54 @@
+import json
+import os
+
+from daria_interview_tool.interview_catalog import InterviewCatalog
+
+
+def summarize(interview_id, interview):
+    return {'id': interview_id, 'title': interview.get('title'), 'created_at': interview.get('created_at', '')}
+
+
+def write_interview(directory, interview_id, **fields):
+    with open(os.path.join(directory, f"{interview_id}.json"), 'w') as f:
+        json.dump(fields, f)
+    return fields
+
+
+def test_refresh_only_parses_changed_files(tmp_path):
+    calls = []
+
+    def counting_summarize(interview_id, interview):
+        calls.append(interview_id)
+        return summarize(interview_id, interview)
+
+    write_interview(str(tmp_path), 'a', title='A', created_at='2024-01-01')
+    write_interview(str(tmp_path), 'b', title='B', created_at='2024-02-01')
+    catalog = InterviewCatalog(str(tmp_path), counting_summarize)
+
+    assert [s['id'] for s in catalog.list()] == ['b', 'a']
+    assert sorted(calls) == ['a', 'b']
+
+    # A reopened catalog trusts the manifest for unchanged files
+    reopened = InterviewCatalog(str(tmp_path), counting_summarize)
+    assert reopened.refresh() == 0
+    assert len(calls) == 2
+
+    write_interview(str(tmp_path), 'a', title='A (edited)', created_at='2024-01-01')
+    os.remove(tmp_path / 'b.json')
+    assert [s['title'] for s in reopened.list()] == ['A (edited)']
+    assert calls[-1] == 'a'
+
+
+def test_update_and_remove(tmp_path):
+    catalog = InterviewCatalog(str(tmp_path), summarize)
+    data = write_interview(str(tmp_path), 'c', title='C')
+
+    assert catalog.update('c', data)
+    listed = catalog.list()
+    listed[0]['title'] = 'mutated by caller'
+    assert catalog.get('c')['title'] == 'C'
+
+    os.remove(tmp_path / 'c.json')
+    catalog.remove('c')
+    assert catalog.get('c') is None
+    assert InterviewCatalog(str(tmp_path), summarize).entries == {}
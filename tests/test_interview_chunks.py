@@ -0,0 +1,66 @@
+import zlib
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip('faiss')
+
+from daria_interview_tool.interview_chunks import aggregate_chunk_scores, chunk_key, split_chunk_key
+from daria_interview_tool.vector_store import InterviewVectorStore
+
+
+class BagOfWordsAPI:
+    """Embeds texts as normalized word-count vectors, so shared words mean nearby vectors."""
+
+    def create(self, model, input):
+        data = []
+        for i, text in enumerate(input):
+            vector = np.zeros(1536, dtype='float32')
+            for word in text.lower().split():
+                vector[zlib.crc32(word.strip('.,?:').encode()) % 1536] += 1.0
+            data.append(SimpleNamespace(index=i, embedding=(vector / max(np.linalg.norm(vector), 1.0)).tolist()))
+        return SimpleNamespace(data=data)
+
+
+def interview(interview_id, *responses):
+    return {
+        'id': interview_id,
+        'project_name': 'Travel',
+        'interview_type': 'Discovery',
+        'transcript': '\n'.join(f"Daria: Tell me more.\nYou: {response}" for response in responses)
+    }
+
+
+def test_chunk_keys_and_aggregation():
+    assert split_chunk_key(chunk_key('a#b', 3)) == ('a#b', 3)
+
+    matches = [('a#0', 0.9), ('b#0', 0.8), ('b#1', 0.8), ('a#1', 0.1)]
+    assert [r['interview_id'] for r in aggregate_chunk_scores(matches, 'max')] == ['a', 'b']
+    assert [r['interview_id'] for r in aggregate_chunk_scores(matches, 'mean')] == ['b', 'a']
+    assert aggregate_chunk_scores(matches, 'max', passages=1)[0]['passages'] == [('a#0', 0.9)]
+
+
+def test_search_returns_passages_without_reading_interview_files(tmp_path, monkeypatch):
+    monkeypatch.setenv('EMBEDDING_CACHE_PATH', str(tmp_path / 'cache.db'))
+    monkeypatch.chdir(tmp_path)
+    store = InterviewVectorStore(openai_api_key='test', vector_store_path=str(tmp_path / 'store.faiss'))
+    store.embeddings.client = SimpleNamespace(embeddings=BagOfWordsAPI())
+    store.text_splitter._chunk_size, store.text_splitter._chunk_overlap = 60, 0
+
+    store.add_interviews([
+        interview('1', 'I book flights every week for work.', 'Hotels are booked by my assistant.'),
+        interview('2', 'I mostly cook at home with my family.', 'Groceries are delivered on Sundays.')
+    ])
+    assert len(store.interview_chunks['1']) > 1
+
+    results = store.semantic_search('book flights every week', k=2)
+    assert results[0]['id'] == '1'
+    assert 'flights' in results[0]['passages'][0]['text']
+
+    # Re-adding replaces every passage, removal drops them, and both survive a reload
+    store.add_interviews([interview('1', 'Trains are my favourite way to travel.')])
+    store.remove_interview('2')
+    reloaded = InterviewVectorStore(openai_api_key='test', vector_store_path=str(tmp_path / 'store.faiss'))
+    assert reloaded.interview_ids == ['1']
+    assert len(reloaded.index) == len(reloaded.chunk_payloads) == len(reloaded.interview_chunks['1'])
@@ -1,11 +1,12 @@
 import pytest
-from app import app as flask_app
+from app import create_app
 import json
 import uuid
 
 @pytest.fixture
 def client():
     """Create a test client for the Flask app."""
+    flask_app = create_app()
     flask_app.config['TESTING'] = True
     with flask_app.test_client() as client:
         yield client
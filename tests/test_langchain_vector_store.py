@@ -0,0 +1,83 @@
+import gc
+import time
+import weakref
+
+import pytest
+
+pytest.importorskip('faiss')
+
+from langchain_community.embeddings import FakeEmbeddings
+
+import vector_store
+from vector_store import VectorStore
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        return super().embed_query(text)
+
+
+def interview(interview_id, messages):
+    return {
+        'interview_id': interview_id,
+        'project': {'name': 'Travel', 'type': 'Discovery'},
+        'transcript': [
+            {'speaker': 'You', 'text': f"message {i} of {interview_id}", 'timestamp': str(i)}
+            for i in range(messages)
+        ]
+    }
+
+
+def test_batched_ingest_saves_once_and_delete_does_not_reembed(tmp_path, monkeypatch):
+    embeddings = CountingEmbeddings(size=32)
+    store = VectorStore(str(tmp_path / 'store'), embeddings=embeddings, save_delay=None)
+    saves = []
+    monkeypatch.setattr(store.vector_store, 'save_local', lambda path: saves.append(path))
+
+    with store.batch():
+        store.add_interviews([interview(f"i{n}", 100) for n in range(100)])
+        store.add_interview(interview('i0', 5))
+    assert len(store.doc_ids['i0']) == 5
+    assert saves == []
+
+    embeddings.calls = 0
+    started = time.perf_counter()
+    assert store.delete_interview('i1')
+    elapsed = time.perf_counter() - started
+    assert embeddings.calls == 0
+    assert elapsed < 0.5
+    assert 'i1' not in store.doc_ids
+    assert all(doc.metadata.get('interview_id') != 'i1' for doc in store.vector_store.docstore._dict.values())
+
+    store.flush()
+    assert len(saves) == 1
+
+
+def test_store_reloads_with_interview_ids(tmp_path):
+    path = str(tmp_path / 'store')
+    store = VectorStore(path, embeddings=FakeEmbeddings(size=32), save_delay=0)
+    store.add_interviews([interview('a', 3), interview('b', 2)])
+    store.delete_interview('a')
+
+    reloaded = VectorStore(path, embeddings=FakeEmbeddings(size=32))
+    assert list(reloaded.doc_ids) == ['b']
+    assert len(reloaded.doc_ids['b']) == 2
+
+
+def test_discarded_stores_are_freed_and_live_ones_flushed_at_exit(tmp_path, monkeypatch):
+    discarded = weakref.ref(VectorStore(str(tmp_path / 'old'), embeddings=FakeEmbeddings(size=8), save_delay=None))
+    gc.collect()
+    assert discarded() is None
+
+    store = VectorStore(str(tmp_path / 'live'), embeddings=FakeEmbeddings(size=8), save_delay=None)
+    flushed = []
+    monkeypatch.setattr(store, 'flush', lambda: flushed.append(store.index_path))
+    vector_store._flush_open_stores()
+    assert flushed == [str(tmp_path / 'live')]
@@ -0,0 +1,54 @@
+import json
+import time
+from daria_interview_tool.llm_cache import LLMCache, cached_chat_completion
+from daria_interview_tool.theme_extraction import ThemeExtractor
+
+
+def test_identical_requests_are_answered_once(tmp_path, fake_chat):
+    cache = LLMCache(str(tmp_path / 'llm.db'), max_temperature=0.5)
+    api = fake_chat('summary')
+    client = api.client
+    request = dict(model='gpt-4', messages=[{'role': 'user', 'content': 'Summarize'}], temperature=0.3)
+
+    assert cached_chat_completion(client, 'persona', cache=cache, **request) == 'summary'
+    assert cached_chat_completion(client, 'persona', cache=cache, **request) == 'summary'
+    assert len(api.requests) == 1
+    # A new template version, another temperature or a hot call site all reach the API
+    cached_chat_completion(client, 'persona', 2, cache=cache, **request)
+    cached_chat_completion(client, 'persona', cache=cache, **dict(request, temperature=0.2))
+    cached_chat_completion(client, 'report', cache=cache, **dict(request, temperature=0.7))
+    cached_chat_completion(client, 'report', cache=cache, **dict(request, temperature=0.7))
+    assert len(api.requests) == 5
+
+    stats = cache.stats()
+    assert stats['call_sites']['persona'] == {'hits': 1, 'misses': 3, 'bypassed': 0, 'hit_rate': 0.25}
+    assert stats['call_sites']['report']['bypassed'] == 2 and stats['entries'] == 3
+
+
+def test_expiry_eviction_and_rejected_responses(tmp_path):
+    cache = LLMCache(str(tmp_path / 'llm.db'), ttl_seconds=60, max_entries=2)
+    answer = lambda: 'not json'
+    assert cache.call('site', 'openai', 'm', 0, 'a', answer, accept=lambda text: json.loads(text)) == 'not json'
+    assert len(cache) == 0
+
+    for prompt in ('a', 'b', 'c'):
+        cache.call('site', 'openai', 'm', 0, prompt, lambda: prompt.upper())
+    assert len(cache) == 2
+    assert cache.call('site', 'openai', 'm', 0, 'a', lambda: 'again') == 'again'
+
+    cache._conn.execute("UPDATE responses SET created = ?", (time.time() - 120,))
+    assert cache.call('site', 'openai', 'm', 0, 'c', lambda: 'fresh') == 'fresh'
+
+
+def test_reanalysis_makes_no_requests(tmp_path, fake_chat):
+    api = fake_chat(json.dumps({'results': [
+        {'index': i, 'themes': ['pricing'], 'insight_tags': ['cost'], 'emotion_intensity': 2} for i in range(2)
+    ]}))
+    cache = LLMCache(str(tmp_path / 'llm.db'))
+    texts = ['It costs too much.', 'The price doubled.']
+
+    first = ThemeExtractor(api.client, cache=cache).extract_batch(texts)
+    # A new process opens the same cache file
+    again = ThemeExtractor(api.client, cache=LLMCache(str(tmp_path / 'llm.db'))).extract_batch(texts)
+
+    assert first == again and len(api.requests) == 1
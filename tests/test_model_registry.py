@@ -0,0 +1,62 @@
+import subprocess
+import sys
+import threading
+
+from daria_interview_tool import model_registry, onnx_backend
+
+
+def test_models_load_once_across_threads():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    key = ('test_model', 'fake-once')
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(model_registry._get_or_load(key, loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    stats = [entry for entry in model_registry.model_stats() if entry['name'] == 'fake-once']
+    assert stats and stats[0]['kind'] == 'test_model'
+    assert stats[0]['load_seconds'] >= 0
+
+
+def test_minilm_variants_share_one_model_only_when_enabled(monkeypatch):
+    monkeypatch.delenv('DARIA_SHARE_MINILM', raising=False)
+    assert model_registry.resolve_model_name('multi-qa-MiniLM-L6-cos-v1') == 'multi-qa-MiniLM-L6-cos-v1'
+
+    monkeypatch.setenv('DARIA_SHARE_MINILM', '1')
+    assert model_registry.resolve_model_name('multi-qa-MiniLM-L6-cos-v1') == model_registry.DEFAULT_SENTENCE_MODEL
+
+
+def test_onnx_backend_falls_back_to_torch(monkeypatch):
+    monkeypatch.setattr(onnx_backend, 'available', lambda: False)
+    assert model_registry.resolve_backend('onnx') == 'torch'
+    assert model_registry.resolve_backend('tensorrt') == 'torch'
+
+    monkeypatch.setattr(onnx_backend, 'available', lambda: True)
+    assert model_registry.resolve_backend('onnx') == 'onnx'
+
+
+def test_parity_measures():
+    reference = [[1.0, 0.0], [0.0, 2.0]]
+    agreement = onnx_backend.embedding_agreement(reference, [[1.0, 0.0], [0.0, 1.0]])
+    assert agreement['mean_cosine'] == agreement['min_cosine'] == 1.0
+    assert onnx_backend.embedding_agreement(reference, [[0.0, 1.0], [0.0, 1.0]])['mean_cosine'] == 0.5
+
+    labels = [{'label': 'joy'}, {'label': 'anger'}]
+    assert onnx_backend.label_agreement(labels, [{'label': 'joy'}, {'label': 'fear'}]) == 0.5
+
+
+def test_registry_import_loads_no_numerical_libraries():
+    # app.py imports the registry at startup; numpy and the ONNX backend wait for first use
+    code = ("import sys, daria_interview_tool.model_registry; "
+            "print(sorted(m for m in ('numpy', 'daria_interview_tool.onnx_backend') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == '[]'
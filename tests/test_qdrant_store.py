@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip('qdrant_client')
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from daria_interview_tool.qdrant_store import ensure_collection, point_id
+
+
+def test_collection_survives_restart_and_filters_by_emotion(tmp_path):
+    client = QdrantClient(path=str(tmp_path))
+    assert ensure_collection(client, 'chunks', size=4)
+    client.upsert('chunks', points=[
+        models.PointStruct(id=point_id(f"interview-1_{i}"), vector=[1.0, float(i), 0.0, 0.0],
+                           payload={'interview_id': 'interview-1', 'metadata': {'emotion': emotion}})
+        for i, emotion in enumerate(['joy', 'anger', 'joy'])
+    ])
+    client.close()
+
+    reopened = QdrantClient(path=str(tmp_path))
+    assert not ensure_collection(reopened, 'chunks', size=4)
+    points, _ = reopened.scroll('chunks', scroll_filter=models.Filter(must=[
+        models.FieldCondition(key='metadata.emotion', match=models.MatchValue(value='joy'))
+    ]), limit=10)
+    assert len(points) == 2
+
+    # A different embedding size cannot reuse the stored vectors
+    assert ensure_collection(reopened, 'chunks', size=8)
+    assert reopened.count('chunks').count == 0
+    reopened.close()
+
+
+def test_point_ids_are_stable():
+    assert point_id('42') == 42
+    assert point_id('interview_00:01') == point_id('interview_00:01') != point_id('interview_00:02')
@@ -0,0 +1,55 @@
+import json
+import os
+
+from daria_interview_tool.text_index import TextIndex, build_match_query, raw_interview_documents
+
+
+def write_interview(directory, interview_id, transcript):
+    with open(os.path.join(directory, f"{interview_id}.json"), 'w') as f:
+        json.dump({'id': interview_id, 'title': interview_id.upper(), 'transcript': transcript}, f)
+
+
+def test_build_match_query_never_passes_fts_syntax_through():
+    assert build_match_query('checkout flow', phrase=True) == '"checkout flow" *'
+    assert build_match_query('"checkout flow" slow* OR') == '"checkout flow" AND "slow" * AND "OR"'
+    assert build_match_query('"" *') == ''
+
+
+def test_phrase_search_ranks_and_highlights(tmp_path):
+    index = TextIndex(str(tmp_path / 'index.db'))
+    index.replace_group('a', [
+        ('a:0', 'The checkout flow was slow and the checkout flow kept failing.', {'chunk_index': 0}),
+        ('a:1', 'Flow of checkout was fine.', {'chunk_index': 1}),
+    ])
+    index.replace_group('b', [('b:0', 'Nothing about payments here.', {'chunk_index': 0})])
+    index.replace_group('c', [('c:0', 'Onboarding was confusing.', {'chunk_index': 0})])
+
+    hits = index.search('checkout flow', phrase=True)
+    assert [hit['doc_id'] for hit in hits] == ['a:0']
+    text = 'The checkout flow was slow and the checkout flow kept failing.'
+    assert [text[s:e] for s, e in hits[0]['highlights']] == ['checkout flow', 'checkout flow']
+
+    # Unquoted words only need to co-occur; prefixes match longer words
+    assert {hit['doc_id'] for hit in index.search('flow checkout')} == {'a:0', 'a:1'}
+    assert [hit['doc_id'] for hit in index.search('confus', phrase=True)] == ['c:0']
+
+    index.remove_group('a')
+    assert index.search('checkout') == []
+
+
+def test_sync_indexes_changed_files_only(tmp_path):
+    raw_dir = tmp_path / 'raw'
+    raw_dir.mkdir()
+    write_interview(str(raw_dir), 'one', 'Researcher: hi\nParticipant: pricing is confusing')
+    write_interview(str(raw_dir), 'two', [{'speaker': 'Participant', 'text': 'search works well'}])
+    index = TextIndex(str(tmp_path / 'index.db'))
+
+    assert index.sync(str(raw_dir), raw_interview_documents) == 2
+    assert index.sync(str(raw_dir), raw_interview_documents) == 0
+    hit = index.search('pricing', phrase=True)[0]
+    assert hit['fields']['title'] == 'ONE'
+    assert hit['snippet'][slice(*hit['snippet_highlights'][0])] == 'pricing'
+
+    os.remove(raw_dir / 'one.json')
+    assert index.sync(str(raw_dir), raw_interview_documents) == 1
+    assert [hit['group_id'] for hit in index.search('works')] == ['two']
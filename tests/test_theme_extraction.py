@@ -0,0 +1,47 @@
+import json
+import re
+
+import pytest
+
+from daria_interview_tool.theme_extraction import FALLBACK_ANALYSIS, ThemeExtractor, validate_analysis
+
+
+def analysis(theme, intensity=3):
+    return {'themes': [theme], 'insight_tags': [f'{theme} insight'], 'emotion_intensity': intensity}
+
+
+def answer_passages(request):
+    """Answers packed requests per passage; a passage containing 'bad' gets an invalid element."""
+    prompt = request['messages'][-1]['content']
+    passages = re.findall(r'Passage (\d+):\n(\w+)', prompt)
+    if passages:
+        results = [dict(analysis(text, 9 if text == 'bad' else 3), index=int(i)) for i, text in passages]
+        return json.dumps({'results': results})
+    return json.dumps(analysis(re.search(r'Text: (\w+)', prompt).group(1)))
+
+
+def test_validate_analysis_rules():
+    assert validate_analysis(analysis('pricing')) == analysis('pricing')
+    for invalid in ({'themes': ['a']}, analysis('a', 0), analysis('a', 'high'),
+                    {'themes': [], 'insight_tags': ['b'], 'emotion_intensity': 2}):
+        with pytest.raises(ValueError):
+            validate_analysis(invalid)
+
+
+def test_packs_chunks_and_retries_only_invalid_elements(fake_chat):
+    api = fake_chat(answer_passages)
+    extractor = ThemeExtractor(api.client, max_batch_items=3)
+    texts = ['pricing', 'bad', 'onboarding', 'search', 'export']
+
+    results = extractor.extract_batch(texts)
+
+    assert [r['themes'] for r in results] == [['pricing'], ['bad'], ['onboarding'], ['search'], ['export']]
+    # Two packed requests (3 + 2 chunks) and one retry for the invalid element
+    assert len(api.prompts) == 3
+    assert 'Text: bad' in api.prompts[-1]
+
+
+def test_unusable_single_answer_falls_back(fake_chat):
+    extractor = ThemeExtractor(fake_chat('not json').client)
+    assert extractor.extract_batch(['a', 'b']) == [FALLBACK_ANALYSIS, FALLBACK_ANALYSIS]
+    assert ThemeExtractor(None).extract('a')['themes'] == []
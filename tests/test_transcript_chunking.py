@@ -0,0 +1,81 @@
+import re
+
+from daria_interview_tool.transcript_splitter import TranscriptSplitter, approximate_offsets
+from scripts.process_transcripts import TranscriptProcessor
+
+TRANSCRIPT = ("[Interviewer] 00:00:01\nHow was checkout?\n\n"
+              "[Participant] 00:00:05\nIt was slow. Really slow! I lost my cart twice, which was annoying.\n\n"
+              "[Interviewer] 00:00:20\nWhy?")
+
+
+class FakeFastTokenizer:
+    """Word pieces of at most three characters, so counts differ from word counts."""
+    is_fast = True
+    model_max_length = 64
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False, verbose=True):
+        spans = [(m.start(), m.end()) for m in re.finditer(r'\w{1,3}|[^\w\s]', text)]
+        return {'input_ids': list(range(len(spans))), 'offset_mapping': spans}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+
+def test_chunks_stay_under_the_limit_and_end_at_turns():
+    splitter = TranscriptSplitter(max_tokens=20)
+    chunks = list(splitter.split(TRANSCRIPT))
+
+    assert all(TRANSCRIPT[start:end] == text and splitter.count(text) <= 20 for text, start, end in chunks)
+    assert [text for text, _, _ in chunks] == [
+        "[Interviewer] 00:00:01\nHow was checkout?",
+        # The answer alone is over the limit, so it is split at a sentence end
+        "[Participant] 00:00:05\nIt was slow. Really slow!",
+        "I lost my cart twice, which was annoying.",
+        "[Interviewer] 00:00:20\nWhy?",
+    ]
+
+
+def test_overlap_repeats_whole_sentences():
+    chunks = list(TranscriptSplitter(max_tokens=20, overlap_tokens=8).split_texts(TRANSCRIPT))
+    assert chunks == [
+        "[Interviewer] 00:00:01\nHow was checkout?",
+        "How was checkout?\n\n[Participant] 00:00:05\nIt was slow. Really slow!",
+        "It was slow. Really slow! I lost my cart twice, which was annoying.",
+        # No sentence starts within the last 8 tokens of the previous chunk
+        "[Interviewer] 00:00:20\nWhy?",
+    ]
+
+
+def test_tokenizer_counts_and_streaming():
+    splitter = TranscriptSplitter.for_tokenizer(FakeFastTokenizer())
+    assert splitter.max_tokens == 62
+    assert splitter.count("checkout") == 3 and len(approximate_offsets("checkout")) == 1
+
+    calls = []
+
+    def offsets(text):
+        calls.append(text)
+        return approximate_offsets(text)
+
+    chunks = TranscriptSplitter(offsets, max_tokens=20).split(TRANSCRIPT)
+    assert next(chunks)[0] == "[Interviewer] 00:00:01\nHow was checkout?"
+    # Only the turns needed for the first chunk have been tokenized
+    assert len(calls) == 2
+
+
+def test_repeated_answers_stay_with_their_own_chunk():
+    # "Yes." also occurs inside the first chunk; substring matching pulled the
+    # second chunk's entry into the first one
+    transcript = (
+        "[Interviewer] 00:00:01\n" + "word " * 200 + "?\n\n"
+        "[Participant] 00:01:00\nYes. I agree.\n\n"
+        "[Interviewer] 00:01:10\n" + "word " * 140 + "?\n\n"
+        "[Participant] 00:02:00\nYes."
+    )
+    processor = TranscriptProcessor.__new__(TranscriptProcessor)
+    processor.splitter = TranscriptSplitter(max_tokens=350)
+    chunks = processor.chunk_transcript(transcript)
+
+    assert [[entry['timestamp'] for entry in chunk['entries']] for chunk in chunks] == \
+        [['00:00:01', '00:01:00'], ['00:01:10', '00:02:00']]
+    assert chunks[1]['entries'][1] == {'speaker': 'Participant', 'timestamp': '00:02:00', 'text': 'Yes.'}
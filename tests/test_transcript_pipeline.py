@@ -0,0 +1,179 @@
+import json
+import threading
+
+from semantic_analysis import chunk_analysis
+
+from daria_interview_tool.transcript_splitter import TranscriptSplitter
+from scripts.process_transcripts import (ANALYSIS_VERSION, MANIFEST_NAME, TranscriptManifest, TranscriptProcessor,
+                                         format_report)
+
+TRANSCRIPT = "[Interviewer] 00:00:01\nHow was checkout?\n\n[Participant] 00:00:05\n{answer}\n"
+
+
+class FakeThemeExtractor:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def batches(self, texts):
+        return [(i, min(i + 2, len(texts))) for i in range(0, len(texts), 2)]
+
+    def extract_batch(self, texts):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            return [{'themes': ['checkout'], 'insight_tags': ['pain point'], 'emotion_intensity': 4} for _ in texts]
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeAnalyzer:
+    """Stands in for SemanticAnalyzer's models: labels a chunk 'anger' if it mentions 'slow'."""
+
+    def __init__(self, fail_on=None):
+        self.theme_extractor = FakeThemeExtractor()
+        self.fail_on = fail_on
+
+    def analyze_emotions_batch(self, texts, batch_size=16):
+        if self.fail_on and any(self.fail_on in text for text in texts):
+            raise RuntimeError("model failure")
+        return [{'label': 'anger' if 'slow' in text else 'joy', 'score': 0.9} for text in texts]
+
+    def analyze_chunks_batch(self, texts, batch_size=16):
+        return [chunk_analysis(text, emotion, analysis) for text, emotion, analysis in
+                zip(texts, self.analyze_emotions_batch(texts), self.theme_extractor.extract_batch(texts))]
+
+
+def make_processor(tmp_path, analyzer):
+    processor = TranscriptProcessor.__new__(TranscriptProcessor)
+    processor.semantic_analyzer = analyzer
+    processor.splitter = TranscriptSplitter()
+    processor.batch_size = 4
+    processor.raw_dir = str(tmp_path / 'raw')
+    processor.processed_dir = str(tmp_path / 'processed')
+    processor.analysis_version = ANALYSIS_VERSION
+    (tmp_path / 'raw').mkdir()
+    (tmp_path / 'processed').mkdir()
+    processor.manifest = TranscriptManifest(str(tmp_path / 'processed' / MANIFEST_NAME))
+    return processor
+
+
+def write_raw(tmp_path, name, answer):
+    transcript = TRANSCRIPT.format(answer=answer) if answer else ''
+    (tmp_path / 'raw' / f'{name}.json').write_text(json.dumps({'id': name, 'transcript': transcript}))
+
+
+def test_pipeline_processes_files_and_resumes_after_failures(tmp_path):
+    analyzer = FakeAnalyzer(fail_on='crash')
+    processor = make_processor(tmp_path, analyzer)
+    for i in range(5):
+        write_raw(tmp_path, f'i{i}', 'It was slow and it kept failing.')
+    write_raw(tmp_path, 'empty', '')
+    write_raw(tmp_path, 'broken', 'crash the model')
+
+    report = processor.process_all(llm_concurrency=2, queue_size=1)
+
+    assert report['processed'] == 5 and report['no_transcript'] == 1
+    assert [path.rsplit('/', 1)[-1] for path in report['failed']] == ['broken.json']
+    processed = json.loads((tmp_path / 'processed' / 'i0.json').read_text())
+    analysis = processed['chunks'][0]['analysis']
+    assert analysis['emotion'] == 'anger' and analysis['themes'] == ['checkout']
+    assert 'Files: 7 total, 5 processed' in format_report(report)
+    assert analyzer.theme_extractor.max_in_flight <= 2
+
+    # Only the failed file is retried on the next run
+    write_raw(tmp_path, 'broken', 'no longer breaks')
+    report = processor.process_all()
+    assert (report['processed'], report['unchanged'], report['failed']) == (1, 6, [])
+
+
+def test_manifest_plans_new_changed_and_stale_files(tmp_path):
+    processor = make_processor(tmp_path, FakeAnalyzer())
+    for name in ('a', 'b', 'c'):
+        write_raw(tmp_path, name, 'It was fine.')
+    assert processor.process_all(pipelined=False)['processed'] == 3
+
+    write_raw(tmp_path, 'a', 'It was slow.')
+    write_raw(tmp_path, 'd', 'It was fine.')
+    (tmp_path / 'processed' / 'c.json').unlink()
+    report = processor.process_all(dry_run=True)
+    assert {job['file_path'].rsplit('/', 1)[-1]: job['reason'] for job in report['plan']} == \
+        {'a.json': 'changed', 'c.json': 'missing output', 'd.json': 'new'}
+    assert 'Would process 3 of 4 files (1 unchanged)' in format_report(report)
+    assert report['processed'] == 0 and not (tmp_path / 'processed' / 'd.json').exists()
+
+    # A restart picks the manifest up from disk; a new analysis version makes everything stale
+    processor.manifest = TranscriptManifest(processor.manifest.path)
+    processor.analysis_version = 'next'
+    assert {job['reason'] for job in processor.plan(processor.raw_files())} == {'changed', 'new', 'stale'}
+    assert len(processor.plan(processor.raw_files(), force=True)) == 4
+
+
+def fake_worker_processor(batch_size):
+    processor = TranscriptProcessor(batch_size=batch_size, load_models=False)
+    processor.semantic_analyzer = FakeAnalyzer(fail_on='crash')
+    return processor
+
+
+def test_workers_merge_outcomes_in_parent(tmp_path):
+    processor = make_processor(tmp_path, None)
+    processor.processor_factory = fake_worker_processor
+    for i in range(4):
+        write_raw(tmp_path, f'i{i}', 'It was slow.')
+    write_raw(tmp_path, 'broken', 'crash the model')
+
+    report = processor.process_all(workers=2)
+
+    assert report['processed'] == 4 and report['chunks'] == 4
+    assert [path.rsplit('/', 1)[-1] for path in report['failed']] == ['broken.json']
+    assert 'model failure' in format_report(report)
+    assert sum(stats['files'] for stats in report['workers'].values()) == 5
+    # Only the parent writes the manifest
+    assert [(job['file_path'].rsplit('/', 1)[-1], job['reason']) for job in processor.plan(processor.raw_files())] == \
+        [('broken.json', 'new')]
+
+
+def model_free_worker_processor(batch_size):
+    """A real TranscriptProcessor and SemanticAnalyzer, with the model loaders stubbed in the worker."""
+    import semantic_analysis
+    semantic_analysis.get_sentence_transformer = lambda name: None
+    semantic_analysis.get_emotion_pipeline = lambda name: None
+    processor = TranscriptProcessor(batch_size=batch_size)
+    processor.semantic_analyzer.theme_extractor = FakeThemeExtractor()
+    return processor
+
+
+def test_workers_do_not_open_qdrant(tmp_path, monkeypatch):
+    # Local Qdrant admits one process per directory, so workers must leave it alone
+    monkeypatch.delenv('QDRANT_URL', raising=False)
+    monkeypatch.setenv('QDRANT_PATH', str(tmp_path / 'qdrant'))
+    monkeypatch.setenv('OPENAI_API_KEY', 'test')
+    monkeypatch.setenv('LLM_CACHE_PATH', '')
+    processor = make_processor(tmp_path, None)
+    processor.processor_factory = model_free_worker_processor
+    for i in range(2):
+        write_raw(tmp_path, f'i{i}', 'It was slow.')
+
+    report = processor.process_all(workers=2)
+
+    assert report['processed'] == 2 and report['failed'] == []
+    assert not (tmp_path / 'qdrant').exists()
+
+
+def failing_worker_processor(batch_size):
+    raise RuntimeError("no API key")
+
+
+def test_workers_that_fail_to_start_fail_their_files(tmp_path):
+    processor = make_processor(tmp_path, None)
+    processor.processor_factory = failing_worker_processor
+    for i in range(3):
+        write_raw(tmp_path, f'i{i}', 'It was slow.')
+
+    report = processor.process_all(workers=2)
+
+    assert report['processed'] == 0 and len(report['failed']) == 3
+    assert all('no API key' in error for error in report['errors'].values())
@@ -8,11 +8,20 @@ from typing import List, Dict, Any, Optional, Union
 import traceback
 import numpy as np
 from dotenv import load_dotenv
-import faiss
 import logging
+import threading
+import atexit
+import weakref
+import uuid
+from contextlib import contextmanager
 from datetime import datetime
 from langchain_openai import OpenAIEmbeddings
 from langchain.docstore.document import Document
+from daria_interview_tool.text_index import TextIndex, raw_interview_documents, text_index_path
+from daria_interview_tool.id_index import IdMappedIndex
+from daria_interview_tool.embedding_cache import DEFAULT_CACHE_PATH, EmbeddingCache
+from daria_interview_tool.embedding_executor import EmbeddingExecutor
+from daria_interview_tool.interview_chunks import aggregate_chunk_scores, chunk_key, split_chunk_key
 
 # Load environment variables
 load_dotenv()
@@ -20,42 +29,68 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 class CustomEmbeddings:
-    def __init__(self, api_key: str):
-        """Initialize the embeddings class with API key."""
+    def __init__(self, api_key: str, cache_path: Optional[str] = None, base_url: Optional[str] = None):
+        """Initialize the embeddings class with API key and an embedding cache at cache_path."""
         try:
             self.api_key = api_key
             self.model = "text-embedding-3-small"
             self.embedding_dimension = 1536
             
-            # Initialize the client once during initialization
+            # Initialize the client once during initialization; retries are left to the executor
             self.client = OpenAI(
                 api_key=self.api_key,
-                base_url="https://api.openai.com/v1"
+                base_url=base_url or os.getenv('OPENAI_EMBEDDINGS_BASE_URL', "https://api.openai.com/v1"),
+                max_retries=0
             )
+            
+            # Several token-sized batches in flight, within an optional tokens-per-minute budget
+            tokens_per_minute = os.getenv('EMBEDDING_TOKENS_PER_MINUTE')
+            self.executor = EmbeddingExecutor(
+                self._embed_batch,
+                max_concurrency=int(os.getenv('EMBEDDING_CONCURRENCY', '4')),
+                tokens_per_minute=int(tokens_per_minute) if tokens_per_minute else None,
+                model=self.model
+            )
+            
+            # Texts embedded before are served from the cache instead of the API
+            try:
+                self.cache = EmbeddingCache(cache_path or os.getenv('EMBEDDING_CACHE_PATH', DEFAULT_CACHE_PATH))
+            except Exception as e:
+                logger.error(f"Error opening embedding cache, embedding without it: {str(e)}")
+                self.cache = None
             logger.info("CustomEmbeddings initialized successfully")
         except Exception as e:
             logger.error(f"Error initializing CustomEmbeddings: {str(e)}")
             logger.error(traceback.format_exc())
             raise
 
+    def _embed_cached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, sending only the ones missing from the cache to the API."""
+        if self.cache is not None:
+            embeddings = self.cache.get_many(self.model, self.embedding_dimension, texts)
+        else:
+            embeddings = [None] * len(texts)
+        
+        # Each distinct missing text is sent once
+        missing = list(dict.fromkeys(text for text, embedding in zip(texts, embeddings) if embedding is None))
+        fresh = dict(zip(missing, self.executor.embed(missing)))
+        return [embedding if embedding is not None else fresh[text] for text, embedding in zip(texts, embeddings)]
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """One embeddings API request; cached right away so a crash part-way through keeps finished batches."""
+        response = self.client.embeddings.create(
+            model=self.model,
+            input=batch
+        )
+        batch_embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        if self.cache is not None:
+            self.cache.put_many(self.model, self.embedding_dimension, batch, batch_embeddings)
+        return batch_embeddings
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Embed a list of texts."""
         try:
-            # Process texts in batches of 100
-            batch_size = 100
-            all_embeddings = []
-            
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i:i + batch_size]
-                response = self.client.embeddings.create(
-                    model=self.model,
-                    input=batch
-                )
-                
-                batch_embeddings = [item.embedding for item in response.data]
-                all_embeddings.extend(batch_embeddings)
-            
-            return all_embeddings
+            return self._embed_cached(texts)
         except Exception as e:
             logger.error(f"Error embedding documents: {str(e)}")
             logger.error(traceback.format_exc())
@@ -64,16 +99,16 @@ class CustomEmbeddings:
     def embed_query(self, text: str) -> List[float]:
         """Embed a single piece of text."""
         try:
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=text
-            )
-            return response.data[0].embedding
+            return self._embed_cached([text])[0]
         except Exception as e:
             logger.error(f"Error embedding query: {str(e)}")
             logger.error(traceback.format_exc())
             raise
 
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the embedding cache."""
+        return self.cache.stats() if self.cache is not None else {}
+
     def __call__(self, texts: Union[str, List[str]]) -> List[List[float]]:
         """Make the class callable for compatibility with LangChain."""
         if isinstance(texts, str):
@@ -108,10 +143,12 @@ class InterviewVectorStore:
                 separators=["\n\n", "\n", " ", ""]  # Better separators for interview content
             )
             
-            # Initialize state
-            self.index = None
-            self.interview_ids = []
+            # Initialize state; passage vectors are keyed "<interview_id>#<chunk_index>" through stable int64 FAISS ids
+            self.index: Optional[IdMappedIndex] = None
             self.interview_metadata = {}
+            # Text and position of every passage, kept in memory so search never reads interview files
+            self.chunk_payloads: Dict[str, Dict[str, Any]] = {}
+            self.interview_chunks: Dict[str, List[str]] = {}
             
             # Create vector store directory if it doesn't exist
             os.makedirs(vector_store_path, exist_ok=True)
@@ -126,16 +163,16 @@ class InterviewVectorStore:
                 if not self.load_vector_store():
                     logger.warning("Failed to load existing vector store, creating new one...")
                     dimension = self.embeddings.embedding_dimension
-                    self.index = faiss.IndexFlatL2(dimension)
+                    self.index = IdMappedIndex(dimension)
                     logger.info(f"Created new FAISS index with dimension {dimension}")
             else:
                 logger.info("Creating new FAISS index...")
                 dimension = self.embeddings.embedding_dimension
-                self.index = faiss.IndexFlatL2(dimension)
+                self.index = IdMappedIndex(dimension)
                 logger.info(f"Created new FAISS index with dimension {dimension}")
                 
             # Validate initialization
-            if not self.index:
+            if self.index is None:
                 raise RuntimeError("Failed to initialize FAISS index")
             if not hasattr(self.embeddings, 'embed_query'):
                 raise RuntimeError("Embeddings not properly initialized")
@@ -148,6 +185,11 @@ class InterviewVectorStore:
             logger.error(traceback.format_exc())
             raise
     
+    @property
+    def interview_ids(self) -> List[str]:
+        """Ids of the interviews currently in the index."""
+        return list(self.interview_chunks)
+    
     def _clean_content(self, content: str) -> str:
         """Clean content by removing Daria's comments and extracting only user responses."""
         try:
@@ -193,35 +235,55 @@ class InterviewVectorStore:
             print(f"Error extracting user responses: {str(e)}")
             return ""
     
-    def _prepare_interview_text(self, interview: Dict[str, Any]) -> str:
-        """Prepare interview text for vectorization."""
-        try:
-            # Extract user responses from transcript
-            user_responses = self._extract_user_responses(interview.get('transcript', ''))
-            
-            # Clean and format the analysis
-            analysis = interview.get('analysis', '').strip()
-            
-            # Add project context
-            project_name = interview.get('project_name', '')
-            interview_type = interview.get('interview_type', '')
-            
-            # Prepare the text with clear section markers
-            prepared_text = f"""
-Project: {project_name}
-Type: {interview_type}
+    def _prepare_interview_chunks(self, interview: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Split an interview into passages for vectorization: user responses, then analysis.
 
-User Responses:
-{user_responses}
+        Passages are embedded with a short project/type header for context;
+        the payload keeps just the passage text.
+        """
+        user_responses = self._extract_user_responses(interview.get('transcript', '') or '')
+        analysis = interview.get('analysis')
+        analysis = '' if analysis is None else str(analysis).strip()
+        header = f"Project: {interview.get('project_name', '')}\nType: {interview.get('interview_type', '')}\n\n"
 
-Analysis:
-{analysis}
-"""
-            return prepared_text
-        except Exception as e:
-            logger.error(f"Error preparing interview text: {str(e)}")
-            logger.error(traceback.format_exc())
-            raise
+        chunks = []
+        for section, text in (('responses', user_responses), ('analysis', analysis)):
+            if not text.strip():
+                continue
+            for passage in self.text_splitter.split_text(text):
+                chunks.append({'section': section, 'text': passage, 'embed_text': header + passage})
+        return chunks
+    
+    def _drop_chunks(self, interview_id: str) -> int:
+        """Remove every passage of an interview; returns how many vectors were removed."""
+        keys = self.interview_chunks.pop(interview_id, [])
+        for key in keys:
+            self.chunk_payloads.pop(key, None)
+        return self.index.remove(keys) if self.index is not None else 0
+    
+    def _store_chunks(self, prepared: List[tuple], embeddings: List[List[float]]) -> None:
+        """Replace the passages of each (interview_id, chunks) with their embeddings."""
+        keys = []
+        for interview_id, chunks in prepared:
+            self._drop_chunks(interview_id)
+            interview_keys = [chunk_key(interview_id, i) for i in range(len(chunks))]
+            for i, (key, chunk) in enumerate(zip(interview_keys, chunks)):
+                self.chunk_payloads[key] = {
+                    'interview_id': interview_id,
+                    'chunk_index': i,
+                    'section': chunk['section'],
+                    'text': chunk['text']
+                }
+            self.interview_chunks[interview_id] = interview_keys
+            keys.extend(interview_keys)
+        self.index.add(keys, embeddings)
+    
+    def _group_chunks(self) -> Dict[str, List[str]]:
+        """Chunk keys of each interview, in passage order, from the payload store."""
+        grouped: Dict[str, List[str]] = {}
+        for key, payload in sorted(self.chunk_payloads.items(), key=lambda item: item[1]['chunk_index']):
+            grouped.setdefault(payload['interview_id'], []).append(key)
+        return grouped
     
     def add_interviews(self, interviews: List[Dict[str, Any]]) -> None:
         """Add multiple interviews to the vector store."""
@@ -230,7 +292,7 @@ Analysis:
                 logger.warning("No interviews provided to add")
                 return
 
-            if not self.index:
+            if self.index is None:
                 logger.error("Vector store not initialized")
                 raise RuntimeError("Vector store not initialized")
 
@@ -245,7 +307,7 @@ Analysis:
                     logger.warning("Skipping interview without ID")
                     continue
                     
-                if interview['id'] in self.interview_ids:
+                if interview['id'] in self.interview_chunks:
                     logger.info(f"Skipping duplicate interview: {interview['id']}")
                     continue
                     
@@ -257,21 +319,23 @@ Analysis:
 
             logger.info(f"Processing {len(valid_interviews)} interviews for vectorization")
             
+            prepared = []
             texts = []
             for interview in valid_interviews:
                 try:
-                    # Prepare the interview text using the helper method
-                    prepared_text = self._prepare_interview_text(interview)
-                    if not prepared_text.strip():
+                    # Prepare the interview passages using the helper method
+                    chunks = self._prepare_interview_chunks(interview)
+                    if not chunks:
                         logger.warning(f"Skipping interview {interview['id']} with empty content")
                         continue
                         
-                    texts.append(prepared_text)
-                    self.interview_ids.append(interview['id'])
+                    prepared.append((interview['id'], chunks))
+                    texts.extend(chunk['embed_text'] for chunk in chunks)
                     self.interview_metadata[interview['id']] = {
                         'project_name': interview.get('project_name', ''),
                         'interview_type': interview.get('interview_type', ''),
-                        'date': interview.get('date', '')
+                        'date': interview.get('date', ''),
+                        'chunk_count': len(chunks)
                     }
                 except Exception as e:
                     logger.error(f"Error processing interview {interview.get('id', 'unknown')}: {str(e)}")
@@ -288,12 +352,12 @@ Analysis:
                     logger.error("Failed to generate embeddings")
                     return
                     
-                # Add embeddings to the index
-                self.index.add(np.array(embeddings).astype('float32'))
+                # Add embeddings to the index under their passage keys
+                self._store_chunks(prepared, embeddings)
                 
                 # Save the updated vector store
                 self.save_vector_store()
-                logger.info(f"Successfully added {len(texts)} interviews to vector store")
+                logger.info(f"Successfully added {len(prepared)} interviews ({len(texts)} passages) to vector store")
                 
             except Exception as e:
                 logger.error(f"Error during embedding process: {str(e)}")
@@ -308,7 +372,7 @@ Analysis:
     def save_vector_store(self) -> None:
         """Save the vector store to disk."""
         try:
-            if not self.index:
+            if self.index is None:
                 logger.warning("No vector store to save")
                 return
 
@@ -318,12 +382,14 @@ Analysis:
             os.makedirs(self.vector_store_path, exist_ok=True)
             
             # Save the FAISS index
-            faiss.write_index(self.index, self.index_file)
+            self.index.write(self.index_file)
             
             # Save metadata
             metadata = {
                 'interview_ids': self.interview_ids,
                 'interview_metadata': self.interview_metadata,
+                'chunk_payloads': self.chunk_payloads,
+                'id_table': self.index.table(),
                 'last_updated': datetime.now().isoformat()
             }
             with open(self.metadata_file, 'w') as f:
@@ -344,9 +410,6 @@ Analysis:
 
             logger.info(f"Loading vector store from {self.index_file}")
             
-            # Load the FAISS index
-            self.index = faiss.read_index(self.index_file)
-            
             # Load metadata
             if not os.path.exists(self.metadata_file):
                 logger.warning(f"Metadata file not found at {self.metadata_file}")
@@ -354,12 +417,21 @@ Analysis:
                 
             with open(self.metadata_file, 'r') as f:
                 metadata = json.load(f)
-                self.interview_ids = metadata.get('interview_ids', [])
                 self.interview_metadata = metadata.get('interview_metadata', {})
                 last_updated = metadata.get('last_updated')
                 if last_updated:
                     logger.info(f"Vector store last updated: {last_updated}")
             
+            # Stores saved before the id map are converted without re-embedding
+            self.index = IdMappedIndex.read(self.index_file, metadata)
+            self.chunk_payloads = metadata.get('chunk_payloads', {})
+            if 'chunk_payloads' not in metadata and len(self.index):
+                # Whole-interview vectors from before chunking; add_interviews re-adds them as passages
+                logger.warning("Discarding interview-level vectors, interviews will be re-indexed as passages")
+                self.index = IdMappedIndex(self.index.dimension)
+                self.interview_metadata = {}
+            self.interview_chunks = self._group_chunks()
+            
             logger.info(f"Vector store loaded successfully with {len(self.interview_ids)} interviews")
             return True
         except Exception as e:
@@ -412,10 +484,16 @@ Analysis:
             print(f"Error extracting relevant content: {str(e)}")
             return content
 
-    def semantic_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Search for similar interviews using semantic search."""
+    def semantic_search(self, query: str, k: int = 5, aggregation: str = 'max',
+                        passages: int = 3) -> List[Dict[str, Any]]:
+        """Search interviews by their best-matching passages.
+
+        Passage scores are folded into one score per interview ('max' or
+        'mean' aggregation) and each result carries its top matching passages
+        from the in-memory payload store, so no interview file is read.
+        """
         try:
-            if not self.index or not self.interview_ids:
+            if self.index is None or not len(self.index):
                 logger.warning("No interviews in vector store")
                 return []
 
@@ -427,56 +505,33 @@ Analysis:
             # Get query embedding
             query_embedding = self.embeddings.embed_query(query)
             
-            # Search the index with a larger k to get more potential matches
-            search_k = min(k * 20, len(self.interview_ids))  # Increased multiplier for more candidates
-            distances, indices = self.index.search(
-                np.array([query_embedding]).astype('float32'),
-                search_k
-            )
+            # Interviews contribute several passages each, so search a wide candidate pool
+            search_k = min(k * 20, len(self.index))
+            matches = self.index.search([query_embedding], search_k)[0]
             
-            # Get unique interview IDs from search results
-            unique_interviews = {}
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.interview_ids):  # Ensure valid index
-                    interview_id = self.interview_ids[idx]
-                    if interview_id not in unique_interviews:
-                        # Load the interview data
-                        interview_file = Path('interviews') / f"{interview_id}.json"
-                        interview_data = {}
-                        if interview_file.exists():
-                            with open(interview_file) as f:
-                                interview_data = json.load(f)
-                        
-                        # Skip interviews with empty transcripts
-                        if not interview_data.get('transcript'):
-                            continue
-                        
-                        # Calculate similarity score using a modified sigmoid function
-                        # This provides better differentiation between results
-                        l2_distance = float(distances[0][i])
-                        # Use a more lenient sigmoid function with a larger divisor
-                        similarity_score = 1 / (1 + np.exp(l2_distance / 15))  # Increased divisor for smoother falloff
-                        
-                        # Skip results with very low similarity
-                        if similarity_score < 0.05:  # Lowered threshold to catch more near matches
-                            continue
-                        
-                        # Format the result with all necessary fields
-                        unique_interviews[interview_id] = {
-                            'id': interview_id,
-                            'project_name': interview_data.get('project_name', 'Unknown Project'),
-                            'interview_type': interview_data.get('interview_type', 'Unknown Type'),
-                            'date': interview_data.get('date', datetime.now().isoformat()),
-                            'transcript': interview_data.get('transcript', ''),
-                            'analysis': interview_data.get('analysis', ''),
-                            'score': similarity_score
-                        }
-                        if len(unique_interviews) >= k:
-                            break
+            # Turn passage distances into similarities (lenient sigmoid for a smoother falloff)
+            scored = []
+            for key, l2_distance in matches:
+                similarity_score = float(1 / (1 + np.exp(l2_distance / 15)))
+                if similarity_score >= 0.05:
+                    scored.append((key, similarity_score))
             
-            # Convert to list and sort by score
-            results = list(unique_interviews.values())
-            results.sort(key=lambda x: x['score'], reverse=True)
+            # Fold passage scores into one score per interview, best first
+            results = []
+            for match in aggregate_chunk_scores(scored, mode=aggregation, passages=passages)[:k]:
+                interview_id = match['interview_id']
+                metadata = self.interview_metadata.get(interview_id, {})
+                results.append({
+                    'id': interview_id,
+                    'project_name': metadata.get('project_name') or 'Unknown Project',
+                    'interview_type': metadata.get('interview_type') or 'Unknown Type',
+                    'date': metadata.get('date') or datetime.now().isoformat(),
+                    'score': match['score'],
+                    'passages': [
+                        dict(self.chunk_payloads[key], score=score)
+                        for key, score in match['passages'] if key in self.chunk_payloads
+                    ]
+                })
             
             logger.info(f"Found {len(results)} unique interviews")
             return results
@@ -489,33 +544,31 @@ Analysis:
     def find_similar_interviews(self, interview_id: str, k: int = 3) -> List[Dict[str, Any]]:
         """Find interviews similar to a given interview."""
         try:
-            if interview_id not in self.interview_ids:
+            if self.index is None or interview_id not in self.interview_chunks:
                 return []
 
-            # Get the index of the interview
-            idx = self.interview_ids.index(interview_id)
+            # The mean of the interview's passage vectors stands in for the whole interview
+            own_keys = self.interview_chunks[interview_id]
+            centroid = np.mean([self.index.reconstruct(key) for key in own_keys], axis=0)
             
-            # Get the embedding at that index
-            embedding = self.index.reconstruct(idx)
-            
-            # Search for similar interviews
-            distances, indices = self.index.search(
-                np.array([embedding]).astype('float32'), k + 1
-            )
+            # Search enough passages to find k other interviews
+            search_k = min(len(self.index), len(own_keys) + (k + 1) * 20)
+            matches = self.index.search([centroid], search_k)[0]
 
-            # Get results (excluding the input interview)
-            results = []
-            for i, idx in enumerate(indices[0]):
-                if idx < len(self.interview_ids) and idx != self.interview_ids.index(interview_id):
-                    similar_id = self.interview_ids[idx]
-                    metadata = self.interview_metadata.get(similar_id, {})
-                    results.append({
-                        'id': similar_id,
-                        'score': float(distances[0][i]),
-                        'metadata': metadata
-                    })
+            # Each interview is as close as its closest passage (matches come nearest first)
+            closest = {}
+            for key, distance in matches:
+                similar_id = split_chunk_key(key)[0]
+                if similar_id != interview_id and similar_id not in closest:
+                    closest[similar_id] = distance
 
-            return results
+            results = [{
+                'id': similar_id,
+                'score': distance,
+                'metadata': self.interview_metadata.get(similar_id, {})
+            } for similar_id, distance in closest.items()]
+
+            return results[:k]
         except Exception as e:
             print(f"Error finding similar interviews: {str(e)}")
             return []
@@ -523,12 +576,7 @@ Analysis:
     def remove_interview(self, interview_id: str):
         """Remove an interview from the vector store."""
         try:
-            if interview_id in self.interview_ids:
-                idx = self.interview_ids.index(interview_id)
-                # Remove the embedding
-                self.index.remove_ids(np.array([idx]))
-                # Remove from metadata
-                self.interview_ids.pop(idx)
+            if self.index is not None and self._drop_chunks(interview_id):
                 self.interview_metadata.pop(interview_id, None)
                 self.save_vector_store()
                 print(f"Successfully removed interview {interview_id}")
@@ -536,21 +584,54 @@ Analysis:
             print(f"Error removing interview: {str(e)}")
             raise 
 
+# Open VectorStores, flushed at exit; held weakly so discarded stores can be freed
+_open_stores = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_open_stores() -> None:
+    """Write the pending changes of every VectorStore still alive."""
+    for store in list(_open_stores):
+        try:
+            store.flush()
+        except Exception as e:
+            logger.error(f"Error flushing vector store {store.index_path}: {str(e)}")
+
+
 class VectorStore:
-    def __init__(self, index_path: str = "vector_store"):
-        """Initialize the vector store with a specified path."""
+    def __init__(self, index_path: str = "vector_store", embeddings: Optional[Any] = None,
+                 save_delay: Optional[float] = 2.0):
+        """Initialize the vector store with a specified path.
+
+        Args:
+            index_path: Directory of the FAISS store and the interview JSON files
+            embeddings: LangChain embeddings (default: OpenAIEmbeddings)
+            save_delay: Seconds to coalesce changes before writing the store; None
+                writes only on flush(), 0 writes after every change
+        """
         self.index_path = index_path
-        self.embeddings = OpenAIEmbeddings()
+        self.embeddings = embeddings or OpenAIEmbeddings()
         self.vector_store = None
+        # Docstore ids of every interview's messages, so deletes never touch other documents
+        self.doc_ids: Dict[str, List[str]] = {}
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._batch_depth = 0
         self.load_or_create_store()
+        # Pending changes are written when the process exits
+        _open_stores.add(self)
 
     def load_or_create_store(self) -> None:
         """Load an existing vector store or create a new one if it doesn't exist."""
         try:
             if os.path.exists(os.path.join(self.index_path, "index.faiss")):
+                # The pickled docstore was written by save_store, never by a third party
                 self.vector_store = FAISS.load_local(
                     self.index_path,
-                    self.embeddings
+                    self.embeddings,
+                    allow_dangerous_deserialization=True
                 )
             else:
                 # Create a new store with an empty document
@@ -567,57 +648,141 @@ class VectorStore:
                 self.embeddings
             )
             self.save_store()
+        self._index_doc_ids()
+
+    def _index_doc_ids(self) -> None:
+        """Rebuild the interview -> docstore ids map from the loaded docstore."""
+        self.doc_ids = {}
+        if self.vector_store is None:
+            return
+        for doc_id in self.vector_store.index_to_docstore_id.values():
+            doc = self.vector_store.docstore.search(doc_id)
+            interview_id = doc.metadata.get("interview_id") if isinstance(doc, Document) else None
+            if interview_id:
+                self.doc_ids.setdefault(interview_id, []).append(doc_id)
 
     def save_store(self) -> None:
         """Save the vector store to disk."""
-        if self.vector_store:
-            os.makedirs(self.index_path, exist_ok=True)
-            self.vector_store.save_local(self.index_path)
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self.vector_store:
+                os.makedirs(self.index_path, exist_ok=True)
+                self.vector_store.save_local(self.index_path)
+            self._dirty = False
+
+    def flush(self) -> None:
+        """Write pending changes now, if there are any."""
+        with self._lock:
+            if self._dirty:
+                self.save_store()
+
+    def _mark_dirty(self) -> None:
+        """Schedule one save for all changes made within save_delay seconds."""
+        with self._lock:
+            self._dirty = True
+            if self._batch_depth or self.save_delay is None:
+                return
+            if self.save_delay <= 0:
+                self.save_store()
+            elif self._save_timer is None:
+                self._save_timer = threading.Timer(self.save_delay, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    @contextmanager
+    def batch(self):
+        """Group many changes into a single save when the outermost batch ends."""
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if not self._batch_depth and self._dirty:
+                    self._dirty = False
+                    self._mark_dirty()
+
+    def _interview_documents(self, interview_data: Dict[str, Any]) -> List[Document]:
+        """One document per transcript message, carrying the interview metadata."""
+        # Add interview metadata
+        metadata = {
+            "interview_id": interview_data.get("interview_id", ""),
+            "project_name": interview_data.get("project", {}).get("name", ""),
+            "interview_type": interview_data.get("project", {}).get("type", ""),
+            "researcher_name": interview_data.get("researcher", {}).get("name", ""),
+            "interviewee_name": interview_data.get("interviewee", {}).get("name", ""),
+            "date": datetime.now().isoformat(),
+        }
+        
+        # Process transcript
+        documents = []
+        for entry in interview_data.get("transcript", []):
+            # Create a document for each message
+            documents.append(Document(
+                page_content=f"{entry['speaker']}: {entry['text']}",
+                metadata={
+                    **metadata,
+                    "timestamp": entry["timestamp"],
+                    "speaker": entry["speaker"]
+                }
+            ))
+        return documents
 
     def add_interview(self, interview_data: Dict[str, Any]) -> None:
         """Add an interview to the vector store."""
+        self.add_interviews([interview_data])
+
+    def add_interviews(self, interviews: List[Dict[str, Any]]) -> None:
+        """Add interviews with one embedding pass and one (deferred) save.
+
+        Re-adding an interview replaces its previous messages.
+        """
         try:
-            # Create a document for each message in the transcript
             documents = []
-            
-            # Add interview metadata
-            metadata = {
-                "interview_id": interview_data.get("interview_id", ""),
-                "project_name": interview_data.get("project", {}).get("name", ""),
-                "interview_type": interview_data.get("project", {}).get("type", ""),
-                "researcher_name": interview_data.get("researcher", {}).get("name", ""),
-                "interviewee_name": interview_data.get("interviewee", {}).get("name", ""),
-                "date": datetime.now().isoformat(),
-            }
-            
-            # Process transcript
-            transcript = interview_data.get("transcript", [])
-            for entry in transcript:
-                # Create a document for each message
-                doc = Document(
-                    page_content=f"{entry['speaker']}: {entry['text']}",
-                    metadata={
-                        **metadata,
-                        "timestamp": entry["timestamp"],
-                        "speaker": entry["speaker"]
-                    }
-                )
-                documents.append(doc)
-            
-            # Add documents to vector store
-            if documents:
-                if self.vector_store is None:
-                    self.vector_store = FAISS.from_documents(documents, self.embeddings)
-                else:
-                    self.vector_store.add_documents(documents)
-                self.save_store()
+            ids = []
+            added = {}
+            for interview_data in interviews:
+                interview_docs = self._interview_documents(interview_data)
+                interview_id = interview_data.get("interview_id", "")
+                # A fresh suffix per add lets new documents go in before the old ones are dropped
+                run = uuid.uuid4().hex[:8]
+                interview_ids = [f"{interview_id}:{run}:{i}" for i in range(len(interview_docs))]
+                documents.extend(interview_docs)
+                ids.extend(interview_ids)
+                if interview_id:
+                    added[interview_id] = interview_ids
+            
+            with self._lock:
+                # Add documents to vector store
+                if documents:
+                    if self.vector_store is None:
+                        self.vector_store = FAISS.from_documents(documents, self.embeddings, ids=ids)
+                    else:
+                        self.vector_store.add_documents(documents, ids=ids)
+                    for interview_id in added:
+                        self._remove_documents(interview_id)
+                    self.doc_ids.update(added)
+                    self._mark_dirty()
                 
-                # Save raw interview data
-                self._save_interview_json(interview_data)
+            # Save raw interview data
+            for interview_data in interviews:
+                if interview_data.get("transcript"):
+                    self._save_interview_json(interview_data)
         except Exception as e:
             print(f"Error adding interview: {e}")
             raise
 
+    def _remove_documents(self, interview_id: str) -> int:
+        """Drop an interview's documents by docstore id; nothing is re-embedded."""
+        ids = [doc_id for doc_id in self.doc_ids.pop(interview_id, [])
+               if doc_id in self.vector_store.docstore._dict]
+        if ids:
+            self.vector_store.delete(ids)
+        return len(ids)
+
     def _save_interview_json(self, interview_data: Dict[str, Any]) -> None:
         """Save the raw interview data as JSON."""
         try:
@@ -721,23 +886,11 @@ class VectorStore:
             if os.path.exists(json_path):
                 os.remove(json_path)
             
-            # Remove documents from vector store
+            # Remove documents from vector store by id, without re-embedding the rest
             if self.vector_store:
-                # Create a new store without the deleted interview's documents
-                docs = []
-                for doc in self.vector_store.docstore._dict.values():
-                    if doc.metadata.get("interview_id") != interview_id:
-                        docs.append(doc)
-                
-                if docs:
-                    self.vector_store = FAISS.from_documents(docs, self.embeddings)
-                else:
-                    # If no documents left, create empty store
-                    self.vector_store = FAISS.from_documents(
-                        [Document(page_content="", metadata={})],
-                        self.embeddings
-                    )
-                self.save_store()
+                with self._lock:
+                    if self._remove_documents(interview_id):
+                        self._mark_dirty()
             
             return True
         except Exception as e:
@@ -755,6 +908,9 @@ class RawInterviewStore:
         self.index_path = Path('vector_store/raw')
         self.index_path.mkdir(parents=True, exist_ok=True)
         
+        # Inverted index over raw transcripts for exact_match_search
+        self.text_index = TextIndex(text_index_path(str(self.raw_dir)))
+        
         # Initialize or load FAISS index
         self.load_or_create_store()
         
@@ -814,6 +970,8 @@ class RawInterviewStore:
                 self.vector_store.add_documents([document])
             
             self.save_store()
+            if metadata['id']:
+                self.text_index.replace_group(metadata['id'], raw_interview_documents(metadata['id'], interview_data))
             logger.info(f"Added raw interview {metadata['id']} to vector store")
             
         except Exception as e:
@@ -821,27 +979,25 @@ class RawInterviewStore:
             raise
             
     def exact_match_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Perform exact text match search on raw interviews."""
+        """Perform exact phrase search on raw interviews, best BM25 match first."""
         try:
-            # Load all raw interviews
+            # Index raw files added or changed since the last search
+            self.text_index.sync(str(self.raw_dir), raw_interview_documents)
+            
             results = []
-            for file in self.raw_dir.glob('*.json'):
-                with file.open() as f:
-                    interview = json.load(f)
-                    transcript = ' '.join(
-                        f"{msg['speaker']}: {msg['text']}"
-                        for msg in interview.get('transcript', [])
-                    )
-                    if query.lower() in transcript.lower():
-                        results.append({
-                            'id': interview.get('id'),
-                            'title': interview.get('title'),
-                            'project_name': interview.get('project_name'),
-                            'match_type': 'exact',
-                            'score': 1.0
-                        })
+            for hit in self.text_index.search(query, limit=k, phrase=True):
+                fields = hit['fields']
+                results.append({
+                    'id': fields.get('id'),
+                    'title': fields.get('title'),
+                    'project_name': fields.get('project_name'),
+                    'match_type': 'exact',
+                    'score': hit['score'],
+                    'snippet': hit['snippet'],
+                    'highlights': hit['snippet_highlights']
+                })
                         
-            return results[:k]
+            return results
             
         except Exception as e:
             logger.error(f"Error in exact match search: {str(e)}")
@@ -875,39 +1031,41 @@ class ProcessedInterviewStore:
     
     def __init__(self):
         """Initialize the processed interview store."""
-        from qdrant_client import QdrantClient
-        from qdrant_client.http import models
+        from semantic_analysis import SemanticAnalyzer
+        from daria_interview_tool.qdrant_store import ensure_collection, get_qdrant_client
         
         self.processed_dir = Path('interviews/processed')
         self.semantic_analyzer = SemanticAnalyzer()
         
-        # Initialize Qdrant client
-        self.qdrant = QdrantClient(":memory:")
-        self.collection_name = "interview_chunks"
+        # Persistent on-disk Qdrant; chunks added by earlier runs are reused
+        self.qdrant = get_qdrant_client()
+        self.collection_name = "processed_interview_chunks"
         
-        # Create collection for chunks
-        self.qdrant.recreate_collection(
-            collection_name=self.collection_name,
-            vectors_config=models.VectorParams(
-                size=384,  # MiniLM-L6-v2 embedding size
-                distance=models.Distance.COSINE
-            )
+        # Create collection for chunks unless it already exists
+        ensure_collection(
+            self.qdrant,
+            self.collection_name,
+            size=384  # MiniLM-L6-v2 embedding size
         )
         
     def add_interview(self, interview_data: Dict[str, Any]) -> None:
         """Add a processed interview's chunks to the vector store."""
+        from daria_interview_tool.qdrant_store import point_id
+        
         try:
             for chunk in interview_data.get('chunks', []):
                 # Get chunk embedding
-                embedding = self.semantic_analyzer.get_embedding(chunk['text'])
+                embedding = self.semantic_analyzer.get_embeddings(chunk['text'])
+                chunk_id = f"{interview_data['id']}_{chunk['timestamp']}"
                 
                 # Add to Qdrant
                 self.qdrant.upsert(
                     collection_name=self.collection_name,
                     points=[{
-                        'id': f"{interview_data['id']}_{chunk['timestamp']}",
+                        'id': point_id(chunk_id),
                         'vector': embedding,
                         'payload': {
+                            'chunk_id': chunk_id,
                             'interview_id': interview_data['id'],
                             'project_name': interview_data['project_name'],
                             'text': chunk['text'],
@@ -924,11 +1082,24 @@ class ProcessedInterviewStore:
             logger.error(f"Error adding processed interview: {str(e)}")
             raise
             
+    def _format_hit(self, hit, score: float) -> Dict[str, Any]:
+        """Search result of a Qdrant point."""
+        return {
+            'chunk_id': hit.payload.get('chunk_id', hit.id),
+            'interview_id': hit.payload['interview_id'],
+            'project_name': hit.payload['project_name'],
+            'text': hit.payload['text'],
+            'speaker': hit.payload['speaker'],
+            'timestamp': hit.payload['timestamp'],
+            'metadata': hit.payload['metadata'],
+            'score': score
+        }
+            
     def semantic_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Search for semantically similar chunks."""
         try:
             # Get query embedding
-            query_embedding = self.semantic_analyzer.get_embedding(query)
+            query_embedding = self.semantic_analyzer.get_embeddings(query)
             
             # Search in Qdrant
             results = self.qdrant.search(
@@ -937,19 +1108,7 @@ class ProcessedInterviewStore:
                 limit=k
             )
             
-            return [
-                {
-                    'chunk_id': hit.id,
-                    'interview_id': hit.payload['interview_id'],
-                    'project_name': hit.payload['project_name'],
-                    'text': hit.payload['text'],
-                    'speaker': hit.payload['speaker'],
-                    'timestamp': hit.payload['timestamp'],
-                    'metadata': hit.payload['metadata'],
-                    'score': hit.score
-                }
-                for hit in results
-            ]
+            return [self._format_hit(hit, hit.score) for hit in results]
             
         except Exception as e:
             logger.error(f"Error in semantic search: {str(e)}")
@@ -957,32 +1116,27 @@ class ProcessedInterviewStore:
             
     def emotion_search(self, emotion: str, k: int = 5) -> List[Dict[str, Any]]:
         """Search for chunks with specific emotion."""
+        from qdrant_client.http import models
+        
         try:
-            results = self.qdrant.search(
+            # A payload-filtered scroll: no query vector is involved
+            points, _ = self.qdrant.scroll(
                 collection_name=self.collection_name,
-                query_vector=[0.0] * 384,  # Dummy vector for filtering
+                scroll_filter=models.Filter(
+                    must=[
+                        models.FieldCondition(
+                            key='metadata.emotion',
+                            match=models.MatchValue(value=emotion)
+                        )
+                    ]
+                ),
                 limit=k,
-                query_filter={
-                    'must': [{
-                        'key': 'metadata.emotion',
-                        'match': {'value': emotion}
-                    }]
-                }
+                with_payload=True,
+                with_vectors=False
             )
             
-            return [
-                {
-                    'chunk_id': hit.id,
-                    'interview_id': hit.payload['interview_id'],
-                    'project_name': hit.payload['project_name'],
-                    'text': hit.payload['text'],
-                    'speaker': hit.payload['speaker'],
-                    'timestamp': hit.payload['timestamp'],
-                    'metadata': hit.payload['metadata'],
-                    'score': hit.score
-                }
-                for hit in results
-            ]
+            # Every match satisfies the filter exactly
+            return [self._format_hit(point, 1.0) for point in points]
             
         except Exception as e:
             logger.error(f"Error in emotion search: {str(e)}")
@@ -990,11 +1144,14 @@ class ProcessedInterviewStore:
             
     def find_similar_chunks(self, chunk_id: str, k: int = 5) -> List[Dict[str, Any]]:
         """Find chunks similar to a given chunk across all interviews."""
+        from daria_interview_tool.qdrant_store import point_id
+        
         try:
             # Get the chunk's vector
             chunk_info = self.qdrant.retrieve(
                 collection_name=self.collection_name,
-                ids=[chunk_id]
+                ids=[point_id(chunk_id)],
+                with_vectors=True
             )[0]
             
             # Search for similar chunks
@@ -1006,19 +1163,10 @@ class ProcessedInterviewStore:
             
             # Filter out the query chunk and format results
             return [
-                {
-                    'chunk_id': hit.id,
-                    'interview_id': hit.payload['interview_id'],
-                    'project_name': hit.payload['project_name'],
-                    'text': hit.payload['text'],
-                    'speaker': hit.payload['speaker'],
-                    'timestamp': hit.payload['timestamp'],
-                    'metadata': hit.payload['metadata'],
-                    'score': hit.score
-                }
+                self._format_hit(hit, hit.score)
                 for hit in results
-                if hit.id != chunk_id
-            ]
+                if hit.id != chunk_info.id
+            ][:k]
             
         except Exception as e:
             logger.error(f"Error finding similar chunks: {str(e)}")